@@ -8,8 +8,9 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
-    # Ensure data directory exists
-    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    # Ensure data directories exist
+    for key in ('DATA_DIR', 'DOC_DIR', 'UPLOAD_FOLDER', 'NER_DATA_DIR'):
+        os.makedirs(app.config[key], exist_ok=True)
     
     # Initialize globals (if any explicit init needed, otherwise handled in routes by usage)
     # Ideally extensions are initialized here if they were proper Flask-Extensions
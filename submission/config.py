@@ -12,10 +12,7 @@ NER_DATA_DIR = DATA_DIR / "nerdata"
 EMBEDDING_PATH = DATA_DIR / "nepali_embeddings.npz"
 POS_DICT_PATH = DATA_DIR / "id_pos_dict.json"
 
-# Ensure directories exist
-DATA_DIR.mkdir(exist_ok=True)
-DOC_DIR.mkdir(exist_ok=True)
-NER_DATA_DIR.mkdir(exist_ok=True)
+# Directories are created by create_app, not on import
 
 # Legacy support (strings)
 BASE_DIR_STR = str(BASE_DIR)
@@ -33,3 +30,7 @@ class Config:
     # Path constants
     QA_DATASET_PATH = os.path.join(DATA_DIR, 'qa_dataset.json')
     INTERACTIONS_PATH = os.path.join(DATA_DIR, 'interactions.json')
+    QUERY_LOG_PATH = os.path.join(DATA_DIR, 'query_log.txt')
+    # Ranking result cache: in-memory LRU size and SQLite tier (None disables it)
+    RESULT_CACHE_SIZE = 1024
+    RESULT_CACHE_PATH = os.path.join(DATA_DIR, 'result_cache.sqlite3')
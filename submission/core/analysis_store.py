@@ -0,0 +1,195 @@
+"""
+Persistent store of per-document analyses, shared by every component.
+
+Each text is analyzed once (tokens, then the stopword-filtered stems of
+TextAnalysis.analyze_text, computed on its fast path) and the result is kept in a SQLite table under
+data_dir, keyed by a hash of the text and of the analyzer configuration
+(tokenizer, stopwords, stem dictionary). Ranking, Indexing, WordAnalyzer
+and Foundations all read from it, so a document version is analyzed once,
+whichever component asks first, and never again across restarts. Changing
+the stopword list or the stemmer changes the key, so stale analyses are
+never served.
+
+Analyses are held as arrays of term IDs from the store's lexicon (see
+lexicon.py), persisted in the same database: a document costs 4 bytes per
+token in memory and on disk, and each distinct string is stored once.
+.tokens / .stemmed decode them back to strings.
+
+One store is shared per data_dir within a process (AnalysisStore.open); a
+forked child (e.g. a shard worker) opens its own instead of reusing the
+parent's SQLite connection. Processes sharing a data_dir share the lexicon
+through the database (see lexicon.py). Recently used analyses are also
+kept in memory (an LRU of max_entries).
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+from array import array
+from itertools import chain
+from collections import OrderedDict, namedtuple
+
+from .ch02_text_analysis import TextAnalysis, NEPALIKIT_AVAILABLE
+from .lexicon import Lexicon
+
+# Bump when analyze_text changes in a way the configuration hash cannot see
+ANALYSIS_VERSION = 2
+
+
+class DocumentAnalysis(namedtuple('DocumentAnalysis', ['token_ids', 'term_ids', 'lexicon'])):
+    """A document's tokens and stemmed terms, as array('I') of lexicon IDs."""
+    __slots__ = ()
+
+    @property
+    def tokens(self):
+        return self.lexicon.decode(self.token_ids)
+
+    @property
+    def stemmed(self):
+        return self.lexicon.decode(self.term_ids)
+
+
+class AnalysisStore:
+    _stores = {}
+    _stores_lock = threading.Lock()
+
+    def __init__(self, data_dir, path=None, max_entries=20000):
+        self.analyzer = TextAnalysis(data_dir)
+        self.path = path or os.path.join(data_dir, 'analysis_store.sqlite3')
+        self.max_entries = max_entries
+        self.entries = OrderedDict()    # key -> DocumentAnalysis, least recently used first
+        self._lock = threading.Lock()
+        # Other processes (shard workers) may hold the write lock while they store their analyses
+        self._db = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+        # Analyses can always be recomputed: no need to wait for the disk on every write
+        self._db.execute("PRAGMA synchronous = OFF")
+        if self._db.execute("PRAGMA user_version").fetchone()[0] < ANALYSIS_VERSION:
+            # Once per database: version 1 kept JSON lists of strings
+            self._db.execute("DROP TABLE IF EXISTS analyses")
+            self._db.execute(f"PRAGMA user_version = {ANALYSIS_VERSION}")
+        self._db.execute("CREATE TABLE IF NOT EXISTS document_terms (key TEXT PRIMARY KEY, token_ids BLOB, term_ids BLOB)")
+        self.lexicon = Lexicon(self._db)
+        self._db.commit()
+        self.config_hash = self._config_hash(self.analyzer)
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'analyzed': 0}
+
+    @classmethod
+    def open(cls, data_dir):
+        """The process-wide store of data_dir."""
+        key = os.path.abspath(data_dir)
+        with cls._stores_lock:
+            store = cls._stores.get(key)
+            if store is None:
+                store = cls._stores[key] = cls(data_dir)
+            return store
+
+    @classmethod
+    def _after_fork(cls):
+        # A SQLite connection must not be used across fork(), nor a lock another
+        # parent thread may have held: the child opens its own stores. The
+        # inherited ones are kept referenced so they are never closed here.
+        cls._inherited = list(cls._stores.values())
+        cls._stores = {}
+        cls._stores_lock = threading.Lock()
+
+    @staticmethod
+    def _config_hash(analyzer):
+        config = json.dumps([ANALYSIS_VERSION, 'nepalikit' if NEPALIKIT_AVAILABLE else 'fallback',
+                             sorted(analyzer.stopwords), sorted(analyzer.stem_dict.items())], ensure_ascii=False)
+        return hashlib.blake2b(config.encode('utf-8'), digest_size=16).hexdigest()
+
+    def key(self, text):
+        digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16, key=self.config_hash.encode('ascii'))
+        return digest.hexdigest()
+
+    def analyze(self, text):
+        """DocumentAnalysis of text, computed at most once per text version."""
+        return self.analyze_many([text])[0]
+
+    def analyze_many(self, texts, analyze=None):
+        """
+        DocumentAnalysis of every text, in order. Texts not in the store are
+        analyzed by analyze(texts) -> [(tokens, stemmed)] (default: this
+        store's TextAnalysis, in-process) and written back in one transaction.
+        """
+        keys = [self.key(text) for text in texts]
+        results = [None] * len(texts)
+        missing = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                analysis = self.entries.get(key)
+                if analysis is not None:
+                    self.entries.move_to_end(key)
+                    self.stats['memory_hits'] += 1
+                    results[i] = analysis
+                else:
+                    missing.setdefault(key, []).append(i)
+            if missing:
+                self._load(missing, results)
+
+        todo = [(key, indexes) for key, indexes in missing.items() if results[indexes[0]] is None]
+        if todo:
+            if analyze is None:
+                analyze = self._analyze
+            computed = analyze([texts[indexes[0]] for _, indexes in todo])
+            with self._lock:
+                # New strings get their IDs from the database in one go, then encoding is lookups
+                self.lexicon.extend(chain.from_iterable(chain(tokens, stemmed) for tokens, stemmed in computed))
+                encode = self.lexicon.encode
+                analyses = [DocumentAnalysis(encode(tokens), encode(stemmed), self.lexicon) for tokens, stemmed in computed]
+                self._db.executemany("INSERT OR REPLACE INTO document_terms VALUES (?, ?, ?)",
+                                     [(key, a.token_ids.tobytes(), a.term_ids.tobytes())
+                                      for (key, _), a in zip(todo, analyses)])
+                self._db.commit()
+                self.stats['analyzed'] += len(todo)
+                for (key, indexes), analysis in zip(todo, analyses):
+                    self._remember(key, analysis)
+                    for i in indexes:
+                        results[i] = analysis
+        return results
+
+    def _analyze(self, texts):
+        results = []
+        for text in texts:
+            tokens = self.analyzer.tokenize(text)
+            results.append((tokens, self.analyzer.stem_tokens(tokens)))
+        return results
+
+    def _load(self, missing, results):
+        keys = list(missing)
+        # SQLite limits the number of bound parameters per statement
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self._db.execute(f"SELECT key, token_ids, term_ids FROM document_terms WHERE key IN ({','.join('?' * len(chunk))})",
+                                    chunk).fetchall()
+            for key, token_ids, term_ids in rows:
+                analysis = DocumentAnalysis(self._ids(token_ids), self._ids(term_ids), self.lexicon)
+                if analysis.token_ids and max(analysis.token_ids) >= len(self.lexicon):
+                    # Stored by another process, with strings added to the lexicon since we read it
+                    self.lexicon.refresh()
+                self._remember(key, analysis)
+                self.stats['disk_hits'] += 1
+                for i in missing[key]:
+                    results[i] = analysis
+
+    @staticmethod
+    def _ids(blob):
+        ids = array('I')
+        ids.frombytes(blob)
+        return ids
+
+    def _remember(self, key, analysis):
+        self.entries[key] = analysis
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM document_terms").fetchone()[0]
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=AnalysisStore._after_fork)
@@ -0,0 +1,152 @@
+"""
+Frequency-weighted top-k autocomplete.
+
+CompletionTrie is a character trie in which every node caches the k best
+completions of its prefix, as a list sorted by (-score, text). Answering a
+prefix is a walk down len(prefix) nodes followed by a slice of the cached
+list; the subtree below is never visited.
+
+Scores only ever grow (terms are added once, logged queries add to their
+count), and a completion whose score grows can only move up in the lists
+of the nodes on its own path. So adding a score just re-inserts the entry
+into those len(text) + 1 lists, and the caches stay exact.
+
+Completions come from the index terms (weighted by collection frequency)
+and from the query log (weighted by how often the query was searched,
+times query_weight, so typed queries win over single words).
+"""
+
+import os
+import bisect
+import threading
+
+
+def normalize_query(query):
+    return ' '.join(query.split())
+
+
+class _Node:
+    __slots__ = ('children', 'top')
+
+    def __init__(self):
+        self.children = {}
+        self.top = []       # [(-score, text)], best first, at most k entries
+
+
+class CompletionTrie:
+    def __init__(self, k=10):
+        self.k = k
+        self.root = _Node()
+        self.scores = {}
+        self.node_count = 1
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __contains__(self, text):
+        return text in self.scores
+
+    def add(self, text, weight=1):
+        """Adds weight to text's score (inserting it if new) and updates the cached top-k lists."""
+        if not text or weight <= 0:
+            return
+        old_score = self.scores.get(text)
+        score = (old_score or 0) + weight
+        self.scores[text] = score
+        old_entry, entry = (-old_score, text) if old_score is not None else None, (-score, text)
+
+        node = self.root
+        self._update(node, old_entry, entry)
+        for char in text:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _Node()
+                self.node_count += 1
+            node = child
+            self._update(node, old_entry, entry)
+
+    def _update(self, node, old_entry, entry):
+        top = node.top
+        if old_entry is not None:
+            i = bisect.bisect_left(top, old_entry)
+            if i < len(top) and top[i] == old_entry:
+                del top[i]
+        if len(top) < self.k or entry < top[-1]:
+            bisect.insort(top, entry)
+            del top[self.k:]
+
+    def complete(self, prefix, k=None):
+        """[(text, score)] of the best completions of prefix, in O(len(prefix))."""
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return [(text, -neg_score) for neg_score, text in node.top[:k or self.k]]
+
+
+class QueryLog:
+    """Append-only log of searched queries, one per line."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def counts(self):
+        counts = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    query = normalize_query(line)
+                    if query:
+                        counts[query] = counts.get(query, 0) + 1
+        return counts
+
+    def record(self, query):
+        query = normalize_query(query)
+        if not query:
+            return None
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(query + '\n')
+        return query
+
+
+class Autocomplete:
+    def __init__(self, query_log=None, k=10, query_weight=100):
+        """
+        query_log: QueryLog whose queries are completed along with the index terms
+        query_weight: score of one logged search, relative to one term occurrence
+        """
+        self.trie = CompletionTrie(k)
+        self.query_log = query_log
+        self.query_weight = query_weight
+        self.vocabulary = None      # term dictionary the completions were built from (set by the caller)
+        if query_log is not None:
+            for query, count in query_log.counts().items():
+                self.trie.add(query, count * query_weight)
+
+    @classmethod
+    def from_index(cls, source, query_log=None, **kwargs):
+        """Completes the terms of a postings source, weighted by collection frequency."""
+        autocomplete = cls(query_log, **kwargs)
+        for term, count in source.collection_frequencies():
+            autocomplete.trie.add(term, count)
+        return autocomplete
+
+    def record_query(self, query):
+        """Logs a searched query and makes it a completion right away."""
+        if self.query_log is not None:
+            query = self.query_log.record(query)
+        else:
+            query = normalize_query(query)
+        if query:
+            self.trie.add(query, self.query_weight)
+
+    def complete(self, prefix, k=None):
+        # Whitespace is collapsed like in logged queries; a trailing space is
+        # kept so that "नेपाल " completes the next word
+        text = normalize_query(prefix)
+        if text and prefix[-1:].isspace():
+            text += ' '
+        return self.trie.complete(text, k)
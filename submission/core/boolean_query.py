@@ -0,0 +1,248 @@
+"""
+Boolean queries (AND / OR / NOT with parentheses) over sorted docID postings.
+
+Query syntax (operators in upper case; adjacent terms are ANDed):
+    नेपाल AND (सरकार OR संसद) AND NOT चुनाव
+    नेपाल सरकार NOT चुनाव          same as नेपाल AND सरकार AND NOT चुनाव
+Precedence: NOT binds tightest, then AND, then OR.
+
+A query is parsed into a tree of tuples
+    ('term', text)  ('not', node)  ('and', [nodes])  ('or', [nodes])
+its words are replaced by index terms (a word without any, e.g. a
+stopword, is dropped), and the optimizer rewrites it:
+- nested ANDs / ORs are flattened and NOT NOT x becomes x;
+- the negated operands of an AND become a difference
+  ('diff', positive part, [subtracted nodes]): A AND NOT B is A - B. A NOT
+  with nothing to subtract from is ('all',) - x;
+- AND operands are ordered rarest first, by estimated result size (df for
+  a term, the smallest operand for an AND, the sum for an OR).
+
+Evaluation passes the surviving candidates down the tree: every AND
+operand after the first only looks for those documents (galloping into its
+postings, see postings.py), an OR under an AND unions the hits of its
+operands among them, and a subtracted node is evaluated only within what
+is left of the difference. A query thus costs about the length of its most
+selective postings, not the total length of all of them.
+"""
+
+import re
+
+from .postings import EMPTY_POSTINGS, as_postings, intersect, union, difference
+
+OPERATORS = ('AND', 'OR', 'NOT')
+
+_TOKEN = re.compile(r'[()]|[^\s()]+')
+
+
+def is_boolean_query(query):
+    """True if the query uses an operator (parentheses alone only group an implicit AND)."""
+    return any(token in OPERATORS for token in _TOKEN.findall(query or ''))
+
+
+def parse_boolean_query(query):
+    """Parse tree of the query (None if it is empty); ValueError on a syntax error."""
+    parser = _Parser(_TOKEN.findall(query or ''))
+    if parser.peek() is None:
+        return None
+    node = parser.parse_or()
+    if parser.peek() is not None:
+        raise ValueError(f"Unexpected '{parser.peek()}'")
+    return node
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def next(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def parse_or(self):
+        nodes = [self.parse_and()]
+        while self.peek() == 'OR':
+            self.next()
+            nodes.append(self.parse_and())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def parse_and(self):
+        nodes = [self.parse_not()]
+        while self.peek() not in (None, ')', 'OR'):
+            if self.peek() == 'AND':
+                self.next()
+            nodes.append(self.parse_not())
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def parse_not(self):
+        if self.peek() == 'NOT':
+            self.next()
+            return ('not', self.parse_not())
+        return self.parse_atom()
+
+    def parse_atom(self):
+        token = self.next()
+        if token is None:
+            raise ValueError("Query ends where a term was expected")
+        if token in (')', 'AND', 'OR'):
+            raise ValueError(f"Expected a term or '(' instead of '{token}'")
+        if token == '(':
+            node = self.parse_or()
+            if self.next() != ')':
+                raise ValueError("Missing ')'")
+            return node
+        return ('term', token)
+
+
+class BooleanQuery:
+    def __init__(self, index, analyze, all_docs):
+        """
+        index: term -> sorted docID postings (anything with .get)
+        analyze: word -> list of index terms (same pipeline as indexing)
+        all_docs: sorted docIDs of every live document (for a lone NOT)
+        """
+        self.index = index
+        self.analyze = analyze
+        self.all_docs = as_postings(all_docs)
+
+    def compile(self, query):
+        """Optimized query tree, or None if the query has no index terms."""
+        node = parse_boolean_query(query)
+        node = self.analyze_tree(node) if node is not None else None
+        return self.optimize(node) if node is not None else None
+
+    def search(self, query):
+        """Sorted docIDs matching the query."""
+        node = self.compile(query)
+        return self.evaluate(node) if node is not None else EMPTY_POSTINGS
+
+    def analyze_tree(self, node):
+        """Replaces words by index terms; drops the ones that have none."""
+        kind = node[0]
+        if kind == 'term':
+            terms = self.analyze(node[1])
+            if not terms:
+                return None
+            return ('term', terms[0]) if len(terms) == 1 else ('and', [('term', term) for term in terms])
+        if kind == 'not':
+            child = self.analyze_tree(node[1])
+            return ('not', child) if child is not None else None
+        children = [child for child in map(self.analyze_tree, node[1]) if child is not None]
+        if not children:
+            return None
+        return children[0] if len(children) == 1 else (kind, children)
+
+    def postings(self, term):
+        entry = self.index.get(term)
+        return as_postings(entry) if entry is not None else EMPTY_POSTINGS
+
+    def estimate(self, node):
+        """Upper bound on the number of documents the node matches."""
+        kind = node[0]
+        if kind == 'term':
+            return len(self.postings(node[1]))
+        if kind == 'all':
+            return len(self.all_docs)
+        if kind == 'and':
+            return min(self.estimate(child) for child in node[1])
+        if kind == 'or':
+            return min(len(self.all_docs), sum(self.estimate(child) for child in node[1]))
+        if kind == 'diff':
+            return self.estimate(node[1])
+        return len(self.all_docs)
+
+    def optimize(self, node):
+        kind = node[0]
+        if kind == 'term':
+            return node
+        if kind == 'not':
+            # Only reached outside an AND: subtract from every document
+            return self._conjunction([], [node[1]])
+        if kind == 'or':
+            children = []
+            for child in map(self.optimize, node[1]):
+                if child[0] == 'all':
+                    return child
+                children.extend(child[1] if child[0] == 'or' else [child])
+            return ('or', sorted(children, key=self.estimate))
+        positives, negated = [], []
+        for child in node[1]:
+            if child[0] == 'not':
+                negated.append(child[1])
+            else:
+                positives.append(child)
+        return self._conjunction(positives, negated)
+
+    def _conjunction(self, positives, negated):
+        """AND of positives minus every negated node, as an 'and' inside a 'diff'."""
+        operands, subtracted = [], []
+        for node in negated:
+            if node[0] == 'not':
+                positives.append(node[1])       # NOT NOT x
+            else:
+                subtracted.append(self.optimize(node))
+        for child in map(self.optimize, positives):
+            if child[0] == 'and':
+                operands.extend(child[1])
+            elif child[0] == 'diff':
+                # A AND (B - C) = (A AND B) - C
+                operands.extend(child[1][1] if child[1][0] == 'and' else [child[1]])
+                subtracted.extend(child[2])
+            elif child[0] != 'all':
+                operands.append(child)
+        operands.sort(key=self.estimate)
+        if not operands:
+            positive = ('all',)
+        else:
+            positive = operands[0] if len(operands) == 1 else ('and', operands)
+        if not subtracted:
+            return positive
+        # Largest first: it removes the most candidates for the next ones
+        return ('diff', positive, sorted(subtracted, key=self.estimate, reverse=True))
+
+    def evaluate(self, node, candidates=None):
+        """docIDs matching node, restricted to candidates if given."""
+        kind = node[0]
+        if kind == 'all':
+            return self.all_docs if candidates is None else candidates
+        if kind == 'term':
+            postings = self.postings(node[1])
+            return postings if candidates is None else intersect(candidates, postings)
+        if kind == 'and':
+            for child in node[1]:
+                candidates = self.evaluate(child, candidates)
+                if candidates.size == 0:
+                    break
+            return candidates
+        if kind == 'or':
+            result = EMPTY_POSTINGS
+            for child in node[1]:
+                result = union(result, self.evaluate(child, candidates))
+            return result
+        result = self.evaluate(node[1], candidates)
+        for child in node[2]:
+            if result.size == 0:
+                break
+            result = difference(result, self.evaluate(child, result))
+        return result
+
+    @staticmethod
+    def explain(node):
+        """Readable form of a (compiled) query tree."""
+        if node is None:
+            return ''
+        kind = node[0]
+        if kind == 'term':
+            return node[1]
+        if kind == 'all':
+            return '*'
+        if kind == 'not':
+            return f"NOT {BooleanQuery.explain(node[1])}"
+        if kind == 'diff':
+            parts = [BooleanQuery.explain(node[1])] + [BooleanQuery.explain(child) for child in node[2]]
+            return '(' + ' - '.join(parts) + ')'
+        return '(' + f' {kind.upper()} '.join(BooleanQuery.explain(child) for child in node[1]) + ')'
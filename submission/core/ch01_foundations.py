@@ -17,6 +17,21 @@ except (ImportError, ValueError):
     except ImportError:
         IMPROVED_TOKENIZATION = False
 
+try:
+    from .distributed.parallel_indexer import analyze_corpus
+except (ImportError, ValueError):
+    analyze_corpus = None
+
+try:
+    from .doc_table import DocTable
+    from .postings import as_postings
+    from .boolean_query import BooleanQuery, is_boolean_query
+except (ImportError, ValueError):
+    sys.path.insert(0, os.path.dirname(__file__))
+    from doc_table import DocTable
+    from postings import as_postings
+    from boolean_query import BooleanQuery, is_boolean_query
+
 
 class Foundations:
     def __init__(self, doc_dir):
@@ -27,6 +42,7 @@ class Foundations:
         if IMPROVED_TOKENIZATION:
             # Get data directory (parent of documents directory)
             data_dir = os.path.dirname(doc_dir) if os.path.isdir(doc_dir) else 'data'
+            self.data_dir = data_dir
             try:
                 self.text_analyzer = TextAnalysis(data_dir)
             except:
@@ -34,6 +50,8 @@ class Foundations:
         else:
             self.text_analyzer = None
             
+        # term -> sorted uint32 array of docIDs (see doc_table)
+        self.doc_table = DocTable()
         self.inverted_index = self._build_index()
 
     def _load_documents(self):
@@ -63,41 +81,53 @@ class Foundations:
 
 
     def _build_index(self):
+        if self.text_analyzer and analyze_corpus is not None:
+            # Same preprocess_for_indexing pipeline, run on a process pool
+            corpus = analyze_corpus(self.doc_dir, self.data_dir, mode='indexing', keep_positions=False)
+            self.doc_table = DocTable(corpus.doc_names)
+            return {term: as_postings(doc_ids) for term, (doc_ids, _, _) in corpus.postings.items()}
+            
         index = {}
-        for doc_id, text in self.docs.items():
-            tokens = set(self._tokenize(text)) # Set for boolean presence
+        self.doc_table = DocTable(sorted(self.docs))
+        for doc_id, filename in self.doc_table.items():
+            tokens = set(self._tokenize(self.docs[filename])) # Set for boolean presence
             for token in tokens:
                 if token not in index:
-                    index[token] = set()
-                index[token].add(doc_id)
-        return index
+                    index[token] = []
+                index[token].append(doc_id)
+        return {token: as_postings(doc_ids) for token, doc_ids in index.items()}
 
     def boolean_search(self, query, operation='AND'):
         """
-        Executes a simple boolean query between two terms.
-        Extended to support list of terms for simple demo.
+        Boolean retrieval over the inverted index.
+        A query written with AND / OR / NOT (and parentheses) is evaluated as such
+        (see boolean_query.py); otherwise `operation` combines its terms:
+        AND / OR between all of them, NOT keeps the first term minus the rest.
+        Raises ValueError for a malformed query.
         """
-        terms = self._tokenize(query)
-        if not terms:
+        plan = self.compile_boolean(query, operation)
+        if plan is None:
             return set()
-            
-        result_set = None
-        
-        for term in terms:
-            term_docs = self.inverted_index.get(term, set())
-            
-            if result_set is None:
-                result_set = term_docs.copy()
-            else:
-                if operation == 'AND':
-                    result_set = result_set.intersection(term_docs)
-                elif operation == 'OR':
-                    result_set = result_set.union(term_docs)
-                elif operation == 'NOT':
-                    # NOT is generally binary (A NOT B), handling simplistic unary NOT here for demo
-                    result_set = result_set.difference(term_docs)
-                    
-        return list(result_set) if result_set else []
+        result = self.boolean_engine().evaluate(plan)
+        return self.doc_table.names_of(result) if len(result) else []
+
+    def boolean_engine(self):
+        return BooleanQuery(self.inverted_index, self._tokenize,
+                            [doc_id for doc_id, _ in self.doc_table.items()])
+
+    def compile_boolean(self, query, operation='AND'):
+        """Optimized query tree of boolean_search (None if the query has no terms)."""
+        engine = self.boolean_engine()
+        if is_boolean_query(query):
+            return engine.compile(query)
+        terms = [('term', term) for term in self._tokenize(query or '')]
+        if not terms:
+            return None
+        if operation == 'OR':
+            return engine.optimize(('or', terms))
+        if operation == 'NOT':
+            return engine.optimize(('and', terms[:1] + [('not', term) for term in terms[1:]]))
+        return engine.optimize(('and', terms))
 
     def compute_cosine_similarity(self, query):
         """
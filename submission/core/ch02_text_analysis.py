@@ -2,20 +2,130 @@
 import os
 import re
 import sys
+import hashlib
+import threading
+import importlib.util
 
 # Add nepalikit to path
 nepalikit_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'nepalikit-main')
 if os.path.exists(nepalikit_path) and nepalikit_path not in sys.path:
     sys.path.insert(0, nepalikit_path)
 
-# Import nepalikit components
-try:
-    from nepalikit.tokenization.tokenizer import Tokenizer
-    from nepalikit.preprocessing.TextProcessor import TextProcessor as NepaliTextProcessor
-    NEPALIKIT_AVAILABLE = True
-except ImportError:
-    NEPALIKIT_AVAILABLE = False
+# nepalikit is only looked up here; the first TextAnalysis imports it (_load_nepalikit)
+NEPALIKIT_AVAILABLE = importlib.util.find_spec('nepalikit') is not None
+if not NEPALIKIT_AVAILABLE:
     print("Warning: nepalikit not available, using fallback tokenization")
+_nepalikit = None
+
+
+def _load_nepalikit():
+    """(Tokenizer, TextProcessor) classes of nepalikit, imported once; None if that fails."""
+    global _nepalikit
+    if _nepalikit is None:
+        try:
+            from nepalikit.tokenization.tokenizer import Tokenizer
+            from nepalikit.preprocessing.TextProcessor import TextProcessor
+            _nepalikit = (Tokenizer, TextProcessor)
+        except ImportError:
+            print("Warning: nepalikit could not be imported, using fallback tokenization")
+            _nepalikit = False
+    return _nepalikit or None
+
+
+# Fast path (see TextAnalysis.iter_terms): the fallback tokenizer's deletion
+# regex, precompiled and deleting whole runs, and the stemmer's suffixes
+_NON_DEVANAGARI = re.compile(r'[^\u0900-\u097F\s]+')
+_SUFFIXES = ('हरू', 'हरु', 'लाई', 'बाट', 'मा', 'को', 'का', 'की', 'ले')
+
+
+class TermCache:
+    """
+    token -> term memo of the fast path: the stopword removal + stemming of
+    analyze_text for one token ('' when the token is dropped).
+
+    One cache is shared by every TextAnalysis with the same stopwords and stem
+    dictionary (TermCache.shared). Stopwords and dictionary entries are
+    pinned; other tokens are added on first sight, up to max_entries. When
+    full, the older half of them (in insertion order) is dropped, which keeps
+    a hit a plain dict lookup; frequent tokens come straight back.
+    """
+    _caches = {}
+    _caches_lock = threading.Lock()
+
+    def __init__(self, stopwords, stem_dict, max_entries=100000):
+        self.stopwords = stopwords
+        self.stem_dict = stem_dict
+        self.max_entries = max_entries
+        self.terms = {}
+        self._lock = threading.Lock()
+        for token in list(stem_dict) + list(stopwords):
+            self.terms[token] = self._compute(token)
+        self.pinned = dict(self.terms)
+        # lookups are counted per call by the callers, misses here
+        self.lookups = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def shared(cls, stopwords, stem_dict):
+        config = repr([sorted(stopwords), sorted(stem_dict.items())])
+        key = hashlib.blake2b(config.encode('utf-8'), digest_size=16).hexdigest()
+        with cls._caches_lock:
+            cache = cls._caches.get(key)
+            if cache is None:
+                cache = cls._caches[key] = cls(stopwords, stem_dict)
+            return cache
+
+    @classmethod
+    def instances(cls):
+        with cls._caches_lock:
+            return list(cls._caches.values())
+
+    def _compute(self, token):
+        if token.lower() in self.stopwords:
+            term = ''
+        elif token in self.stem_dict:
+            term = self.stem_dict[token]
+        elif len(token) > 3:
+            term = token
+            for suffix in _SUFFIXES:
+                if token.endswith(suffix):
+                    term = token[:-len(suffix)]
+                    break
+        else:
+            term = token
+        return term
+
+    def miss(self, token):
+        """Term of a token not in self.terms, which is then remembered."""
+        term = self._compute(token)
+        # Hits read self.terms without the lock; every write to it holds the lock
+        with self._lock:
+            self.misses += 1
+            if len(self.terms) >= self.max_entries + len(self.pinned):
+                self._evict()
+            self.terms[token] = term
+        return term
+
+    def _evict(self):
+        """Drops the older half of the learned entries (the caller holds the lock)."""
+        learned = [item for item in list(self.terms.items()) if item[0] not in self.pinned]
+        kept = learned[len(learned) // 2:]
+        self.evictions += len(learned) - len(kept)
+        self.terms.clear()
+        self.terms.update(self.pinned)
+        self.terms.update(kept)
+
+    def stats(self):
+        return {
+            'entries': len(self.terms),
+            'pinned': len(self.pinned),
+            'max_entries': self.max_entries,
+            'lookups': self.lookups,
+            'misses': self.misses,
+            'hit_rate': 1 - self.misses / self.lookups if self.lookups else 0.0,
+            'evictions': self.evictions,
+        }
 
 
 class TextAnalysis:
@@ -25,13 +135,17 @@ class TextAnalysis:
         self.stem_dict = self._load_stem_dict()
         
         # Initialize nepalikit tokenizer if available
-        if NEPALIKIT_AVAILABLE:
+        nepalikit = _load_nepalikit() if NEPALIKIT_AVAILABLE else None
+        if nepalikit:
+            Tokenizer, NepaliTextProcessor = nepalikit
             self.tokenizer = Tokenizer()
             self.text_processor = NepaliTextProcessor(stopwords=list(self.stopwords))
         else:
             self.tokenizer = None
             self.text_processor = None
 
+        self.term_cache = TermCache.shared(self.stopwords, self.stem_dict)
+
     def _load_stopwords(self):
         stopwords = set()
         stopwords_path = os.path.join(self.data_dir, 'stopwords.txt')
@@ -119,7 +233,7 @@ class TextAnalysis:
             elif len(token) > 3:  # Only stem words longer than 3 chars
                 stemmed_word = token
                 # Try multiple suffix removal rules
-                for suffix in ['हरू', 'हरु', 'लाई', 'बाट', 'मा', 'को', 'का', 'की', 'ले']:
+                for suffix in _SUFFIXES:
                     if stemmed_word.endswith(suffix):
                         stemmed_word = stemmed_word[:-len(suffix)]
                         break
@@ -132,16 +246,67 @@ class TextAnalysis:
         
         return results
     
+    def tokenize(self, text):
+        """analyze_text()['tokens'] without the other intermediates."""
+        if NEPALIKIT_AVAILABLE and self.tokenizer:
+            return self._tokenize_nepalikit(text)
+        return _NON_DEVANAGARI.sub('', text.replace('।', ' ')).split()
+
+    def iter_terms(self, text, lexicon=None):
+        """
+        Yields analyze_text(text)['stemmed'] one term at a time, with one
+        term cache lookup per token. With a lexicon (core/lexicon.py), yields
+        term IDs instead, adding unseen terms to it.
+        """
+        cache = self.term_cache
+        terms = cache.terms
+        term_ids = lexicon.ids if lexicon is not None else None
+        tokens = self.tokenize(text)
+        cache.lookups += len(tokens)
+        for token in tokens:
+            term = terms.get(token)
+            if term is None:
+                term = cache.miss(token)
+            if term:
+                if term_ids is None:
+                    yield term
+                else:
+                    term_id = term_ids.get(term)
+                    yield term_id if term_id is not None else lexicon.add(term)
+
+    def stem_tokens(self, tokens):
+        """analyze_text()['stemmed'] of already tokenized text."""
+        cache = self.term_cache
+        terms = cache.terms
+        cache.lookups += len(tokens)
+        stemmed = []
+        for token in tokens:
+            term = terms.get(token)
+            if term is None:
+                term = cache.miss(token)
+            if term:
+                stemmed.append(term)
+        return stemmed
+
+    def stem_token(self, word):
+        """
+        First analyzed term of a single word (analyze_text(word)['stemmed'][0]),
+        or '' if it has none (stopword, no Devanagari). Goes through the term
+        cache, without the document pipeline.
+        """
+        for term in self.iter_terms(word):
+            return term
+        return ''
+
     def preprocess_for_indexing(self, text):
         """
         Quick preprocessing pipeline for indexing purposes.
         Returns clean tokens ready for inverted index.
         """
-        if NEPALIKIT_AVAILABLE and self.tokenizer:
-            tokens = self._tokenize_nepalikit(text)
-        else:
-            tokens = self._tokenize_fallback(text)
-        
+        return self.indexing_terms(self.tokenize(text))
+
+    def indexing_terms(self, tokens):
+        """preprocess_for_indexing from already tokenized text (e.g. analyze_text()['tokens'])."""
         # Remove stopwords
         tokens = [t for t in tokens if t.lower() not in self.stopwords]
         
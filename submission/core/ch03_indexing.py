@@ -1,102 +1,328 @@
-
 import os
 import sys
 import pickle
-import collections
-from .ch02_text_analysis import TextAnalysis
+from .analysis_store import AnalysisStore
+from .doc_table import list_documents
+from .distributed.parallel_indexer import analyze_corpus
+from .storage.codecs import get_codec
+from .storage.front_coding import FrontCodedDictionary
+from .storage.memory_index import MemoryIndex
+from .storage.spimi import build_spimi_index
+from .storage.views import InvertedView, PositionalView
+from .storage.segments import SEGMENTS_FILE, BufferReader, SegmentedIndex, write_segment
+from .storage.disk_index import DEFAULT_CODEC, corpus_signature
+from .positional_query import PositionalQuery
+from .kgram_index import KGramIndex
+from .suggestion_index import SuggestionIndex
 
 class Indexing:
-    def __init__(self, data_dir, doc_dir):
+    def __init__(self, data_dir, doc_dir, index_dir=None):
         self.doc_dir = doc_dir
-        self.analyzer = TextAnalysis(data_dir)
+        self.data_dir = data_dir
+        self.index_dir = index_dir or os.path.join(data_dir, 'index')
+        # Document analyses are shared with the other components (see analysis_store)
+        self.analysis_store = AnalysisStore.open(data_dir)
+        self.analyzer = self.analysis_store.analyzer
+        self.index = None          # postings source: MemoryIndex or SegmentedIndex
+        self.disk_index = None     # the open SegmentedIndex, if any
         self.inverted_index = {}
         self.positional_index = {}
+        self.stats = {}
+        self._term_dictionary = None
+        self._term_dictionary_version = None
+        self._kgram_index = None
+        self._kgram_source = None
+        self._suggestion_index = None
+        self._suggestion_source = None
+
+    def _attach(self, source):
+        self.index = source
+        # Filename-keyed views for the routes; postings stay integer arrays
+        self.inverted_index = InvertedView(source)
+        self.positional_index = PositionalView(source)
+        self._term_dictionary = None
         
-    def build_indexes(self):
-        """Builds both inverted and positional indexes from disk documents"""
-        self.inverted_index = collections.defaultdict(list)
-        self.positional_index = collections.defaultdict(lambda: collections.defaultdict(list))
-        
-        doc_count = 0
-        total_tokens = 0
-        
-        if os.path.exists(self.doc_dir):
-            for filename in os.listdir(self.doc_dir):
-                if filename.endswith('.txt'):
-                    doc_count += 1
-                    with open(os.path.join(self.doc_dir, filename), 'r', encoding='utf-8') as f:
-                        text = f.read()
-                        
-                    # Use pipeline for terms
-                    analysis = self.analyzer.analyze_text(text)
-                    terms = analysis['stemmed'] # Use stemmed terms for index
-                    
-                    total_tokens += len(terms)
-                    
-                    # Inverted Index Construction
-                    term_set = set(terms)
-                    for term in term_set:
-                        self.inverted_index[term].append(filename)
-                        
-                    # Positional Index Construction
-                    for pos, term in enumerate(terms):
-                        self.positional_index[term][filename].append(pos)
-                        
-        stats = {
+    def build_indexes(self, workers=None):
+        """
+        Builds both inverted and positional indexes from disk documents.
+        Analysis runs on a process pool (see distributed/parallel_indexer.py);
+        postings are docID/tf/position uint32 arrays (see storage/memory_index.py).
+        """
+        self.close_index()
+        corpus = analyze_corpus(self.doc_dir, self.data_dir, workers=workers)
+        self._attach(MemoryIndex.from_corpus(corpus))
+        return self._refresh_stats()
+
+    def _refresh_stats(self):
+        """Cheap: both index kinds keep their doc count and token total up to date"""
+        doc_count = self.index.num_docs
+        total_tokens = self.index.total_tokens
+        self.stats = {
             'doc_count': doc_count,
-            'vocab_size': len(self.inverted_index),
+            'vocab_size': self.index.vocab_size,
             'total_tokens': total_tokens,
             'avg_tokens_per_doc': total_tokens / doc_count if doc_count > 0 else 0
         }
+        return self.stats
+
+    def _read_document(self, filename):
+        path = os.path.join(self.doc_dir, filename)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def add_document(self, filename, text=None):
+        """
+        Indexes a single new document in O(document length).
+        If the document is already indexed it is replaced.
+        With a segmented index the document lands in the in-memory buffer
+        and is written out as a new segment by commit().
+        """
+        if self.index is None:
+            self._attach(MemoryIndex())
+        if text is None:
+            text = self._read_document(filename)
+            if text is None:
+                return False
+            
+        terms = self.analysis_store.analyze(text).stemmed
+        if self.disk_index is not None:
+            # Replacing only tombstones the old version
+            self.disk_index.add_document(filename, terms)
+        else:
+            if filename in self.index:
+                self.remove_document(filename)
+            self.index.add_document(filename, terms)
+            self._refresh_stats()
+        return True
+
+    def update_document(self, filename, text=None, old_text=None):
+        """Re-indexes a document whose content changed"""
+        self.remove_document(filename, old_text)
+        return self.add_document(filename, text)
+
+    def remove_document(self, filename, text=None):
+        """
+        Removes a document. A segmented index just sets its tombstone bit.
+        In memory, `text` is the content that was indexed; it tells us which
+        postings to touch. Without it (e.g. the file is already gone) every
+        term has to be checked.
+        """
+        if self.index is None or filename not in self.index:
+            return False
+        if self.disk_index is not None:
+            self.disk_index.remove_document(filename)
+        else:
+            if text is None:
+                text = self._read_document(filename)
+            terms = self.analysis_store.analyze(text).stemmed if text is not None else None
+            self.index.remove_document(filename, terms)
+            self._refresh_stats()
+        return True
+
+    def commit(self):
+        """
+        Makes the updates since the last commit durable: buffered documents
+        become a new segment, tombstones are written, and the commit point
+        records the current corpus signature. Merges run in the background.
+        """
+        if self.disk_index is None:
+            return None
+        # Segment stats (vocabulary union) are refreshed once per commit, not per document
+        self._refresh_stats()
+        return self.disk_index.commit(corpus_signature=corpus_signature(self.doc_dir), **self.stats)
+
+    def save_index(self, codec=DEFAULT_CODEC):
+        """
+        Writes the index to index_dir as segments in the binary on-disk format
+        (doc table + sorted term dictionary + compressed postings/positions
+        files per segment, see storage/segments.py). An in-memory index
+        replaces whatever was stored there as a single segment; an open
+        segmented index is force-merged into one.
+        """
+        if self.disk_index is not None:
+            self.disk_index.force_merge()
+            return self.commit()
+
+        memory_index = self.index if self.index is not None else MemoryIndex()
+        segments = SegmentedIndex.create(self.index_dir, codec=codec)
+        segment_path = segments.allocate_segment()
+        manifest, written = write_segment(segment_path, [BufferReader(memory_index)], codec)
+        segments.add_segment(segment_path, docs_added=written)
+        segments.commit(corpus_signature=corpus_signature(self.doc_dir), **self.stats)
+        segments.close()
+        return manifest
+
+    def open_index(self, allow_stale=False):
+        """
+        Opens the segmented on-disk index if it exists and matches the current
+        document directory (allow_stale skips that check, for callers that
+        index the changed documents themselves). Postings are then served
+        straight from the mmap'd segments. Returns the stats, or None if the
+        index is missing or stale.
+        """
+        if not os.path.exists(os.path.join(self.index_dir, SEGMENTS_FILE)):
+            return None
+        try:
+            segments = SegmentedIndex(self.index_dir)
+        except (ValueError, OSError, KeyError) as e:
+            print(f"Ignoring unreadable index at {self.index_dir}: {e}")
+            return None
+        if not allow_stale and segments.commit_info.get('corpus_signature') != corpus_signature(self.doc_dir):
+            segments.close()
+            return None
+
+        self.close_index()
+        self.disk_index = segments
+        self._attach(segments)
+        return self._refresh_stats()
+
+    def build_external(self, memory_budget_mb=64, codec=DEFAULT_CODEC, keep_blocks=False):
+        """
+        Builds the on-disk index without holding the corpus in memory: SPIMI
+        blocks are flushed whenever the budget is reached and k-way merged
+        into a single segment (see storage/spimi.py). Returns the build report.
+        """
+        self.close_index()
+        signature = corpus_signature(self.doc_dir)
+        
+        def read_terms(filename):
+            with open(os.path.join(self.doc_dir, filename), 'r', encoding='utf-8') as f:
+                return self.analysis_store.analyze(f.read()).stemmed
+            
+        doc_names = list_documents(self.doc_dir)
+        segments = SegmentedIndex.create(self.index_dir, codec=codec)
+        segment_path = segments.allocate_segment()
+        report = build_spimi_index(doc_names, read_terms, segment_path,
+                                   memory_budget_mb=memory_budget_mb, codec=codec,
+                                   keep_blocks=keep_blocks)
+        segments.add_segment(segment_path, docs_added=len(doc_names))
+        segments.commit(corpus_signature=signature)
+        segments.close()
+        report['stats'] = self.open_index()
+        return report
+
+    def load_or_build(self, memory_budget_mb=None):
+        """
+        Opens the persisted index, rebuilding and saving it first if needed.
+        With a memory budget the rebuild uses the external SPIMI builder.
+        """
+        stats = self.open_index()
+        if stats is None:
+            if memory_budget_mb:
+                return self.build_external(memory_budget_mb)['stats']
+            self.build_indexes()
+            self.save_index()
+            stats = self.open_index() or self.stats
         return stats
 
+    def close_index(self):
+        if self.disk_index is not None:
+            self.disk_index.close()
+            self.disk_index = None
+            self.index = None
+
     def get_posting_list(self, term):
         """Returns posting list for a term (Inverted Index)"""
         # Simple stemming to match index
-        stemmed = self.analyzer.analyze_text(term)['stemmed']
-        if not stemmed:
+        term = self.analyzer.stem_token(term)
+        if not term:
             return []
-        term = stemmed[0]
         return self.inverted_index.get(term, [])
 
     def get_positional_postings(self, term):
         """Returns positional postings for a term"""
-        stemmed = self.analyzer.analyze_text(term)['stemmed']
-        if not stemmed:
+        term = self.analyzer.stem_token(term)
+        if not term:
             return {}
-        term = stemmed[0]
         # Convert defaultdict to dict for cleaner display
         return dict(self.positional_index.get(term, {}))
 
+    def positional_search(self, query):
+        """
+        Phrase ("...") and proximity (a NEAR/k b) queries over the positional
+        index. Returns [(filename, match_count)], best first.
+        """
+        if self.index is None:
+            return []
+        engine = PositionalQuery(self.index, lambda text: list(self.analyzer.iter_terms(text)))
+        return engine.search(query)
+
     def variable_byte_encode(self, number):
-        """Demonstrates Variable Byte Encoding for a single number"""
-        bytes_list = []
-        while True:
-            bytes_list.insert(0, number % 128)
-            if number < 128:
-                break
-            number //= 128
-        bytes_list[-1] += 128
+        """Demonstrates Variable Byte Encoding for a single number (same codec the index uses)"""
+        encoded = get_codec('vbyte').encode([number])
         
         # Format as binary strings
-        return [f"{b:08b}" for b in bytes_list]
+        return [f"{b:08b}" for b in encoded]
+
+    @property
+    def term_dictionary(self):
+        """
+        Sorted, front-coded view of the vocabulary. Built once from
+        the in-memory index (or the union of the segment lexicons) and
+        rebuilt only after the vocabulary changes.
+        """
+        if self.disk_index is not None:
+            return self.disk_index.dictionary
+        if self.index is None:
+            return FrontCodedDictionary()
+        if self._term_dictionary is None or self._term_dictionary_version != self.index.vocab_version:
+            self._term_dictionary = FrontCodedDictionary(self.index.terms())
+            self._term_dictionary_version = self.index.vocab_version
+        return self._term_dictionary
+
+    @property
+    def kgram_index(self):
+        """
+        Character 3-gram index over the vocabulary for wildcard queries,
+        rebuilt only when the term dictionary changes.
+        """
+        dictionary = self.term_dictionary
+        if self._kgram_index is None or self._kgram_source is not dictionary:
+            self._kgram_index = KGramIndex(dictionary)
+            self._kgram_source = dictionary
+        return self._kgram_index
+
+    @property
+    def suggestion_index(self):
+        """
+        Spelling suggestions over the index terms, weighted by collection
+        frequency. Rebuilt when the term dictionary changes.
+        """
+        dictionary = self.term_dictionary
+        if self._suggestion_index is None or self._suggestion_source is not dictionary:
+            frequencies = self.index.collection_frequencies() if self.index is not None else ()
+            self._suggestion_index = SuggestionIndex(frequencies)
+            self._suggestion_source = dictionary
+        return self._suggestion_index
 
-    def compress_dict_demo(self):
-        """Demonstrates Dictionary Compression (Front Coding)"""
-        # Example specific to Nepali
-        terms = ["नेपाल", "नेपाली", "नेपालमा", "नेपालको"]
+    def compress_dict_demo(self, sample_prefix="नेपाल"):
+        """Dictionary Compression (Front Coding) measured on the real vocabulary"""
+        dictionary = self.term_dictionary
+        lo, hi = dictionary.prefix_range(sample_prefix)
+        terms = list(dictionary.iter_range(lo, min(hi, lo + 8)))
         
+        # Show the sample the way it is stored: shared prefix length + * + suffix
         compressed = []
-        # Primitive Front Coding
-        # nepal, *i, *ma, *ko (conceptually)
-        prefix = "नेपाल"
-        compressed.append(f"5नेपाल") # length + term
-        compressed.append(f"5*ी")    # shared_len + * + unique
-        compressed.append(f"5*मा")
-        compressed.append(f"5*को")
+        prev = ""
+        for i, term in enumerate(terms):
+            shared = len(os.path.commonprefix([prev, term])) if i else 0
+            compressed.append(f"{len(term)}{term}" if i == 0 else f"{shared}*{term[shared:]}")
+            prev = term
+            
+        # Plain dictionary = every term stored as its own UTF-8 string;
+        # python_bytes = the str objects a dict-keyed vocabulary keeps alive
+        raw_bytes = sum(len(term.encode('utf-8')) for term in dictionary)
+        python_bytes = sum(sys.getsizeof(term) for term in dictionary)
+        savings_pct = 100.0 * (1 - dictionary.nbytes / raw_bytes) if raw_bytes else 0.0
         
         return {
             'original': terms,
             'compressed_structure': compressed,
-            'savings_pct': 25.0  # Mock calculation
+            'vocab_size': len(dictionary),
+            'raw_bytes': raw_bytes,
+            'python_bytes': python_bytes,
+            'compressed_bytes': dictionary.nbytes,
+            'savings_pct': round(savings_pct, 1)
         }
@@ -1,5 +1,7 @@
 import re
 from .ch02_text_analysis import TextAnalysis
+from .kgram_index import KGramIndex, wildcard_to_regex
+from .suggestion_index import SuggestionIndex
 
 class QueryProcessing:
     def __init__(self, data_dir):
@@ -25,21 +27,46 @@ class QueryProcessing:
         
         return previous_row[-1]
     
-    def spell_suggest(self, word, dictionary, max_suggestions=3):
-        """Simple spell checker using edit distance"""
-        distances = [(w, self.levenshtein_distance(word, w)) for w in dictionary]
+    def spell_suggest(self, word, dictionary, max_suggestions=3, extra_words=()):
+        """
+        Simple spell checker using edit distance.
+        With a SuggestionIndex, only the words sharing a delete with `word` are
+        checked and ties are broken by corpus frequency; any other iterable is
+        scanned in full. extra_words are candidates for this call only, ranked
+        as if they were in the dictionary (once) but never added to it, so a
+        shared index is left untouched.
+        """
+        extra_words = [w for w in extra_words if w not in dictionary]
+        if isinstance(dictionary, SuggestionIndex):
+            suggestions = dictionary.lookup(word, max_suggestions)
+            if not extra_words:
+                return suggestions
+            for extra in extra_words:
+                distance = self.levenshtein_distance(word, extra)
+                if distance <= dictionary.dictionary_distance:
+                    suggestions.append((extra, distance))
+            suggestions.sort(key=lambda s: (s[1], -max(dictionary.frequency(s[0]), 1), s[0]))
+            return suggestions[:max_suggestions]
+        distances = [(w, self.levenshtein_distance(word, w)) for w in list(dictionary) + extra_words]
         distances.sort(key=lambda x: x[1])
         return distances[:max_suggestions]
     
     def wildcard_to_regex(self, pattern):
         """Convert wildcard pattern to regex"""
-        if not pattern: return '^$'
-        # Replace * with .*
-        regex = pattern.replace('*', '.*')
-        return f'^{regex}$'
+        return wildcard_to_regex(pattern)
     
     def match_wildcard(self, pattern, terms):
-        """Match wildcard pattern against term list"""
-        regex_pattern = self.wildcard_to_regex(pattern)
-        compiled = re.compile(regex_pattern)
+        """
+        Match wildcard pattern against term list.
+        With a KGramIndex, candidates come from k-gram intersection and only
+        those are regex-checked. If terms is a sorted FrontCodedDictionary, only
+        the range of terms sharing the pattern's literal prefix (text before
+        the first '*') is scanned.
+        """
+        if isinstance(terms, KGramIndex):
+            return terms.match(pattern)
+        compiled = re.compile(self.wildcard_to_regex(pattern))
+        literal_prefix = pattern.split('*', 1)[0]
+        if literal_prefix and hasattr(terms, 'iter_prefix'):
+            terms = terms.iter_prefix(literal_prefix)
         return [term for term in terms if compiled.match(term)]
@@ -1,27 +1,47 @@
 
 import os
 import math
+import hashlib
+import heapq
+import bisect
+from array import array
+from itertools import repeat
 import numpy as np
 import json
-import networkx as nx
-from collections import Counter, defaultdict
-from .ch02_text_analysis import TextAnalysis
+from collections import Counter
+from .analysis_store import AnalysisStore
+from .doc_table import DocTable
+from .distributed.parallel_indexer import analyze_corpus
+from .dynamic_pruning import TermPostings, wand_top_k, block_max_wand_top_k, MIN_PRUNING_POSTINGS
+from .impact_index import ImpactIndex
+
+_DIGEST_MASK = (1 << 64) - 1
+
 
 class Ranking:
     def __init__(self, data_dir, doc_dir):
         self.doc_dir = doc_dir
         self.data_dir = data_dir
-        self.analyzer = TextAnalysis(data_dir)
+        # Document analyses are shared with the other components (see analysis_store)
+        self.analysis_store = AnalysisStore.open(data_dir)
+        self.analyzer = self.analysis_store.analyzer
         self.documents = self._load_documents()
-        self.N = len(self.documents)
-        self.doc_lengths = {doc_id: len(text.split()) for doc_id, text in self.documents.items()}
-        self.avg_dl = sum(self.doc_lengths.values()) / self.N if self.N > 0 else 0
+        # Order-independent digest of (filename, text) pairs, see corpus_generation
+        self._generation = sum(self._document_digest(name, text) for name, text in self.documents.items()) & _DIGEST_MASK
         
-        # Precompute Stats for TF-IDF/BM25
-        self.df = defaultdict(int)
-        self.tf = defaultdict(lambda: defaultdict(int))
+        # Precompute Stats for TF-IDF/BM25: integer docIDs, term -> [doc_ids, tfs]
+        self.doc_table = DocTable()
+        self.doc_lengths = array('I')   # docID -> whitespace token count
+        self.df = {}
+        self.postings = {}
+        # Impact-ordered mode: BM25 parameters are fixed when the index is built
+        self.impact_params = (1.5, 0.75, 8)     # (k1, b, bits)
+        self._impact_index = None
         self._compute_stats()
         
+        self.total_length = sum(self.doc_lengths)
+        self._update_collection_stats()
+        
     def _load_documents(self):
         docs = {}
         if os.path.exists(self.doc_dir):
@@ -31,77 +51,328 @@ class Ranking:
                         docs[filename] = f.read()
         return docs
 
+    @staticmethod
+    def _document_digest(name, text):
+        return int.from_bytes(hashlib.blake2b(f"{name}\0{text}".encode('utf-8'), digest_size=8).digest(), 'big')
+
+    @property
+    def corpus_generation(self):
+        """
+        Identifies the current set of documents: changes whenever one is added,
+        changed or removed, and is the same across restarts for the same corpus.
+        """
+        return f"{self._generation:016x}"
+
     def _compute_stats(self):
-        for doc_id, text in self.documents.items():
-            analysis = self.analyzer.analyze_text(text)
-            terms = analysis['stemmed']
-            term_counts = Counter(terms)
-            
-            for term, count in term_counts.items():
-                self.df[term] += 1
-                self.tf[doc_id][term] = count
+        # Corpus-wide analysis runs on a process pool; only docIDs/tfs come back
+        corpus = analyze_corpus(self.doc_dir, self.data_dir, keep_positions=False)
+        self.doc_table = DocTable(corpus.doc_names)
+        self.doc_lengths = array('I', corpus.raw_lengths)
+        for term, (doc_ids, tfs, _) in corpus.postings.items():
+            self.postings[term] = [doc_ids, tfs]
+            self.df[term] = len(doc_ids)
 
-    def compute_bm25(self, query, k1=1.5, b=0.75):
-        query_terms = self.analyzer.analyze_text(query)['stemmed']
-        scores = defaultdict(float)
+    def _add_term_stats(self, doc_id, text):
+        terms = self.analysis_store.analyze(text).stemmed
+        term_counts = Counter(terms)
         
-        for term in query_terms:
-            if term not in self.df:
-                continue
-                
-            df = self.df[term]
-            idf = math.log((self.N - df + 0.5) / (df + 0.5) + 1)
-            
-            for doc_id in self.documents:
-                tf = self.tf[doc_id].get(term, 0)
-                dl = self.doc_lengths[doc_id]
-                
-                numerator = tf * (k1 + 1)
-                denominator = tf + k1 * (1 - b + b * (dl / self.avg_dl))
-                
-                scores[doc_id] += idf * (numerator / denominator)
-                
-        return sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        # doc_id is the largest docID so far: appending keeps postings sorted
+        for term, count in term_counts.items():
+            entry = self.postings.get(term)
+            if entry is None:
+                entry = self.postings[term] = [array('I'), array('I')]
+            entry[0].append(doc_id)
+            entry[1].append(count)
+            self.df[term] = len(entry[0])
 
-    def compute_tfidf(self, query):
-        query_terms = self.analyzer.analyze_text(query)['stemmed']
-        scores = defaultdict(float)
-        
-        for term in query_terms:
-            if term not in self.df:
-                continue
+    def add_document(self, doc_id, text):
+        """
+        Adds (or replaces) one document, patching df/postings/doc_lengths/avg_dl
+        in O(document length) instead of recomputing corpus statistics.
+        doc_id is the filename; it gets a fresh integer docID.
+        """
+        if doc_id in self.documents:
+            self.remove_document(doc_id)
             
-            idf = math.log(self.N / (self.df[term] + 1))
+        self.documents[doc_id] = text
+        self._generation = (self._generation + self._document_digest(doc_id, text)) & _DIGEST_MASK
+        int_id = self.doc_table.add(doc_id)
+        while len(self.doc_lengths) <= int_id:
+            self.doc_lengths.append(0)
+        self.doc_lengths[int_id] = len(text.split())
+        self.total_length += self.doc_lengths[int_id]
+        self._add_term_stats(int_id, text)
+        self._update_collection_stats()
+
+    def update_document(self, doc_id, text):
+        self.add_document(doc_id, text)
+
+    def remove_document(self, doc_id):
+        if doc_id not in self.documents:
+            return False
             
-            for doc_id in self.documents:
-                tf = self.tf[doc_id].get(term, 0)
-                # Log normalization for TF
-                tf_norm = (1 + math.log(tf)) if tf > 0 else 0
-                scores[doc_id] += tf_norm * idf
+        int_id = self.doc_table.id_of(doc_id)
+        if int_id is not None:
+            # The stored text tells us which postings hold this document
+            for term in set(self.analysis_store.analyze(self.documents[doc_id]).stemmed):
+                entry = self.postings.get(term)
+                if entry is None:
+                    continue
+                doc_ids, tfs = entry
+                i = bisect.bisect_left(doc_ids, int_id)
+                if i == len(doc_ids) or doc_ids[i] != int_id:
+                    continue
+                del doc_ids[i]
+                del tfs[i]
+                if doc_ids:
+                    self.df[term] = len(doc_ids)
+                else:
+                    del self.postings[term]
+                    del self.df[term]
+            self.total_length -= self.doc_lengths[int_id]
+            self.doc_lengths[int_id] = 0
+            self.doc_table.remove(doc_id)
                 
-        return sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        self._generation = (self._generation - self._document_digest(doc_id, self.documents[doc_id])) & _DIGEST_MASK
+        del self.documents[doc_id]
+        self._update_collection_stats()
+        return True
 
-    def compute_bim(self, query):
-        """Binary Independence Model (BIM) Ranking"""
-        query_terms = self.analyzer.analyze_text(query)['stemmed']
-        scores = defaultdict(float)
-        
+    def _update_collection_stats(self):
+        self.N = len(self.documents)
+        self.avg_dl = self.total_length / self.N if self.N > 0 else 0
+        # Length normalizations and score bounds depend on N, avg_dl and the postings
+        self._norm_cache = {}
+        self._bound_cache = {}
+        self._impact_index = None
+        self._matrix_cache = {}
+
+    def _length_norms(self, k1, b):
+        """Per-docID BM25 length normalization k1 * (1 - b + b * dl / avg_dl), cached per (k1, b)."""
+        norms = self._norm_cache.get((k1, b))
+        if norms is None:
+            lengths = np.frombuffer(self.doc_lengths, dtype=np.uint32).astype(np.float64)
+            norms = k1 * (1 - b + b * (lengths / self.avg_dl)) if self.avg_dl else np.full(lengths.size, k1)
+            self._norm_cache[(k1, b)] = norms
+        return norms
+
+    def _query_postings(self, query):
+        """(doc_ids, tfs, df) per analyzed query term found in the collection, in query order."""
+        query_terms = list(self.analyzer.iter_terms(query))
+        result = []
         for term in query_terms:
-            if term not in self.df:
-                continue
-                
-            # Weight is derived from probabilistic odds (smoothed)
-            df = self.df[term]
+            entry = self.postings.get(term)
+            if entry is not None:
+                doc_ids, tfs = entry
+                result.append((np.frombuffer(doc_ids, dtype=np.uint32),
+                               np.frombuffer(tfs, dtype=np.uint32).astype(np.float64), self.df[term]))
+        return result
+
+    def _daat(self, term_scores, top_k=None):
+        """
+        Document-at-a-time merge of per-term (doc_ids, scores) postings.
+        Each document's score is summed over the terms in query order;
+        documents that contain no query term are never visited. With top_k,
+        a min-heap keeps only the best top_k documents.
+        Returns [(filename, score)], best first (ties: lower docID first).
+        """
+        streams = [zip(doc_ids.tolist(), repeat(i), scores.tolist())
+                   for i, (doc_ids, scores) in enumerate(term_scores)]
+        heap = []
+        current, total = None, 0.0
+        for doc_id, _, score in heapq.merge(*streams):
+            if doc_id != current:
+                if current is not None:
+                    self._offer(heap, current, total, top_k)
+                current, total = doc_id, 0.0
+            total += score
+        if current is not None:
+            self._offer(heap, current, total, top_k)
+        ranked = sorted(heap, key=lambda x: (-x[0], -x[1]))
+        return [(self.doc_table.name_of(-neg_doc_id), score) for score, neg_doc_id in ranked]
+
+    @staticmethod
+    def _offer(heap, doc_id, score, top_k):
+        # (score, -doc_id): on equal scores the lower docID counts as better
+        entry = (score, -doc_id)
+        if top_k is None or len(heap) < top_k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    def _bm25_contributions(self, doc_ids, tfs, df, k1, b):
+        norms = self._length_norms(k1, b)
+        idf = math.log((self.N - df + 0.5) / (df + 0.5) + 1)
+        numerator = tfs * (k1 + 1)
+        denominator = tfs + norms[doc_ids]
+        return idf * (numerator / denominator)
+
+    def _bm25_term_postings(self, term, k1, b):
+        """TermPostings (contributions and their maxima) of one term, cached per (k1, b)."""
+        key = (term, k1, b)
+        postings = self._bound_cache.get(key)
+        if postings is None:
+            doc_ids, tfs = self.postings[term]
+            # A copy: a cached view would keep the postings array from growing
+            doc_ids = np.array(doc_ids, dtype=np.uint32)
+            tfs = np.frombuffer(tfs, dtype=np.uint32).astype(np.float64)
+            postings = TermPostings(doc_ids, self._bm25_contributions(doc_ids, tfs, self.df[term], k1, b),
+                                    self.doc_table.capacity)
+            self._bound_cache[key] = postings
+        return postings
+
+    def compute_bm25(self, query, k1=1.5, b=0.75, top_k=None, pruning='bmw'):
+        """
+        BM25 ranking [(filename, score)], best first.
+        With top_k, pruning='bmw' (Block-Max WAND) or 'wand' skips documents
+        that cannot reach the top_k; the result is the same as pruning=None,
+        which scores every document containing a query term.
+        """
+        if top_k and pruning:
+            query_terms = [t for t in self.analyzer.iter_terms(query) if t in self.postings]
+            term_postings = [self._bm25_term_postings(term, k1, b) for term in query_terms]
+            if sum(postings.doc_ids.size for postings in term_postings) < MIN_PRUNING_POSTINGS:
+                return self._daat([(postings.doc_ids, postings.contributions) for postings in term_postings], top_k)
+            top_k_search = block_max_wand_top_k if pruning == 'bmw' else wand_top_k
+            ranked, _ = top_k_search(term_postings, top_k)
+            return [(self.doc_table.name_of(doc_id), score) for doc_id, score in ranked]
+
+        term_scores = [(doc_ids, self._bm25_contributions(doc_ids, tfs, df, k1, b))
+                       for doc_ids, tfs, df in self._query_postings(query)]
+        return self._daat(term_scores, top_k)
+
+    def build_impact_index(self, k1=1.5, b=0.75, bits=8):
+        """
+        Precomputes every (term, doc) BM25 contribution for fixed k1/b and
+        quantizes it to `bits` bits, in impact order (see ImpactIndex).
+        The index is rebuilt with the same parameters after corpus changes.
+        """
+        self.impact_params = (k1, b, bits)
+        term_contributions = []
+        for term, (doc_ids, tfs) in self.postings.items():
+            doc_ids = np.frombuffer(doc_ids, dtype=np.uint32)
+            tfs = np.frombuffer(tfs, dtype=np.uint32).astype(np.float64)
+            term_contributions.append((term, doc_ids, self._bm25_contributions(doc_ids, tfs, self.df[term], k1, b)))
+        self._impact_index = ImpactIndex(term_contributions, self.doc_table.capacity, bits)
+        return self._impact_index
+
+    @property
+    def impact_index(self):
+        if self._impact_index is None:
+            self.build_impact_index(*self.impact_params)
+        return self._impact_index
+
+    def compute_bm25_impact(self, query, top_k=10, max_postings=None):
+        """
+        Approximate BM25 top_k [(filename, score)] from the quantized impact
+        index, score-at-a-time with early termination. max_postings caps the
+        postings processed (anytime ranking).
+        """
+        query_terms = list(self.analyzer.iter_terms(query))
+        ranked, _ = self.impact_index.search(query_terms, top_k, max_postings)
+        return [(self.doc_table.name_of(doc_id), score) for doc_id, score in ranked]
+
+    def compute_tfidf(self, query, top_k=None):
+        term_scores = []
+        for doc_ids, tfs, df in self._query_postings(query):
+            idf = math.log(self.N / (df + 1))
+            # Log normalization for TF
+            term_scores.append((doc_ids, (1 + np.log(tfs)) * idf))
+        return self._daat(term_scores, top_k)
+
+    def compute_bim(self, query, top_k=None):
+        """Binary Independence Model (BIM) Ranking"""
+        term_scores = []
+        for doc_ids, _, df in self._query_postings(query):
             # RSV weight: log( (N - df + 0.5) / (df + 0.5) )
             # This represents the log-odds ratio of term appearing in relevant vs non-relevant docs, assuming R=0
+            # Binary: only presence counts, so every posting gets the same weight
             weight = math.log((self.N - df + 0.5) / (df + 0.5))
-            
-            for doc_id in self.documents:
-                # Binary: checks presence only, ignores frequency
-                if self.tf[doc_id].get(term, 0) > 0:
-                    scores[doc_id] += weight
-                    
-        return sorted(scores.items(), key=lambda x: x[1], reverse=True)
+            term_scores.append((doc_ids, np.full(doc_ids.size, weight)))
+        return self._daat(term_scores, top_k)
+
+    def _term_columns(self):
+        """term -> column of the doc x term matrices (all models share it until the corpus changes)."""
+        columns = self._matrix_cache.get('columns')
+        if columns is None:
+            columns = self._matrix_cache['columns'] = {term: i for i, term in enumerate(self.postings)}
+        return columns
+
+    def weight_matrix(self, model='bm25', k1=1.5, b=0.75):
+        """
+        CSR docID x term matrix of per-posting weights, so that a document's
+        score is the dot product of its row with the query's term counts.
+        Cached per model (and k1/b for BM25) until the corpus changes.
+        """
+        from scipy import sparse
+
+        key = (model, k1, b) if model == 'bm25' else model
+        matrix = self._matrix_cache.get(key)
+        if matrix is not None:
+            return matrix
+        if model not in ('bm25', 'tfidf', 'bim'):
+            raise ValueError(f"Unknown model: {model}")
+
+        columns = self._term_columns()
+        rows, cols, weights = [], [], []
+        for term, (doc_ids, tfs) in self.postings.items():
+            doc_ids = np.frombuffer(doc_ids, dtype=np.uint32)
+            tfs = np.frombuffer(tfs, dtype=np.uint32).astype(np.float64)
+            df = self.df[term]
+            if model == 'bm25':
+                weight = self._bm25_contributions(doc_ids, tfs, df, k1, b)
+            elif model == 'tfidf':
+                weight = (1 + np.log(tfs)) * math.log(self.N / (df + 1))
+            else:
+                weight = np.full(doc_ids.size, math.log((self.N - df + 0.5) / (df + 0.5)))
+            rows.append(doc_ids)
+            cols.append(np.full(doc_ids.size, columns[term], dtype=np.int64))
+            weights.append(weight)
+        shape = (self.doc_table.capacity, len(columns))
+        if rows:
+            matrix = sparse.csr_matrix((np.concatenate(weights), (np.concatenate(rows), np.concatenate(cols))), shape=shape)
+        else:
+            matrix = sparse.csr_matrix(shape)
+        self._matrix_cache[key] = matrix
+        return matrix
+
+    def score_batch(self, queries, model='bm25', top_k=10, k1=1.5, b=0.75):
+        """
+        Scores many queries at once: the queries become a sparse query x term
+        matrix of term counts, one sparse product with the doc x term weight
+        matrix gives every (query, document) score, and each row's top_k is
+        picked with argpartition.
+        Returns one [(filename, score)] list per query, best first (ties:
+        lower docID first), like compute_<model>(query, top_k) up to
+        floating point rounding.
+        """
+        from scipy import sparse
+
+        matrix = self.weight_matrix(model, k1, b)
+        columns = self._term_columns()
+        rows, cols = [], []
+        for i, query in enumerate(queries):
+            for term in self.analyzer.iter_terms(query):
+                column = columns.get(term)
+                if column is not None:
+                    rows.append(i)
+                    cols.append(column)
+        # Repeated query terms are summed by the constructor, like the DAAT scorers do
+        query_matrix = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(queries), len(columns)))
+        scores = (query_matrix @ matrix.T).tocsr()
+
+        results = []
+        for i in range(len(queries)):
+            start, end = scores.indptr[i], scores.indptr[i + 1]
+            doc_ids, values = scores.indices[start:end], scores.data[start:end]
+            if top_k and values.size > top_k:
+                kth = np.partition(values, values.size - top_k)[values.size - top_k]
+                keep = values >= kth
+                doc_ids, values = doc_ids[keep], values[keep]
+            order = np.lexsort((doc_ids, -values))[:top_k]
+            results.append([(self.doc_table.name_of(doc_id), score)
+                            for doc_id, score in zip(doc_ids[order].tolist(), values[order].tolist())])
+        return results
 
     def build_synthetic_graph(self):
         """
@@ -111,13 +382,14 @@ class Ranking:
         2. If Doc A contains Doc B's Topic Word, we assume a citation A -> B.
         """
         doc_signatures = {}
+        doc_names = list(self.documents)
+        texts = [self.documents[doc_id] for doc_id in doc_names]
         
         # Step 1: Extract signatures (Topic Words)
-        for doc_id, text in self.documents.items():
-            # Get first line or first 10 tokens
-            first_line = text.split('\n')[0]
-            analysis = self.analyzer.analyze_text(first_line)
-            tokens = analysis['tokens']
+        # Get first line or first 10 tokens
+        first_lines = self.analysis_store.analyze_many([text.split('\n')[0] for text in texts])
+        for doc_id, first_line in zip(doc_names, first_lines):
+            tokens = first_line.tokens
             
             # Find first non-stopword, non-numeric token as "Title Topic"
             signature = None
@@ -132,11 +404,13 @@ class Ranking:
         # Step 2: Build Edges
         nodes = [{'id': doc_id, 'label': sig} for doc_id, sig in doc_signatures.items()]
         edges = []
+        # Compared as lexicon IDs: the signatures are tokens, so they all have one
+        signature_ids = {doc_id: self.analysis_store.lexicon.id_of(sig) for doc_id, sig in doc_signatures.items()}
         
-        for source_id, text in self.documents.items():
-            source_tokens = set(self.analyzer.analyze_text(text)['tokens'])
+        for source_id, analysis in zip(doc_names, self.analysis_store.analyze_many(texts)):
+            source_tokens = set(analysis.token_ids)
             
-            for target_id, signature in doc_signatures.items():
+            for target_id, signature in signature_ids.items():
                 if source_id == target_id: continue
                 
                 # Check if source contains target's signature
@@ -153,6 +427,8 @@ class Ranking:
         return graph_data
 
     def compute_pagerank(self):
+        import networkx as nx
+        
         graph_path = os.path.join(self.data_dir, 'web_graph.json')
         
         # Auto-build if missing
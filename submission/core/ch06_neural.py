@@ -71,7 +71,7 @@ class NeuralIR:
             else:
                 # OOV Strategy:
                 # 1. Try stemmed
-                stem = self.analyzer.analyze_text(token)['stemmed'][0] if self.analyzer else token
+                stem = (self.analyzer.stem_token(token) or token) if self.analyzer else token
                 if stem in self.vocab:
                     idx = self.vocab[stem]
                     vec = self.emb_layer(torch.tensor([idx]))
@@ -4,6 +4,7 @@ Implements vanilla Python n-gram LM for Nepali text generation and prediction
 """
 
 from collections import defaultdict, Counter
+from .lexicon import Lexicon
 
 class NepaliNgramLM:
     """N-gram Language Model for Nepali text"""
@@ -16,9 +17,12 @@ class NepaliNgramLM:
             n: N-gram order (2=bigram, 3=trigram)
         """
         self.n = n
-        self.ngrams = defaultdict(Counter)  # {context: Counter({word: count})}
-        self.context_counts = Counter()      # {context: total_count}
-        self.vocabulary = set()
+        # Words are held as lexicon IDs: contexts are tuples of ints
+        self.lexicon = Lexicon()
+        self.start_id = self.lexicon.add('<START>')
+        self.ngrams = defaultdict(Counter)  # {context IDs: Counter({word ID: count})}
+        self.context_counts = Counter()      # {context IDs: total_count}
+        self.vocabulary = set()              # word IDs seen in training
         
     def train(self, sentences):
         """
@@ -29,7 +33,7 @@ class NepaliNgramLM:
         """
         for sent in sentences:
             # Add start/end markers
-            words = ['<START>'] * (self.n - 1) + sent.split() + ['<END>']
+            words = self.lexicon.encode(['<START>'] * (self.n - 1) + sent.split() + ['<END>'])
             self.vocabulary.update(words)
             
             # Count n-grams
@@ -40,6 +44,13 @@ class NepaliNgramLM:
                 self.ngrams[context][word] += 1
                 self.context_counts[context] += 1
     
+    def _context(self, words):
+        """Context IDs of the last n-1 words (padded with <START>), None if one is unknown"""
+        ids = [self.lexicon.id_of(word) for word in words[max(0, len(words) - (self.n - 1)):]] if self.n > 1 else []
+        if None in ids:
+            return None
+        return tuple([self.start_id] * (self.n - 1 - len(ids)) + ids)
+
     def predict_next(self, context_text, top_k=5):
         """
         Predict next word(s) given context
@@ -51,22 +62,18 @@ class NepaliNgramLM:
         Returns:
             List of (word, probability) tuples
         """
-        # Extract last n-1 words as context
-        words = context_text.split()
-        if len(words) < self.n - 1:
-            # Pad with START tokens if needed
-            context = tuple(['<START>'] * (self.n - 1 - len(words)) + words)
-        else:
-            context = tuple(words[-(self.n-1):])
-        
-        if context not in self.ngrams:
+        # Extract last n-1 words as context (padded with START tokens if needed)
+        context = self._context(context_text.split())
+        
+        if context is None or context not in self.ngrams:
             return []
         
         # Calculate probabilities
         candidates = self.ngrams[context]
         total = self.context_counts[context]
         
-        predictions = [(word, count/total) for word, count in candidates.most_common(top_k)]
+        terms = self.lexicon.terms
+        predictions = [(terms[word], count/total) for word, count in candidates.most_common(top_k)]
         return predictions
     
     def generate(self, start_text, max_words=20, temperature=1.0):
@@ -86,12 +93,6 @@ class NepaliNgramLM:
         words = start_text.split() if start_text else ['<START>']
         
         for _ in range(max_words):
-            # Get context
-            if len(words) < self.n - 1:
-                context = tuple(['<START>'] * (self.n - 1 - len(words)) + words)
-            else:
-                context = tuple(words[-(self.n-1):])
-            
             # Get predictions
             predictions = self.predict_next(' '.join(words), top_k=10)
             if not predictions:
@@ -133,7 +134,8 @@ class NepaliNgramLM:
         word_count = 0
         
         for sent in test_sentences:
-            words = ['<START>'] * (self.n - 1) + sent.split() + ['<END>']
+            # Unseen words get no ID (None): their n-grams are unseen too
+            words = [self.lexicon.id_of(w) for w in ['<START>'] * (self.n - 1) + sent.split() + ['<END>']]
             
             for i in range(len(words) - self.n + 1):
                 context = tuple(words[i:i+self.n-1])
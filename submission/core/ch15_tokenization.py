@@ -6,7 +6,8 @@ Includes sentence, word, character, and n-gram tokenization
 
 import re
 import string
-from difflib import get_close_matches
+
+from .suggestion_index import SuggestionIndex
 
 class NepaliTokenizer:
     """Enhanced tokenization for Nepali text"""
@@ -138,14 +139,16 @@ class NepaliTokenizer:
 class NepaliSpellChecker:
     """Simple spell checker using edit distance"""
     
-    def __init__(self, dictionary_path=None):
+    def __init__(self, dictionary_path=None, index=None):
         """
         Initialize spell checker
         
         Args:
             dictionary_path: Path to dictionary file
+            index: Shared SuggestionIndex used as the dictionary (e.g. Indexing.suggestion_index)
         """
         self.dictionary = set()
+        self.index = index if index is not None else SuggestionIndex()
         if dictionary_path:
             self.load_dictionary(dictionary_path)
     
@@ -154,30 +157,29 @@ class NepaliSpellChecker:
         with open(path, 'r', encoding='utf-8') as f:
             words = f.read().split('\n')
             self.dictionary = set(word.strip() for word in words if word.strip())
+        self.index = SuggestionIndex.from_words(sorted(self.dictionary))
     
     def is_correct(self, word):
         """Check if word is in dictionary"""
-        return word in self.dictionary
+        return word in self.dictionary or word in self.index
     
-    def suggest(self, word, n=5, cutoff=0.6):
+    def suggest(self, word, n=5, max_distance=2):
         """
         Suggest corrections for a word
         
         Args:
             word: Word to check
             n: Number of suggestions
-            cutoff: Similarity threshold
+            max_distance: Largest edit distance of a suggestion
             
         Returns:
-            List of suggested corrections
+            List of suggested corrections, closest first
         """
         if self.is_correct(word):
             return [word]
         
-        # Use difflib to find close matches
-        suggestions = get_close_matches(word, self.dictionary, n=n, cutoff=cutoff)
-        
-        return suggestions
+        # Delete-dictionary lookup instead of a scan of the whole dictionary
+        return self.index.suggest(word, n, max_distance)
     
     def check_text(self, text):
         """
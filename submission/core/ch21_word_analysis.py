@@ -1,17 +1,21 @@
 
 import os
 import math
-from collections import Counter
+from array import array
 from flask import current_app
-from .ch02_text_analysis import TextAnalysis
+from .analysis_store import AnalysisStore
+from .distributed.parallel_indexer import analyze_corpus
 
 from .pos_tagger import POSTagger
 from .nepali_wordnet import IndoWordNet, Synset
 from .spell_checker import SimpleSpellChecker
 
 class WordAnalyzer:
-    def __init__(self, data_dir, doc_dir):
-        self.analyzer = TextAnalysis(data_dir)
+    def __init__(self, data_dir, doc_dir, suggestion_index=None):
+        # Document analyses are shared with the other components (see analysis_store)
+        self.analysis_store = AnalysisStore.open(data_dir)
+        self.analyzer = self.analysis_store.analyzer
+        self.data_dir = data_dir
         self.doc_dir = doc_dir
         self.documents = self._load_documents()
         self.ner_vocabs = self._load_ner_vocabs()
@@ -20,10 +24,13 @@ class WordAnalyzer:
         # Initialize WordNet (lazy load might be better but it's small)
         self.iwn = IndoWordNet()
         
-        # Initialize Spell Checker
-        self.spell_checker = SimpleSpellChecker(data_dir=data_dir)
+        # Initialize Spell Checker (corpus words, weighted by their frequency); with
+        # suggestion_index it shares the index of the other spell checkers
+        self.spell_checker = SimpleSpellChecker(data_dir=data_dir, texts=self.documents.values(),
+                                                index=suggestion_index)
         
-        self.df = Counter()
+        self.lexicon = self.analysis_store.lexicon
+        self.df = array('I')    # term ID -> document frequency
         self.N = len(self.documents)
         self._compute_stats()
         
@@ -81,20 +88,19 @@ class WordAnalyzer:
         return None
 
     def _compute_stats(self):
-        for text in self.documents.values():
-            analysis = self.analyzer.analyze_text(text)
-            terms = set(analysis['stemmed'])
-            for term in terms:
-                self.df[term] += 1
+        corpus = analyze_corpus(self.doc_dir, self.data_dir, keep_positions=False)
+        self.df = array('I', bytes(4 * len(self.lexicon)))
+        for term, (doc_ids, _, _) in corpus.postings.items():
+            self.df[self.lexicon.id_of(term)] = len(doc_ids)
 
     def analyze_word(self, word, context_doc_id=None):
         """
         Analyze a single word to return linguistic features, WordNet data, and Spell Check.
         """
-        analysis = self.analyzer.analyze_text(word)
+        tokens = self.analyzer.tokenize(word)
         original = word
-        token = analysis['tokens'][0] if analysis['tokens'] else word
-        stem = analysis['stemmed'][0] if analysis['stemmed'] else token
+        token = tokens[0] if tokens else word
+        stem = self.analyzer.stem_token(word) or token
         is_stopword = token.lower() in self.analyzer.stopwords
         entity_type = self.get_entity_type(original) or self.get_entity_type(stem)
         pos_tag = self.pos_tagger.tag_word(original)
@@ -115,20 +121,20 @@ class WordAnalyzer:
             
         # Spell Check
         spelling_suggestions = []
-        if not self.spell_checker.check(original) and not self.spell_checker.check(stem):
+        if not is_stopword and not self.spell_checker.check(original) and not self.spell_checker.check(stem):
             spelling_suggestions = self.spell_checker.suggest(original)
 
         # Stats
-        doc_freq = self.df.get(stem, 0)
+        stem_id = self.lexicon.id_of(stem)
+        doc_freq = self.df[stem_id] if stem_id is not None and stem_id < len(self.df) else 0
         idf = math.log(self.N / (doc_freq + 1)) if doc_freq > 0 else 0
         
         # TF-IDF in specific document context
         tf_idf = 0.0
         if context_doc_id and context_doc_id in self.documents:
             doc_text = self.documents[context_doc_id]
-            doc_analysis = self.analyzer.analyze_text(doc_text)
-            doc_terms = doc_analysis['stemmed']
-            tf = doc_terms.count(stem)
+            doc_terms = self.analysis_store.analyze(doc_text).term_ids
+            tf = doc_terms.count(stem_id) if stem_id is not None else 0
             tf_idf = tf * idf
             
         return {
@@ -172,9 +178,9 @@ class WordAnalyzer:
             ner_checks = [clean_word, word]
             
             # Check stemmed word
-            analysis = self.analyzer.analyze_text(word)
-            if analysis['stemmed']:
-                ner_checks.append(analysis['stemmed'][0])
+            stem = self.analyzer.stem_token(word)
+            if stem:
+                ner_checks.append(stem)
                 
             for token_check in set(ner_checks):
                 for entity_type, vocab in self.ner_vocabs.items():
@@ -2,6 +2,7 @@
 import numpy as np
 import pickle
 import os
+from array import array
 from .ch02_text_analysis import TextAnalysis
 
 class Word2VecNumPy:
@@ -43,20 +44,18 @@ class Word2VecNumPy:
         self.w2 = np.random.uniform(-0.1, 0.1, (self.embedding_dim, self.actual_vocab_size))
         
         history = []
+        # Documents as vocabulary indices, once: epochs only index arrays
+        encoded = [array('I', [self.vocab[t] for t in text.split() if t in self.vocab]) for text in corpus]
         
         for epoch in range(epochs):
             loss = 0
-            for text in corpus:
-                tokens = [t for t in text.split() if t in self.vocab]
-                for i, target_word in enumerate(tokens):
-                    target_idx = self.vocab[target_word]
-                    
+            for tokens in encoded:
+                for i, target_idx in enumerate(tokens):
                     # Context window
                     context_indices = []
                     for j in range(max(0, i - window_size), min(len(tokens), i + window_size + 1)):
                         if i != j:
-                            context_idx = self.vocab[tokens[j]]
-                            context_indices.append(context_idx)
+                            context_indices.append(tokens[j])
                             
                     # Simple SGD per context (simplified for educational clarity)
                     for context_idx in context_indices:
@@ -1,8 +1,11 @@
 
 from collections import defaultdict
+from array import array
 import time
 import random
 
+from ..doc_table import DocTable
+
 class MapReduceInfo:
     def __init__(self):
         self.logs = []
@@ -13,6 +16,7 @@ class MapReduceInfo:
 class MapReduceIndexer:
     def __init__(self):
         self.info = MapReduceInfo()
+        self.doc_table = DocTable()
 
     def mapper(self, doc_id, text):
         """
@@ -43,28 +47,30 @@ class MapReduceIndexer:
 
     def reducer(self, key_word, list_of_doc_ids):
         """
-        Input: word, list of doc_ids
-        Output: word, posting_list (unique, sorted)
+        Input: word, list of integer doc_ids
+        Output: word, posting_list (unique, sorted uint32 array)
         """
         # Collapse list
-        posting_list = sorted(list(set(list_of_doc_ids)))
+        posting_list = array('I', sorted(set(list_of_doc_ids)))
         return key_word, posting_list
 
     def run_simulation(self, documents):
         """
         Full MapReduce simulation
-        documents: dict of {doc_id: text}
+        documents: dict of {filename: text}
+        Postings hold integer docIDs; self.doc_table maps them back to filenames.
         """
         self.info.logs = []
+        self.doc_table = DocTable(sorted(documents))
         self.info.log("MASTER", f"Starting MapReduce Job on {len(documents)} documents")
         
         # 1. Map Phase
         mapped_data = []
         start = time.time()
-        for doc_id, text in documents.items():
-            result = self.mapper(doc_id, text)
+        for doc_id, filename in self.doc_table.items():
+            result = self.mapper(doc_id, documents[filename])
             mapped_data.extend(result)
-            self.info.log("MAP", f"Mapped {doc_id}: Generated {len(result)} pairs")
+            self.info.log("MAP", f"Mapped {filename}: Generated {len(result)} pairs")
         
         self.info.log("MASTER", f"Map phase finished. Total key-value pairs: {len(mapped_data)}")
         
@@ -0,0 +1,131 @@
+"""
+Corpus analysis through the shared analysis store.
+
+Every document's analysis comes from the AnalysisStore of data_dir (see
+analysis_store.py); only the documents it does not hold yet - new or
+changed since their last analysis - are analyzed, on a process pool: the
+missing texts are cut into contiguous batches and each worker process
+analyzes its batch with its own TextAnalysis. The postings are then built
+in docID order from the stored analyses, so the result is identical
+whatever the number of workers, and whether an analysis was computed now
+or read back. In 'stemmed' mode they are built over the analyses' term IDs
+and keyed by term only at the end.
+"""
+
+import os
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from ..ch02_text_analysis import TextAnalysis
+from ..analysis_store import AnalysisStore
+from ..doc_table import list_documents
+
+MODES = ('stemmed', 'indexing')
+
+# Per-process state, set up once by _init_worker
+_analyzer = None
+
+
+def _init_worker(data_dir):
+    global _analyzer
+    _analyzer = TextAnalysis(data_dir)
+
+
+def _analyze_batch(texts):
+    """Worker entry point: [(tokens, stemmed)] of each text."""
+    results = []
+    for text in texts:
+        tokens = _analyzer.tokenize(text)
+        results.append((tokens, _analyzer.stem_tokens(tokens)))
+    return results
+
+
+def _analyze_on_pool(texts, data_dir, workers, batch_size):
+    batches = [texts[start:start + batch_size] for start in range(0, len(texts), batch_size)]
+    workers = min(workers, len(batches))
+    if workers <= 1:
+        _init_worker(data_dir)
+        return [analysis for batch in batches for analysis in _analyze_batch(batch)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data_dir,)) as pool:
+        # map() yields in submission order
+        return [analysis for batch in pool.map(_analyze_batch, batches) for analysis in batch]
+
+
+class CorpusPostings:
+    """
+    Merged result of a corpus analysis run.
+        doc_names[doc_id]      filename (documents sorted by name)
+        raw_lengths[doc_id]    whitespace token count of the raw text
+        term_counts[doc_id]    number of analyzed terms
+        postings[term]         [doc_ids, tfs, positions] (ascending docIDs)
+    """
+
+    def __init__(self, doc_names):
+        self.doc_names = doc_names
+        self.raw_lengths = array('I')
+        self.term_counts = array('I')
+        self.postings = {}
+
+    def add_document(self, doc_id, raw_length, terms, keep_positions=True):
+        """doc_id must be the largest docID so far: appending keeps postings sorted."""
+        self.raw_lengths.append(raw_length)
+        self.term_counts.append(len(terms))
+        if not keep_positions:
+            for term, tf in Counter(terms).items():
+                entry = self.postings.get(term)
+                if entry is None:
+                    entry = self.postings[term] = [array('I'), array('I'), array('I')]
+                entry[0].append(doc_id)
+                entry[1].append(tf)
+            return
+        doc_positions = {}
+        for pos, term in enumerate(terms):
+            doc_positions.setdefault(term, []).append(pos)
+        for term, positions in doc_positions.items():
+            entry = self.postings.get(term)
+            if entry is None:
+                entry = self.postings[term] = [array('I'), array('I'), array('I')]
+            entry[0].append(doc_id)
+            entry[1].append(len(positions))
+            entry[2].extend(positions)
+
+    def iter_positions(self, term):
+        """Yields (doc_id, positions) for one term (needs keep_positions=True)."""
+        doc_ids, tfs, positions = self.postings[term]
+        cursor = 0
+        for doc_id, tf in zip(doc_ids, tfs):
+            yield doc_id, positions[cursor:cursor + tf]
+            cursor += tf
+
+
+def analyze_corpus(doc_dir, data_dir, mode='stemmed', keep_positions=True, workers=None, batch_size=256):
+    """
+    Postings of every .txt document of doc_dir, from the shared analysis store.
+
+    mode: 'stemmed' (TextAnalysis.analyze_text()['stemmed'], used by the
+          ranking/indexing components) or 'indexing'
+          (TextAnalysis.preprocess_for_indexing, used by Foundations)
+    workers: process count for documents not analyzed yet (defaults to
+             $INDEX_WORKERS, else all cores); 1 runs in-process.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown analysis mode '{mode}'")
+    doc_names = list_documents(doc_dir)
+    texts = []
+    for filename in doc_names:
+        with open(os.path.join(doc_dir, filename), 'r', encoding='utf-8') as f:
+            texts.append(f.read())
+
+    store = AnalysisStore.open(data_dir)
+    workers = workers or int(os.environ.get('INDEX_WORKERS', 0)) or os.cpu_count() or 1
+    analyses = store.analyze_many(texts, lambda missing: _analyze_on_pool(missing, data_dir, workers, batch_size))
+
+    result = CorpusPostings(doc_names)
+    for doc_id, (text, analysis) in enumerate(zip(texts, analyses)):
+        terms = analysis.term_ids if mode == 'stemmed' else store.analyzer.indexing_terms(analysis.tokens)
+        result.add_document(doc_id, len(text.split()), terms, keep_positions)
+    if mode == 'stemmed':
+        lexicon = store.lexicon.terms
+        result.postings = {lexicon[term_id]: entry for term_id, entry in result.postings.items()}
+    return result
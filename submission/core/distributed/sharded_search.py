@@ -0,0 +1,419 @@
+"""
+Document-partitioned sharded search (scatter-gather).
+
+Every document belongs to exactly one of N shards (a stable hash of its
+filename). Each shard is an IndexShard living in its own worker process:
+it analyzes its own documents at startup and keeps a MemoryIndex of them,
+so index construction and query scoring both run on N cores.
+
+The broker talks to the shards over multiprocessing Connections: a Pipe
+for local worker processes, or a socket (Listener / Client) for a shard
+started elsewhere with serve_shard(). Messages are pickled tuples:
+    request  (request_id, op, args)
+    reply    (request_id, status, payload)
+
+A query runs in two scatter-gather rounds:
+1. 'stats'  every shard reports its document count, total length and the
+            local df of the query terms. The broker sums them, so every
+            shard scores with the same global N, avg_dl and df (scores
+            are then comparable across shards and equal to a single index).
+2. 'search' every shard scores its postings for the query terms and
+            returns its local top-k; the broker merges them into the
+            global top-k.
+A shard that does not answer within the timeout is left out of the
+result (which is flagged partial); its late reply is discarded by
+request_id.
+"""
+
+import os
+import math
+import time
+import heapq
+import zlib
+import threading
+import multiprocessing
+from multiprocessing.connection import Client, Listener, wait
+from array import array
+
+import numpy as np
+
+from ..ch02_text_analysis import TextAnalysis
+from ..analysis_store import AnalysisStore
+from ..doc_table import list_documents
+from ..storage.memory_index import MemoryIndex
+
+MODELS = ('bm25', 'tfidf', 'bim')
+
+
+def shard_of(name, num_shards):
+    """Shard number of a document; crc32 because hash() of str differs between processes."""
+    return zlib.crc32(name.encode('utf-8')) % num_shards
+
+
+class IndexShard:
+    """The documents of one shard: postings (MemoryIndex) plus raw document lengths."""
+
+    def __init__(self, shard_id, num_shards, data_dir):
+        self.shard_id = shard_id
+        self.num_shards = num_shards
+        self.analysis_store = AnalysisStore.open(data_dir)
+        self.index = MemoryIndex()
+        self.raw_lengths = array('I')    # docID -> whitespace token count (as in Ranking)
+        self.total_length = 0
+        self.doc_terms = {}              # filename -> distinct terms, for removal
+
+    def load(self, doc_dir):
+        names, texts = [], []
+        for name in list_documents(doc_dir):
+            if shard_of(name, self.num_shards) == self.shard_id:
+                with open(os.path.join(doc_dir, name), 'r', encoding='utf-8') as f:
+                    names.append(name)
+                    texts.append(f.read())
+        # One store lookup for the whole shard; analyses are shared with the other components
+        for name, text, analysis in zip(names, texts, self.analysis_store.analyze_many(texts)):
+            self.add_document(name, text, analysis.stemmed)
+
+    def info(self):
+        return {'shard': self.shard_id, 'num_docs': self.index.num_docs, 'pid': os.getpid(),
+                'total_length': self.total_length, 'vocab_size': self.index.vocab_size}
+
+    def add_document(self, name, text, terms=None):
+        self.remove_document(name)
+        if terms is None:
+            terms = self.analysis_store.analyze(text).stemmed
+        doc_id = self.index.add_document(name, terms)
+        while len(self.raw_lengths) <= doc_id:
+            self.raw_lengths.append(0)
+        self.raw_lengths[doc_id] = len(text.split())
+        self.total_length += self.raw_lengths[doc_id]
+        self.doc_terms[name] = tuple(set(terms))
+        return doc_id
+
+    def remove_document(self, name):
+        doc_id = self.index.doc_table.id_of(name)
+        if doc_id is None:
+            return False
+        self.index.remove_document(name, self.doc_terms.pop(name, None))
+        self.total_length -= self.raw_lengths[doc_id]
+        self.raw_lengths[doc_id] = 0
+        return True
+
+    def stats(self, terms):
+        df = {}
+        for term in set(terms):
+            entry = self.index.get_postings(term)
+            if entry is not None:
+                df[term] = len(entry[0])
+        return {'num_docs': self.index.num_docs, 'total_length': self.total_length, 'df': df}
+
+    def search(self, terms, num_docs, avg_dl, df, model='bm25', k=10, k1=1.5, b=0.75):
+        """
+        Local top-k [(score, filename)] for the analyzed query terms, scored
+        with the global statistics (num_docs, avg_dl, df) sent by the broker.
+        Only documents containing at least one query term are returned.
+        """
+        scores = np.zeros(self.index.doc_table.capacity, dtype=np.float64)
+        matched = np.zeros(scores.size, dtype=bool)
+        lengths = np.frombuffer(self.raw_lengths, dtype=np.uint32).astype(np.float64)
+        for term in terms:
+            entry = self.index.get_postings(term)
+            if entry is None or term not in df:
+                continue
+            doc_ids = np.frombuffer(entry[0], dtype=np.uint32)
+            tfs = np.frombuffer(entry[1], dtype=np.uint32).astype(np.float64)
+            n = df[term]
+            if model == 'bm25':
+                idf = math.log((num_docs - n + 0.5) / (n + 0.5) + 1)
+                norm = k1 * (1 - b + b * (lengths[doc_ids] / avg_dl))
+                scores[doc_ids] += idf * (tfs * (k1 + 1) / (tfs + norm))
+            elif model == 'tfidf':
+                scores[doc_ids] += (1 + np.log(tfs)) * math.log(num_docs / (n + 1))
+            else:
+                scores[doc_ids] += math.log((num_docs - n + 0.5) / (n + 0.5))
+            matched[doc_ids] = True
+
+        candidates = np.flatnonzero(matched)
+        if candidates.size > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        return [(float(scores[doc_id]), self.index.doc_name(int(doc_id))) for doc_id in candidates]
+
+
+def serve_connection(conn, shard):
+    """Answers broker requests on one connection until 'shutdown' or EOF."""
+    while True:
+        try:
+            request_id, op, args = conn.recv()
+        except (EOFError, OSError):
+            return False
+        if op == 'shutdown':
+            conn.send((request_id, 'ok', None))
+            return True
+        try:
+            if op == 'stats':
+                payload = shard.stats(**args)
+            elif op == 'search':
+                payload = shard.search(**args)
+            elif op == 'add':
+                payload = shard.add_document(**args)
+            elif op == 'remove':
+                payload = shard.remove_document(**args)
+            elif op == 'info':
+                payload = shard.info()
+            else:
+                raise ValueError(f"Unknown shard operation '{op}'")
+            conn.send((request_id, 'ok', payload))
+        except Exception as e:
+            conn.send((request_id, 'error', f'{type(e).__name__}: {e}'))
+
+
+def _shard_main(conn, shard_id, num_shards, doc_dir, data_dir):
+    """Entry point of a local shard worker process."""
+    try:
+        shard = IndexShard(shard_id, num_shards, data_dir)
+        shard.load(doc_dir)
+    except Exception as e:
+        # Reported to the broker instead of leaving it waiting for 'ready'
+        conn.send((0, 'error', f'{type(e).__name__}: {e}'))
+        conn.close()
+        return
+    conn.send((0, 'ready', shard.info()))
+    serve_connection(conn, shard)
+    conn.close()
+
+
+def serve_shard(address, shard_id, num_shards, doc_dir, data_dir, authkey=None):
+    """
+    Runs one shard as a socket server (e.g. on another machine), for
+    ShardBroker.connect(). Serves one broker connection at a time, until a
+    broker sends 'shutdown'.
+    """
+    shard = IndexShard(shard_id, num_shards, data_dir)
+    shard.load(doc_dir)
+    with Listener(address, authkey=authkey) as listener:
+        while True:
+            with listener.accept() as conn:
+                conn.send((0, 'ready', shard.info()))
+                if serve_connection(conn, shard):
+                    return
+
+
+class ShardBroker:
+    def __init__(self, connections, processes=(), timeout=2.0):
+        """
+        connections: one Connection per shard, in shard order, each already past its 'ready' message
+        timeout: seconds a query round waits for the shards (per query, not per shard)
+        """
+        self.connections = connections
+        self.processes = list(processes)
+        self.timeout = timeout
+        self.shard_info = [None] * len(connections)
+        self.alive = [True] * len(connections)
+        self.analyzer = None
+        self._request_id = 0
+        # One request in flight per connection: queries from several threads take turns
+        self._lock = threading.Lock()
+
+    @classmethod
+    def start(cls, doc_dir, data_dir, num_shards=None, timeout=2.0, start_timeout=300.0):
+        """
+        Starts num_shards local worker processes (default: $SEARCH_SHARDS, else min(4, cores)).
+        Raises RuntimeError if a shard fails to load or is not ready within start_timeout seconds.
+        """
+        num_shards = num_shards or int(os.environ.get('SEARCH_SHARDS', 0)) or min(4, os.cpu_count() or 1)
+        connections, processes = [], []
+        for shard_id in range(num_shards):
+            parent_conn, child_conn = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_shard_main, daemon=True,
+                                              args=(child_conn, shard_id, num_shards, doc_dir, data_dir))
+            process.start()
+            child_conn.close()
+            connections.append(parent_conn)
+            processes.append(process)
+        broker = cls(connections, processes, timeout)
+        broker._wait_ready(start_timeout)
+        broker.analyzer = TextAnalysis(data_dir)
+        return broker
+
+    @classmethod
+    def connect(cls, addresses, data_dir, authkey=None, timeout=2.0, start_timeout=300.0):
+        """Connects to shards started with serve_shard(), given in shard order."""
+        broker = cls([Client(address, authkey=authkey) for address in addresses], timeout=timeout)
+        broker._wait_ready(start_timeout)
+        broker.analyzer = TextAnalysis(data_dir)
+        return broker
+
+    def _wait_ready(self, timeout=None):
+        """
+        Waits for every shard's 'ready' message (shards load their documents in
+        parallel). A shard that reports an error, exits or is not ready within
+        timeout seconds stops the broker with a RuntimeError.
+        """
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        pending = list(range(len(self.connections)))
+        failure = None
+        while pending and failure is None:
+            remaining = None if deadline is None else deadline - time.perf_counter()
+            if remaining is not None and remaining <= 0:
+                failure = f"shard {pending[0]} not ready after {timeout:.0f}s"
+                break
+            # Wake up now and then to notice a local worker that died without closing its pipe
+            poll = 1.0 if remaining is None else min(remaining, 1.0)
+            for conn in wait([self.connections[i] for i in pending], poll):
+                shard_id = self.connections.index(conn)
+                try:
+                    _, status, info = conn.recv()
+                except (OSError, EOFError):
+                    failure = f"shard {shard_id} exited while loading"
+                    break
+                if status != 'ready':
+                    failure = f"shard {shard_id} failed to load: {info}"
+                    break
+                self.shard_info[shard_id] = info
+                pending.remove(shard_id)
+            if failure is None:
+                for shard_id in pending:
+                    if shard_id < len(self.processes) and not self.processes[shard_id].is_alive():
+                        failure = f"shard {shard_id} exited while loading (exit code {self.processes[shard_id].exitcode})"
+                        break
+        if failure is not None:
+            # Loading shards cannot answer 'shutdown': close() only terminates them
+            for shard_id in pending:
+                self.alive[shard_id] = False
+            self.close()
+            raise RuntimeError(f"Sharded search could not start: {failure}")
+
+    @property
+    def num_shards(self):
+        return len(self.connections)
+
+    @property
+    def num_docs(self):
+        return sum(info['num_docs'] for info in self.shard_info if info)
+
+    def _scatter(self, op, args, shard_ids, timeout):
+        """
+        Sends the same request to each shard and gathers the replies until the deadline.
+        Returns {shard_id: (status, payload, ms)}; missing shards get status 'timeout'.
+        """
+        self._request_id += 1
+        request_id = self._request_id
+        start = time.perf_counter()
+        pending = []
+        replies = {}
+        for shard_id in shard_ids:
+            try:
+                self.connections[shard_id].send((request_id, op, args))
+                pending.append(shard_id)
+            except (OSError, EOFError):
+                self.alive[shard_id] = False
+                replies[shard_id] = ('down', None, 0.0)
+
+        deadline = start + timeout if timeout is not None else None
+        while pending:
+            remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            ready = wait([self.connections[i] for i in pending], remaining)
+            if not ready:
+                break
+            for conn in ready:
+                shard_id = self.connections.index(conn)
+                try:
+                    reply_id, status, payload = conn.recv()
+                except (OSError, EOFError):
+                    self.alive[shard_id] = False
+                    replies[shard_id] = ('down', None, (time.perf_counter() - start) * 1000)
+                    pending.remove(shard_id)
+                    continue
+                if reply_id != request_id:
+                    continue    # late answer to a request that already timed out
+                replies[shard_id] = (status, payload, (time.perf_counter() - start) * 1000)
+                pending.remove(shard_id)
+
+        for shard_id in pending:
+            replies[shard_id] = ('timeout', None, timeout * 1000)
+        return replies
+
+    def search(self, query, model='bm25', k=10, k1=1.5, b=0.75, timeout=None):
+        """
+        Global top-k over all shards.
+        Returns {'results': [(filename, score)], 'shards': [per-shard report],
+                 'partial': bool, 'num_docs': N used for scoring}
+        """
+        if model not in MODELS:
+            raise ValueError(f"Unknown model '{model}'")
+        timeout = self.timeout if timeout is None else timeout
+        terms = list(self.analyzer.iter_terms(query))
+        reports = [{'shard': i, 'status': 'ok' if self.alive[i] else 'down', 'ms': 0.0, 'hits': 0}
+                   for i in range(self.num_shards)]
+        if not terms:
+            return {'results': [], 'shards': reports, 'partial': False, 'num_docs': self.num_docs}
+
+        with self._lock:
+            shard_ids = [i for i in range(self.num_shards) if self.alive[i]]
+            start = time.perf_counter()
+
+            # Round 1: global collection statistics
+            stats = self._scatter('stats', {'terms': terms}, shard_ids, timeout)
+            num_docs, total_length, df = 0, 0, {}
+            for shard_id, (status, payload, ms) in stats.items():
+                reports[shard_id].update(status=status, ms=ms)
+                if status != 'ok':
+                    continue
+                self.shard_info[shard_id]['num_docs'] = payload['num_docs']
+                num_docs += payload['num_docs']
+                total_length += payload['total_length']
+                for term, n in payload['df'].items():
+                    df[term] = df.get(term, 0) + n
+            shard_ids = [i for i in shard_ids if stats[i][0] == 'ok']
+            if not num_docs or not df:
+                return {'results': [], 'shards': reports, 'partial': len(shard_ids) < self.num_shards,
+                        'num_docs': num_docs}
+
+            # Round 2: every shard scores with the same statistics
+            remaining = max(0.0, timeout - (time.perf_counter() - start))
+            args = {'terms': terms, 'num_docs': num_docs, 'avg_dl': total_length / num_docs, 'df': df,
+                    'model': model, 'k': k, 'k1': k1, 'b': b}
+            hits = self._scatter('search', args, shard_ids, remaining)
+
+        merged = []
+        for shard_id, (status, payload, ms) in hits.items():
+            reports[shard_id].update(status=status, ms=reports[shard_id]['ms'] + ms)
+            if status == 'ok':
+                reports[shard_id]['hits'] = len(payload)
+                merged.extend(payload)
+        top = heapq.nsmallest(k, merged, key=lambda hit: (-hit[0], hit[1]))
+        return {
+            'results': [(name, score) for score, name in top],
+            'shards': reports,
+            'partial': any(report['status'] != 'ok' for report in reports),
+            'num_docs': num_docs,
+        }
+
+    def _route(self, op, name, args):
+        shard_id = shard_of(name, self.num_shards)
+        with self._lock:
+            status, payload, _ = self._scatter(op, args, [shard_id], None)[shard_id]
+        if status == 'error':
+            raise RuntimeError(payload)
+        return payload
+
+    def add_document(self, name, text):
+        """Adds or replaces a document on its shard."""
+        return self._route('add', name, {'name': name, 'text': text})
+
+    def remove_document(self, name):
+        return self._route('remove', name, {'name': name})
+
+    def close(self):
+        with self._lock:
+            for shard_id, conn in enumerate(self.connections):
+                if self.alive[shard_id]:
+                    try:
+                        self._scatter('shutdown', {}, [shard_id], 1.0)
+                    except (OSError, EOFError):
+                        pass
+                conn.close()
+            self.alive = [False] * len(self.connections)
+        for process in self.processes:
+            process.join(timeout=1.0)
+            if process.is_alive():
+                process.terminate()
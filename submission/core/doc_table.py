@@ -0,0 +1,70 @@
+import os
+
+
+def list_documents(doc_dir):
+    """Sorted .txt filenames of a document directory."""
+    if not os.path.exists(doc_dir):
+        return []
+    return sorted(name for name in os.listdir(doc_dir) if name.endswith('.txt'))
+
+
+class DocTable:
+    """
+    Central filename <-> dense integer docID mapping.
+
+    Postings everywhere store these docIDs (sorted uint32 arrays) instead of
+    filename strings. IDs are assigned in insertion order and never reused:
+    a deleted document leaves an empty slot, so IDs stay stable and a newly
+    added document always gets the largest ID (appending keeps postings sorted).
+    """
+
+    def __init__(self, names=()):
+        self.names = []   # docID -> filename (None for deleted slots)
+        self.ids = {}     # filename -> docID
+        for name in names:
+            self.add(name)
+
+    @classmethod
+    def from_directory(cls, doc_dir):
+        return cls(list_documents(doc_dir))
+
+    def add(self, name):
+        doc_id = self.ids.get(name)
+        if doc_id is None:
+            doc_id = len(self.names)
+            self.names.append(name)
+            self.ids[name] = doc_id
+        return doc_id
+
+    def remove(self, name):
+        doc_id = self.ids.pop(name, None)
+        if doc_id is not None:
+            self.names[doc_id] = None
+        return doc_id
+
+    def id_of(self, name):
+        return self.ids.get(name)
+
+    def name_of(self, doc_id):
+        return self.names[doc_id]
+
+    def names_of(self, doc_ids):
+        return [self.names[doc_id] for doc_id in doc_ids]
+
+    def items(self):
+        """Live (docID, filename) pairs in docID order."""
+        return ((doc_id, name) for doc_id, name in enumerate(self.names) if name is not None)
+
+    @property
+    def capacity(self):
+        """Number of docID slots ever assigned (live + deleted)."""
+        return len(self.names)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def __iter__(self):
+        return (name for name in self.names if name is not None)
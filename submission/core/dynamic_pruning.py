@@ -0,0 +1,236 @@
+"""
+Safe top-k dynamic pruning: WAND and Block-Max WAND.
+
+Both skip documents whose score upper bound cannot reach the current top-k
+threshold (the k-th best score so far), and return exactly the top-k of
+the exhaustive scorer.
+
+WAND     every term has one upper bound (its largest contribution). Cursors
+         walk the postings in docID order, kept sorted by their current
+         docID; the pivot is the first cursor at which the running sum of
+         bounds exceeds the threshold. Documents before the pivot's docID
+         cannot enter the top-k, so the cursors before it jump straight to it.
+Block-Max WAND
+         the docID space is cut into blocks of BLOCK_DOCS documents and
+         every term also stores its largest contribution inside each block.
+         A block's bound is the sum of the query terms' block maxima - one
+         vector sum for all blocks - and blocks whose bound cannot reach the
+         threshold are skipped without touching their postings. Blocks are
+         docID ranges shared by all terms (rather than runs of postings per
+         term), so a block's postings are array slices and the surviving
+         blocks are evaluated with NumPy rather than one document at a time.
+
+Scores are sums of the same per-posting contributions, in the same query
+term order, as the exhaustive scorer; ties go to the lower docID.
+"""
+
+import heapq
+import bisect
+
+import numpy as np
+
+BLOCK_DOCS = 256
+
+# Queries with fewer postings than this are cheaper to merge exhaustively
+# than to bound
+MIN_PRUNING_POSTINGS = 1000
+
+# Bounds are inflated by this factor so that rounding in their sums can never
+# make a bound smaller than a real score
+_SLACK = 1 + 1e-9
+
+
+class TermPostings:
+    """One term's postings with precomputed contributions, term maximum and block maxima."""
+
+    def __init__(self, doc_ids, contributions, capacity, block_docs=BLOCK_DOCS):
+        self.doc_ids = doc_ids
+        self.contributions = contributions
+        self.block_docs = block_docs
+        num_blocks = -(-capacity // block_docs)
+        # offsets[j]:offsets[j + 1] is the slice of postings in docID block j
+        self.offsets = np.searchsorted(doc_ids, np.arange(num_blocks + 1) * block_docs)
+        self.block_max = np.zeros(num_blocks)
+        nonempty = np.flatnonzero(self.offsets[1:] > self.offsets[:-1])
+        if nonempty.size:
+            self.block_max[nonempty] = np.maximum.reduceat(contributions, self.offsets[nonempty]) * _SLACK
+        self.max_score = float(self.block_max.max()) if num_blocks else 0.0
+        self._lists = None
+
+    def lists(self):
+        """(doc_ids, contributions) as Python lists, for the cursor-based WAND."""
+        if self._lists is None:
+            self._lists = (self.doc_ids.tolist(), self.contributions.tolist())
+        return self._lists
+
+
+def _offer(heap, doc_id, score, top_k):
+    # (score, -doc_id): on equal scores the lower docID counts as better
+    entry = (score, -doc_id)
+    if len(heap) < top_k:
+        heapq.heappush(heap, entry)
+    elif entry > heap[0]:
+        heapq.heapreplace(heap, entry)
+
+
+def _ranked(heap):
+    return [(-neg_doc_id, score) for score, neg_doc_id in sorted(heap, key=lambda x: (-x[0], -x[1]))]
+
+
+class _Cursor:
+    __slots__ = ('order', 'max_score', 'doc_ids', 'scores', 'pos', 'doc')
+
+    def __init__(self, order, postings):
+        self.order = order            # position of the term in the query
+        self.max_score = postings.max_score
+        self.doc_ids, self.scores = postings.lists()
+        self.pos = 0
+        self.doc = self.doc_ids[0] if self.doc_ids else _END
+
+    def advance(self, target):
+        """Moves to the first posting with docID >= target."""
+        self.pos = bisect.bisect_left(self.doc_ids, target, self.pos)
+        self.doc = self.doc_ids[self.pos] if self.pos < len(self.doc_ids) else _END
+
+
+_END = float('inf')
+
+
+def wand_top_k(term_postings, top_k):
+    """
+    term_postings: one TermPostings per query term, in query order.
+    Returns ([(doc_id, score)] best first, number of fully scored documents).
+    """
+    cursors = [_Cursor(i, postings) for i, postings in enumerate(term_postings) if postings.doc_ids.size]
+    heap = []
+    scored = 0
+    while True:
+        cursors.sort(key=lambda c: c.doc)
+        threshold = heap[0][0] if len(heap) >= top_k else -_END
+
+        # Pivot: first cursor at which the upper bounds can beat the threshold
+        bound = 0.0
+        pivot = None
+        for i, cursor in enumerate(cursors):
+            if cursor.doc == _END:
+                break
+            bound += cursor.max_score
+            if bound > threshold:
+                pivot = i
+                break
+        if pivot is None:
+            break
+        doc = cursors[pivot].doc
+
+        if cursors[0].doc == doc:
+            # Every cursor on doc is scored, in query order
+            matching = sorted((c for c in cursors if c.doc == doc), key=lambda c: c.order)
+            score = 0.0
+            for cursor in matching:
+                score += cursor.scores[cursor.pos]
+            scored += 1
+            _offer(heap, doc, score, top_k)
+            for cursor in matching:
+                cursor.advance(doc + 1)
+        else:
+            # Documents before the pivot cannot make it: bring those cursors up to doc
+            for cursor in cursors[:pivot]:
+                cursor.advance(doc)
+
+    return _ranked(heap), scored
+
+
+def _ranges(starts, ends):
+    """Concatenation of arange(start, end) over the given ranges."""
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if not total:
+        return np.zeros(0, dtype=np.int64)
+    shifts = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return shifts + np.arange(total)
+
+
+def _exact_scores(term_postings, docs):
+    """Scores of docs summed over the terms in query order (0.0 for a missing term changes nothing)."""
+    scores = np.zeros(docs.size)
+    for postings in term_postings:
+        pos = np.searchsorted(postings.doc_ids, docs)
+        pos[pos == postings.doc_ids.size] = 0
+        scores += np.where(postings.doc_ids[pos] == docs, postings.contributions[pos], 0.0)
+    return scores
+
+
+def _score_blocks(term_postings, by_bound, selected, block_docs, num_blocks, threshold):
+    """
+    Exact (docs, scores) of the documents in the selected blocks that can
+    reach threshold. The terms with the smallest upper bounds whose bounds
+    sum below the threshold are non-essential: a document found in none of
+    the other (essential) terms cannot make the top-k and is never looked
+    at. Essential contributions plus the non-essential bounds then bound a
+    document's score, and only the documents whose bound reaches the
+    threshold are scored.
+    """
+    non_essential = 0.0
+    essential = by_bound
+    for i, postings in enumerate(by_bound):
+        if (non_essential + postings.max_score) * _SLACK >= threshold:
+            essential = by_bound[i:]
+            break
+        non_essential += postings.max_score
+
+    # Essential postings of the selected blocks, laid out block after block
+    slot = np.zeros(num_blocks, dtype=np.int64)
+    slot[selected] = np.arange(selected.size) * block_docs
+    partial = np.zeros(selected.size * block_docs)
+    matched = np.zeros(selected.size * block_docs, dtype=bool)
+    for postings in essential:
+        index = _ranges(postings.offsets[selected], postings.offsets[selected + 1])
+        doc_ids = postings.doc_ids[index].astype(np.int64)
+        local = slot[doc_ids // block_docs] + doc_ids % block_docs
+        partial[local] += postings.contributions[index]
+        matched[local] = True
+    local = np.flatnonzero(matched)
+    local = local[(partial[local] + non_essential) * _SLACK >= threshold]
+    docs = selected[local // block_docs] * block_docs + local % block_docs
+    return docs, _exact_scores(term_postings, docs)
+
+
+def block_max_wand_top_k(term_postings, top_k, first_blocks=2):
+    """
+    term_postings: one TermPostings per query term, in query order (same block_docs).
+    Returns ([(doc_id, score)] best first, number of fully scored documents).
+
+    Runs in two vectorized rounds instead of one step per document: the
+    first_blocks blocks with the best bounds are scored to get a threshold,
+    then every other block whose bound reaches it is scored (documents that
+    cannot reach it are filtered out on the way, see _score_blocks).
+    """
+    term_postings = [postings for postings in term_postings if postings.doc_ids.size]
+    if not term_postings:
+        return [], 0
+    block_docs = term_postings[0].block_docs
+    bounds = np.sum([postings.block_max for postings in term_postings], axis=0)
+    blocks = np.flatnonzero(bounds)
+    blocks = blocks[np.argsort(-bounds[blocks], kind='stable')]
+    by_bound = sorted(term_postings, key=lambda postings: postings.max_score)
+
+    best_docs = np.zeros(0, dtype=np.int64)
+    best_scores = np.zeros(0)
+    threshold = -_END
+    scored = 0
+    for selected in (blocks[:first_blocks], blocks[first_blocks:]):
+        # A document scoring exactly the threshold may still win the tie on docID
+        selected = selected[bounds[selected] >= threshold]
+        if not selected.size:
+            break
+        docs, scores = _score_blocks(term_postings, by_bound, selected, block_docs, bounds.size, threshold)
+        scored += docs.size
+        keep = scores >= threshold
+        # Merge with the current top-k: higher score first, then lower docID
+        best_docs = np.concatenate((best_docs, docs[keep]))
+        best_scores = np.concatenate((best_scores, scores[keep]))
+        order = np.lexsort((best_docs, -best_scores))[:top_k]
+        best_docs, best_scores = best_docs[order], best_scores[order]
+        if best_docs.size >= top_k:
+            threshold = best_scores[-1]
+    return list(zip(best_docs.tolist(), best_scores.tolist())), scored
@@ -0,0 +1,129 @@
+"""
+Impact-ordered index with score-at-a-time (SAAT) query evaluation.
+
+Every (term, doc) BM25 contribution is computed once, at build time, and
+quantized to an integer impact in 1..2^bits - 1 (uniformly over the largest
+contribution in the collection). A term's postings are stored sorted by
+impact, as segments of equal impact whose docIDs are ascending.
+
+A query processes the segments of all its terms in decreasing impact order
+and adds each segment's impact to the accumulators of its documents, so the
+highest-scoring documents surface first and no floating point BM25 math is
+done per query. Evaluation stops early (Anh & Moffat):
+- once no document outside the current top-k can catch up with the k-th,
+  even if it got every impact not yet processed (the remaining bound), the
+  top-k set is final; the remaining postings are then only applied to those
+  k documents to get their exact order;
+- optionally after max_postings postings (anytime ranking: faster, but no
+  longer the exact quantized ranking).
+
+Scores are the quantized sums scaled back to BM25 units, so they
+approximate - and rank like - the exact scorer up to quantization error.
+"""
+
+import numpy as np
+
+
+class ImpactIndex:
+    def __init__(self, term_contributions, capacity, bits=8):
+        """
+        term_contributions: iterable of (term, doc_ids, contributions) arrays
+        capacity: number of docID slots (size of the accumulator array)
+        """
+        term_contributions = list(term_contributions)
+        self.capacity = capacity
+        self.bits = bits
+        self.levels = (1 << bits) - 1
+        largest = max((float(c.max()) for _, _, c in term_contributions if c.size), default=0.0)
+        # contribution = impact / scale, up to quantization error
+        self.scale = self.levels / largest if largest > 0 else 1.0
+        # term -> (impacts, docIDs), highest impact first, docIDs ascending within an impact
+        self.terms = {}
+        self.num_postings = 0
+        for term, doc_ids, contributions in term_contributions:
+            if not doc_ids.size:
+                continue
+            impacts = np.clip(np.ceil(contributions * self.scale), 1, self.levels).astype(np.uint8)
+            order = np.lexsort((doc_ids, -impacts.astype(np.int16)))
+            self.terms[term] = (impacts[order], np.asarray(doc_ids, dtype=np.uint32)[order])
+            self.num_postings += impacts.size
+
+    def __contains__(self, term):
+        return term in self.terms
+
+    def memory_bytes(self):
+        return sum(impacts.nbytes + doc_ids.nbytes for impacts, doc_ids in self.terms.values())
+
+    def search(self, terms, top_k=10, max_postings=None):
+        """
+        terms: analyzed query terms (repeats count once per occurrence, like in BM25)
+        Returns ([(doc_id, score)] best first, number of postings processed).
+
+        Impact levels are processed in batches, highest first: a batch adds, for
+        every term, the slice of its postings down to the batch's lowest
+        impact. Batches grow so that the postings processed quadruple each time
+        (up to max_postings), and the early termination test runs between
+        batches. max_postings is rounded up to a whole impact level.
+        """
+        occurrences = [self.terms[term] for term in terms if term in self.terms]
+        if not occurrences:
+            return [], 0
+        # ends[l, i]: postings of occurrence i with an impact >= levels[l]
+        levels = np.unique(np.concatenate([impacts for impacts, _ in occurrences]))[::-1].astype(np.int16)
+        ends = np.stack([np.searchsorted(-impacts.astype(np.int16), -levels, side='right')
+                         for impacts, _ in occurrences], axis=1)
+        totals = ends.sum(axis=1)
+
+        accumulators = np.zeros(self.capacity, dtype=np.int32)
+        done = np.zeros(len(occurrences), dtype=np.int64)
+        processed = 0
+        target = 4 * top_k if max_postings is None else min(4 * top_k, max_postings)
+        while processed < totals[-1]:
+            # Smallest batch of whole levels reaching the target
+            level = min(int(np.searchsorted(totals, target)), levels.size - 1)
+            target = 4 * totals[level]
+            if max_postings is not None:
+                target = min(target, max_postings)
+            for i, (impacts, doc_ids) in enumerate(occurrences):
+                start, end = done[i], ends[level, i]
+                if end > start:
+                    accumulators[doc_ids[start:end]] += impacts[start:end]
+            done = ends[level]
+            processed = int(totals[level])
+            if max_postings is not None and processed >= max_postings:
+                break
+            # Largest score any document can still gain
+            remaining = sum(int(impacts[done[i]]) for i, (impacts, _) in enumerate(occurrences)
+                            if done[i] < impacts.size)
+            if not remaining:
+                break
+            top = self._final_top(accumulators, top_k, remaining)
+            if top is not None:
+                # Only the top-k documents' accumulators can still change their order
+                for i, (impacts, doc_ids) in enumerate(occurrences):
+                    rest = slice(done[i], impacts.size)
+                    hits = np.isin(doc_ids[rest], top, assume_unique=True)
+                    accumulators[doc_ids[rest][hits]] += impacts[rest][hits]
+                break
+        return self._ranked(accumulators, top_k), processed
+    @staticmethod
+    def _final_top(accumulators, top_k, remaining):
+        """The top-k docIDs if no other document can reach the k-th score, else None."""
+        if accumulators.size <= top_k:
+            return None
+        candidates = np.argpartition(-accumulators, top_k)[:top_k + 1]
+        values = np.sort(accumulators[candidates])[::-1]
+        if values[top_k] + remaining >= values[top_k - 1]:
+            return None
+        top = candidates[accumulators[candidates] >= values[top_k - 1]]
+        return np.sort(top)
+
+    def _ranked(self, accumulators, top_k):
+        matched = np.flatnonzero(accumulators)
+        if matched.size > top_k:
+            kth = np.partition(accumulators[matched], matched.size - top_k)[matched.size - top_k]
+            matched = matched[accumulators[matched] >= kth]
+        # Higher score first, then lower docID
+        matched = matched[np.lexsort((matched, -accumulators[matched]))][:top_k]
+        return [(doc_id, score / self.scale) for doc_id, score in
+                zip(matched.tolist(), accumulators[matched].tolist())]
@@ -0,0 +1,78 @@
+"""
+Character k-gram index over the term dictionary, for wildcard queries.
+
+Every term is padded with '$' at both ends and split into its character
+k-grams (नेपाल -> $ने, नेप, ेपा, पाल, ाल$ for k=3); each gram maps to the
+sorted IDs of the terms containing it. A pattern such as नेपा*को is cut at
+the '*'s into literal pieces ($नेपा, को$), the pieces' k-grams are looked
+up and their term lists intersected rarest first. Only those few candidates
+are checked against the full pattern with a regex (k-grams alone cannot
+enforce the order of the pieces), so the cost depends on the size of the
+candidate set rather than on the vocabulary size.
+"""
+
+import re
+import bisect
+from array import array
+
+from .postings import intersect_all
+
+BOUNDARY = '$'
+
+
+def wildcard_to_regex(pattern):
+    """Wildcard pattern -> anchored regex ('*' matches any run of characters)."""
+    if not pattern:
+        return '^$'
+    return '^' + '.*'.join(re.escape(piece) for piece in pattern.split('*')) + '$'
+
+
+class KGramIndex:
+    def __init__(self, terms=(), k=3):
+        self.k = k
+        self.terms = sorted(set(terms))
+        self.postings = {}
+        for term_id, term in enumerate(self.terms):
+            for gram in self.grams(BOUNDARY + term + BOUNDARY):
+                postings = self.postings.get(gram)
+                if postings is None:
+                    postings = self.postings[gram] = array('I')
+                # Terms are visited in ID order: skip a repeated gram of the same term
+                if not postings or postings[-1] != term_id:
+                    postings.append(term_id)
+
+    def grams(self, text):
+        return {text[i:i + self.k] for i in range(len(text) - self.k + 1)}
+
+    def __len__(self):
+        return len(self.terms)
+
+    def candidates(self, pattern):
+        """
+        Term IDs that contain every k-gram of the pattern's literal pieces, or
+        None when the pattern has no piece of k characters (nothing to filter on).
+        """
+        grams = set()
+        for piece in (BOUNDARY + pattern + BOUNDARY).split('*'):
+            grams |= self.grams(piece)
+        if not grams:
+            return None
+        lists = []
+        for gram in grams:
+            postings = self.postings.get(gram)
+            if postings is None:
+                return []
+            lists.append(postings)
+        return intersect_all(lists)
+
+    def match(self, pattern):
+        """Terms matching the wildcard pattern, in sorted order."""
+        compiled = re.compile(wildcard_to_regex(pattern))
+        term_ids = self.candidates(pattern)
+        if term_ids is None:
+            # Too short for k-grams: scan the sorted range of the literal prefix
+            prefix = pattern.split('*', 1)[0]
+            lo = bisect.bisect_left(self.terms, prefix)
+            hi = bisect.bisect_left(self.terms, prefix + '\U0010ffff') if prefix else len(self.terms)
+            return [term for term in self.terms[lo:hi] if compiled.match(term)]
+        return [self.terms[term_id] for term_id in term_ids if compiled.match(self.terms[term_id])]
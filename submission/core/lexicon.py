@@ -0,0 +1,105 @@
+"""
+Term lexicon: dense integer IDs for strings (terms, tokens, words).
+
+IDs are assigned in first-seen order, 0, 1, 2, ... and never change, so a
+document or an n-gram can be held as an array('I') / tuple of small ints
+instead of one string object per occurrence; the strings themselves are
+stored once, here.
+
+With a SQLite connection the lexicon is persistent (table 'lexicon') and
+the table is the source of truth for IDs: several processes (e.g. the
+shard workers) share one lexicon through the analysis store's database.
+New strings are inserted with INSERT OR IGNORE, each taking the next ID
+inside the INSERT; the in-memory copy then reloads every row above the
+IDs it knows, which also picks up the strings other processes added. The inserts join
+the caller's transaction (the analysis store commits them together with
+the analyses that use them). Without a connection it is an in-memory
+vocabulary (e.g. of a language model).
+"""
+
+import threading
+from array import array
+
+
+class Lexicon:
+    def __init__(self, db=None):
+        self.ids = {}       # string -> ID, in ID order
+        self.terms = []     # ID -> string
+        self._db = db
+        self._lock = threading.RLock()
+        if db is not None:
+            db.execute("CREATE TABLE IF NOT EXISTS lexicon (id INTEGER PRIMARY KEY, term TEXT NOT NULL)")
+            db.execute("CREATE UNIQUE INDEX IF NOT EXISTS lexicon_term ON lexicon (term)")
+            self.refresh()
+
+    def __len__(self):
+        return len(self.terms)
+
+    def __contains__(self, term):
+        return term in self.ids
+
+    def refresh(self):
+        """Loads the table rows above the last known ID (added by other processes)."""
+        if self._db is None:
+            return
+        with self._lock:
+            rows = self._db.execute("SELECT id, term FROM lexicon WHERE id >= ? ORDER BY id", (len(self.terms),))
+            for term_id, term in rows:
+                if term_id != len(self.terms):
+                    raise ValueError(f"Lexicon table has a gap at ID {len(self.terms)}")
+                self.ids[term] = term_id
+                self.terms.append(term)
+
+    def id_of(self, term):
+        """ID of a known string, else None (does not add it)."""
+        return self.ids.get(term)
+
+    def add(self, term):
+        term_id = self.ids.get(term)
+        if term_id is None:
+            if self._db is not None:
+                self.extend([term])
+                return self.ids[term]
+            term_id = self.ids[term] = len(self.terms)
+            self.terms.append(term)
+        return term_id
+
+    def extend(self, terms):
+        """Adds every unknown string of terms (one INSERT for all of them)."""
+        new = [term for term in dict.fromkeys(terms) if term not in self.ids]
+        if not new:
+            return
+        if self._db is None:
+            for term in new:
+                self.add(term)
+            return
+        with self._lock:
+            # Another process may have added some of them meanwhile
+            self.refresh()
+            new = [term for term in new if term not in self.ids]
+            if new:
+                # The next ID is read by the INSERT itself, under the database's write lock
+                self._db.executemany("INSERT OR IGNORE INTO lexicon (id, term) "
+                                     "SELECT COALESCE(MAX(id) + 1, 0), ? FROM lexicon", [(term,) for term in new])
+                self.refresh()
+
+    def encode(self, terms):
+        """array('I') of the IDs of terms, adding the unknown ones."""
+        if self._db is not None:
+            terms = list(terms)
+            self.extend(terms)
+        ids = self.ids
+        encoded = array('I')
+        for term in terms:
+            term_id = ids.get(term)
+            if term_id is None:
+                term_id = self.add(term)
+            encoded.append(term_id)
+        return encoded
+
+    def decode(self, term_ids):
+        terms = self.terms
+        if term_ids and max(term_ids) >= len(terms):
+            # IDs assigned by another process since the last refresh
+            self.refresh()
+        return [terms[term_id] for term_id in term_ids]
@@ -3,7 +3,6 @@ import re
 import logging
 import glob
 import ntpath
-import pandas as pd
 from enum import Enum, unique
 from pathlib import Path
 
@@ -63,6 +62,8 @@ class IndoWordNet:
         self._hypernym_graph = self._build_hypernym_graph()
 
     def _load_synset_file(self, lang):
+        import pandas as pd
+        
         filename = IWN_DATA_PATH / 'synsets' / f'all.{lang}'
         if not filename.exists():
             logger.warning(f"Synset file not found: {filename}")
@@ -0,0 +1,153 @@
+"""
+Phrase and proximity queries over the positional index.
+
+Query syntax (clauses are combined with AND):
+    "नेपाल सरकार"              exact phrase
+    नेपाल NEAR/3 सरकार          both terms within 3 positions, either order
+    काठमाडौं                    plain term
+
+Evaluation works on any postings source (MemoryIndex / DiskIndex):
+1. The docID lists of every query term are intersected (rarest first),
+   without touching positions.
+2. Positions are gathered only for the surviving documents and each
+   clause is checked with a vectorized positional merge: a position is
+   encoded as (candidate index << 32 | position) so one np.intersect1d /
+   np.searchsorted pass handles every candidate document at once.
+"""
+
+import re
+
+import numpy as np
+
+from .postings import EMPTY_POSTINGS, as_postings, intersect_all
+
+_CLAUSE = re.compile(r'"([^"]+)"|(\S+)\s+NEAR/(\d+)\s+(\S+)|(\S+)')
+
+
+def parse_positional_query(query):
+    """
+    Splits a query into clauses:
+        ('phrase', text)  ('near', left, right, k)  ('term', text)
+    """
+    clauses = []
+    for phrase, left, k, right, term in _CLAUSE.findall(query):
+        if phrase:
+            clauses.append(('phrase', phrase))
+        elif left:
+            clauses.append(('near', left, right, int(k)))
+        else:
+            clauses.append(('term', term))
+    return clauses
+
+
+def _keys(doc_ids, tfs, positions, candidates):
+    """
+    Positions of the candidate documents as uint64 keys
+    (index into candidates << 32 | position), sorted.
+    """
+    doc_ids, tfs, positions = as_postings(doc_ids), as_postings(tfs), as_postings(positions)
+    rows = np.searchsorted(doc_ids, candidates)
+    offsets = np.concatenate(([0], np.cumsum(tfs, dtype=np.int64)))
+    lengths = tfs[rows].astype(np.int64)
+    starts = offsets[rows]
+    # Flat indices of each survivor's slice of the positions array
+    slice_base = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+    flat = slice_base + np.arange(lengths.sum())
+    owner = np.repeat(np.arange(candidates.size, dtype=np.uint64), lengths)
+    return (owner << np.uint64(32)) | positions[flat].astype(np.uint64)
+
+
+class PositionalQuery:
+    def __init__(self, source, analyze):
+        """
+        source: postings source with get_postings / get_positions / doc_name
+        analyze: text -> list of index terms (same pipeline as indexing)
+        """
+        self.source = source
+        self.analyze = analyze
+
+    def _analyze_clauses(self, clauses):
+        """Replaces clause text by index terms; returns None if a clause is empty."""
+        analyzed = []
+        for clause in clauses:
+            if clause[0] == 'near':
+                left, right = self.analyze(clause[1]), self.analyze(clause[2])
+                if not left or not right:
+                    return None
+                analyzed.append(('near', [left[0], right[0]], clause[3]))
+            else:
+                terms = self.analyze(clause[1])
+                if not terms:
+                    return None
+                analyzed.append(('phrase' if len(terms) > 1 else 'term', terms, 0))
+        return analyzed
+
+    def search(self, query):
+        """
+        Returns [(filename, match_count)] for documents satisfying every
+        clause, best first. match_count counts phrase occurrences / near pairs.
+        """
+        clauses = self._analyze_clauses(parse_positional_query(query))
+        if not clauses:
+            return []
+
+        # Step 1: docID intersection over every term of the query
+        terms = sorted({term for _, clause_terms, _ in clauses for term in clause_terms})
+        postings = {}
+        for term in terms:
+            entry = self.source.get_postings(term)
+            if entry is None:
+                return []
+            postings[term] = as_postings(entry[0])
+        candidates = intersect_all(postings.values())
+        if candidates.size == 0:
+            return []
+
+        # Step 2: positions, only for the surviving documents
+        positional_terms = {term for kind, clause_terms, _ in clauses if kind != 'term'
+                            for term in clause_terms}
+        keys = {term: _keys(*self.source.get_positions(term), candidates)
+                for term in positional_terms}
+
+        alive = np.ones(candidates.size, dtype=bool)
+        counts = np.zeros(candidates.size, dtype=np.int64)
+        for kind, clause_terms, k in clauses:
+            if kind == 'term':
+                continue
+            if kind == 'phrase':
+                matches = self._phrase_matches(clause_terms, keys)
+            else:
+                matches = self._near_matches(keys[clause_terms[0]], keys[clause_terms[1]], k)
+            owners = (matches >> np.uint64(32)).astype(np.int64)
+            hits = np.bincount(owners, minlength=candidates.size)
+            alive &= hits > 0
+            counts += hits
+
+        results = [(self.source.doc_name(int(doc_id)), int(count) or 1)
+                   for doc_id, count in zip(candidates[alive], counts[alive])]
+        return sorted(results, key=lambda x: x[1], reverse=True)
+
+    @staticmethod
+    def _phrase_matches(terms, keys):
+        """Keys of the first term's positions that start the whole phrase."""
+        matches = keys[terms[0]]
+        for offset, term in enumerate(terms[1:], start=1):
+            # Shift the i-th term back by i so phrase occurrences line up
+            shifted = keys[term]
+            shifted = shifted[(shifted & np.uint64(0xFFFFFFFF)) >= offset] - np.uint64(offset)
+            matches = np.intersect1d(matches, shifted, assume_unique=True)
+            if matches.size == 0:
+                break
+        return matches
+
+    @staticmethod
+    def _near_matches(left, right, k):
+        """Keys of `left` positions with a `right` position at most k away (same document)."""
+        if left.size == 0 or right.size == 0:
+            return EMPTY_POSTINGS.astype(np.uint64)
+        i = np.searchsorted(right, left)
+        left_i, right_i = left.astype(np.int64), right.astype(np.int64)
+        after = np.abs(right_i[np.minimum(i, right.size - 1)] - left_i)
+        before = np.abs(left_i - right_i[np.maximum(i - 1, 0)])
+        # Keys of different documents differ by >= 2^32 - max position, far more than k
+        return left[np.minimum(after, before) <= k]
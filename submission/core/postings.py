@@ -0,0 +1,78 @@
+"""
+Set operations over sorted docID postings.
+
+Postings are sorted uint32 arrays (array('I') or NumPy); these helpers
+return NumPy uint32 arrays and run vectorized instead of per-posting
+Python loops.
+
+Conjunctions are evaluated rarest list first. When one list is much
+shorter than the other, the intersection gallops: every docID of the
+short list is located in the long one by binary search (np.searchsorted),
+restricted to the window the short list spans. The cost is then about
+|short| * log |long| instead of |short| + |long|, so an AND of one rare
+term with very common ones costs roughly the length of the rare list.
+"""
+
+import numpy as np
+
+EMPTY_POSTINGS = np.zeros(0, dtype=np.uint32)
+
+# Gallop when the longer list is at least this many times the shorter one
+GALLOP_RATIO = 8
+
+
+def as_postings(values):
+    """Wraps a sorted docID sequence as a uint32 array (zero-copy for array('I'))."""
+    if isinstance(values, np.ndarray):
+        return values.astype(np.uint32, copy=False)
+    if hasattr(values, 'typecode') and values.typecode == 'I':
+        return np.frombuffer(values, dtype=np.uint32)
+    return np.asarray(values, dtype=np.uint32)
+
+
+def gallop_intersect(short, long):
+    """Intersection by searching each docID of `short` in `long` (both sorted)."""
+    if short.size == 0 or long.size == 0:
+        return EMPTY_POSTINGS
+    # Skip the parts of the long list outside [short[0], short[-1]]
+    lo = np.searchsorted(long, short[0], side='left')
+    hi = np.searchsorted(long, short[-1], side='right')
+    window = long[lo:hi]
+    if window.size == 0:
+        return EMPTY_POSTINGS
+    found = np.searchsorted(window, short)
+    found[found == window.size] = window.size - 1
+    return short[window[found] == short]
+
+
+def intersect(a, b):
+    a, b = as_postings(a), as_postings(b)
+    if a.size > b.size:
+        a, b = b, a
+    if a.size * GALLOP_RATIO < b.size:
+        return gallop_intersect(a, b)
+    return np.intersect1d(a, b, assume_unique=True)
+
+
+def intersect_all(postings_lists):
+    """
+    AND of any number of postings lists, processed in ascending df order
+    so every step works against the smallest intermediate result.
+    """
+    ordered = sorted((as_postings(p) for p in postings_lists), key=len)
+    if not ordered:
+        return EMPTY_POSTINGS
+    result = ordered[0]
+    for postings in ordered[1:]:
+        if result.size == 0:
+            break
+        result = intersect(result, postings)
+    return result
+
+
+def union(a, b):
+    return np.union1d(as_postings(a), as_postings(b))
+
+
+def difference(a, b):
+    return np.setdiff1d(as_postings(a), as_postings(b), assume_unique=True)
@@ -0,0 +1,140 @@
+"""
+Query result cache for the rankers.
+
+Results are keyed by (analyzed query, model, parameters), so queries that
+differ only in spacing, stopwords or inflection share an entry. The memory
+tier is an LRU of at most max_entries results; the optional disk tier is a
+SQLite table that survives restarts (bounded to max_disk_entries rows,
+least recently used dropped first).
+
+Every entry belongs to a corpus generation (Ranking.corpus_generation, a
+digest of the documents' names and texts). When the ranker's generation
+differs from the cache's - a document was uploaded, changed or deleted -
+both tiers are emptied before the lookup.
+"""
+
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+class ResultCache:
+    def __init__(self, max_entries=1024, disk_path=None, max_disk_entries=100000):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.entries = OrderedDict()    # key -> results, least recently used first
+        self.generation = None
+        self._lock = threading.Lock()
+        self._db = None
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            # Entries can always be recomputed: no need to wait for the disk on every write
+            self._db.execute("PRAGMA synchronous = OFF")
+            self._db.execute("CREATE TABLE IF NOT EXISTS results "
+                             "(key TEXT PRIMARY KEY, generation TEXT, results TEXT, used REAL)")
+            self._db.commit()
+        self.counters = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0,
+                         'hit_seconds': 0.0, 'miss_seconds': 0.0}
+
+    @staticmethod
+    def make_key(ranker, model, query, params):
+        terms = ranker.analyzer.iter_terms(query or '')
+        return json.dumps([' '.join(terms), model, sorted(params.items())], ensure_ascii=False)
+
+    def get_or_compute(self, ranker, model, query, compute, **params):
+        """
+        Cached results of compute() for query under model/params.
+        compute: called with no arguments on a miss, e.g.
+            cache.get_or_compute(ranker, 'bm25', q, lambda: ranker.compute_bm25(q, top_k=10), top_k=10)
+        """
+        start = time.perf_counter()
+        key = self.make_key(ranker, model, query, params)
+        with self._lock:
+            self._check_generation(ranker.corpus_generation)
+            results = self.entries.get(key)
+            if results is not None:
+                self.entries.move_to_end(key)
+                self.counters['hits'] += 1
+            elif self._db is not None:
+                results = self._disk_get(key)
+                if results is not None:
+                    self._remember(key, results)
+                    self.counters['disk_hits'] += 1
+            if results is not None:
+                self.counters['hit_seconds'] += time.perf_counter() - start
+                return results
+
+        results = compute()
+        with self._lock:
+            # Only keep results computed against the generation still current
+            if ranker.corpus_generation == self.generation:
+                self._remember(key, results)
+                if self._db is not None:
+                    self._disk_put(key, results)
+            self.counters['misses'] += 1
+            self.counters['miss_seconds'] += time.perf_counter() - start
+        return results
+
+    def _check_generation(self, generation):
+        if generation == self.generation:
+            return
+        if self.generation is not None:
+            self.counters['invalidations'] += 1
+        self.generation = generation
+        self.entries.clear()
+        if self._db is not None:
+            self._db.execute("DELETE FROM results WHERE generation != ?", (generation,))
+            self._db.commit()
+
+    def _remember(self, key, results):
+        self.entries[key] = results
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.counters['evictions'] += 1
+
+    def _disk_get(self, key):
+        row = self._db.execute("SELECT results FROM results WHERE key = ? AND generation = ?",
+                               (key, self.generation)).fetchone()
+        if row is None:
+            return None
+        self._db.execute("UPDATE results SET used = ? WHERE key = ?", (time.time(), key))
+        self._db.commit()
+        return [tuple(result) for result in json.loads(row[0])]
+
+    def _disk_put(self, key, results):
+        self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                         (key, self.generation, json.dumps(results, ensure_ascii=False), time.time()))
+        self._db.execute("DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                         (self.max_disk_entries,))
+        self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+            hits = counters['hits'] + counters['disk_hits']
+            lookups = hits + counters['misses']
+            disk_entries = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0] if self._db is not None else None
+        return {
+            'entries': len(self.entries),
+            'disk_entries': disk_entries,
+            'generation': self.generation,
+            'lookups': lookups,
+            'hits': counters['hits'],
+            'disk_hits': counters['disk_hits'],
+            'misses': counters['misses'],
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'evictions': counters['evictions'],
+            'invalidations': counters['invalidations'],
+            'avg_hit_ms': 1000 * counters['hit_seconds'] / hits if hits else 0.0,
+            'avg_miss_ms': 1000 * counters['miss_seconds'] / counters['misses'] if counters['misses'] else 0.0,
+        }
@@ -1,54 +1,78 @@
 
 import os
-import difflib
+import sys
+import unicodedata
+from collections import Counter
 from pathlib import Path
 
+try:
+    from .suggestion_index import SuggestionIndex
+except ImportError:
+    # Running as a standalone script
+    sys.path.insert(0, os.path.dirname(__file__))
+    from suggestion_index import SuggestionIndex
+
+
+def clean_word(token):
+    """Strips punctuation; keeps letters, digits and combining marks (matras, halant)."""
+    return "".join(c for c in token if c.isalnum() or unicodedata.category(c)[0] == 'M')
+
+
 class SimpleSpellChecker:
     """
     A simple dictionary-based spell checker using the corpus vocabulary.
     Falls back to this since Hunspell dictionaries (ne_NP) were not found.
     """
-    def __init__(self, data_dir=None):
-        self.words = set()
+    def __init__(self, data_dir=None, texts=(), index=None):
+        """
+        texts: extra documents whose words (and their frequencies) are added to
+        the dictionary, e.g. the search corpus
+        index: a shared SuggestionIndex to use as the dictionary (e.g.
+        Indexing.suggestion_index) instead of building one from data_dir and texts
+        """
+        self.counts = Counter()
         if data_dir is None:
             # Default to submission/data
             base = Path(__file__).resolve().parent.parent
             data_dir = base / 'data'
         
         self.data_dir = Path(data_dir)
-        self._load_dictionary()
+        if index is None:
+            self._load_dictionary(texts)
+            # Suggestions are ranked by edit distance, then by corpus frequency
+            index = SuggestionIndex(self.counts)
+        self.index = index
+        self.words = self.index
+
+    def _count_words(self, text):
+        for t in text.split():
+            clean_t = clean_word(t)
+            if clean_t:
+                self.counts[clean_t] += 1
 
-    def _load_dictionary(self):
+    def _load_dictionary(self, texts=()):
         # Load words from corpus
         corpus_path = self.data_dir / 'nepali_corpus.txt'
         if corpus_path.exists():
             with open(corpus_path, 'r', encoding='utf-8') as f:
                 for line in f:
-                    # Simple tokenization
-                    tokens = line.strip().split()
-                    for t in tokens:
-                        # Clean punctuation
-                        clean_t = "".join(c for c in t if c.isalnum())
-                        if clean_t:
-                            self.words.add(clean_t)
+                    self._count_words(line)
         
-        # Load words from POS dictionary if available
-        pos_path = self.data_dir / 'id_pos_dict.json'
-        # Or nepali_pos_dict.txt
-        # (Skipping JSON loading to check txt for simplicity or just stick to corpus)
+        for text in texts:
+            self._count_words(text)
         
-        print(f"Loaded {len(self.words)} words into spell checker dictionary.")
+        print(f"Loaded {len(self.counts)} words into spell checker dictionary.")
 
     def check(self, word):
         """Check if word is in dictionary."""
         return word in self.words
 
-    def suggest(self, word, n=5, cutoff=0.6):
-        """Suggest corrections for a word."""
+    def suggest(self, word, n=5, max_distance=2):
+        """Suggest corrections for a word (closest first, then most frequent)."""
         if self.check(word):
             return [word]
         
-        return difflib.get_close_matches(word, self.words, n=n, cutoff=cutoff)
+        return self.index.suggest(word, n, max_distance)
 
 if __name__ == "__main__":
     checker = SimpleSpellChecker()
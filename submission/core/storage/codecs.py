@@ -0,0 +1,262 @@
+"""
+Integer compression codecs for postings.
+
+Every codec exposes the same interface:
+    encode(values) / decode(data, count)                - arbitrary non-negative ints (tfs, gaps)
+    encode_sorted(values) / decode_sorted(data, count)  - non-decreasing ints (docIDs)
+
+Gap-based codecs (VByte, Simple-8b, PForDelta) turn sorted lists into gaps
+before encoding; Elias-Fano works on the monotone sequence directly and
+handles arbitrary lists through their prefix sums. Decoders return NumPy
+uint32 arrays and do their work in vectorized passes over whole blocks.
+"""
+
+import struct
+import numpy as np
+
+
+def to_gaps(values):
+    values = np.asarray(values, dtype=np.int64)
+    if values.size == 0:
+        return values.astype(np.uint64)
+    return np.diff(values, prepend=0).astype(np.uint64)
+
+
+def from_gaps(gaps):
+    return np.cumsum(gaps, dtype=np.uint64).astype(np.uint32)
+
+
+def pack_bits(values, width):
+    """Packs each value into `width` bits, least significant bit first."""
+    values = np.asarray(values, dtype=np.uint64)
+    if width == 0 or values.size == 0:
+        return b''
+    shifts = np.arange(width, dtype=np.uint64)
+    bits = ((values[:, None] >> shifts) & np.uint64(1)).astype(np.uint8)
+    return np.packbits(bits.ravel(), bitorder='little').tobytes()
+
+
+def unpack_bits(data, count, width):
+    if width == 0 or count == 0:
+        return np.zeros(count, dtype=np.uint64)
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8), bitorder='little')
+    bits = bits[:count * width].reshape(count, width).astype(np.uint64)
+    return (bits << np.arange(width, dtype=np.uint64)).sum(axis=1, dtype=np.uint64)
+
+
+def packed_size(count, width):
+    return (count * width + 7) // 8
+
+
+class Codec:
+    name = None
+
+    def encode(self, values):
+        raise NotImplementedError
+
+    def decode(self, data, count):
+        raise NotImplementedError
+
+    def encode_sorted(self, values):
+        return self.encode(to_gaps(values))
+
+    def decode_sorted(self, data, count):
+        return from_gaps(self.decode(data, count))
+
+
+class RawCodec(Codec):
+    """Uncompressed uint32, the baseline (and zero-copy on decode)."""
+    name = 'raw'
+
+    def encode(self, values):
+        return np.asarray(values, dtype=np.uint32).tobytes()
+
+    def decode(self, data, count):
+        return np.frombuffer(data, dtype=np.uint32, count=count)
+
+    def encode_sorted(self, values):
+        return self.encode(values)
+
+    def decode_sorted(self, data, count):
+        return self.decode(data, count)
+
+
+class VByteCodec(Codec):
+    """
+    Variable Byte: 7 payload bits per byte, most significant group first,
+    high bit set on the last byte of each number (same convention as
+    Indexing.variable_byte_encode).
+    """
+    name = 'vbyte'
+
+    def encode(self, values):
+        out = bytearray()
+        for number in np.asarray(values, dtype=np.uint64).tolist():
+            groups = [number & 0x7F]
+            number >>= 7
+            while number:
+                groups.append(number & 0x7F)
+                number >>= 7
+            groups[0] |= 0x80
+            out.extend(reversed(groups))
+        return bytes(out)
+
+    def decode(self, data, count):
+        raw = np.frombuffer(data, dtype=np.uint8)
+        ends = np.flatnonzero(raw & 0x80)[:count]
+        if ends.size == 0:
+            return np.zeros(0, dtype=np.uint32)
+        raw = raw[:ends[-1] + 1]
+        starts = np.concatenate(([0], ends[:-1] + 1))
+        # Shift of each byte = 7 * (bytes remaining until the end of its number)
+        group_end = np.repeat(ends, np.diff(np.concatenate(([0], ends + 1))))
+        shifts = ((group_end - np.arange(raw.size)) * 7).astype(np.uint64)
+        payload = (raw & 0x7F).astype(np.uint64) << shifts
+        return np.add.reduceat(payload, starts).astype(np.uint32)
+
+
+class Simple8bCodec(Codec):
+    """
+    Simple-8b: each 64-bit word holds a 4-bit selector and 60 payload bits
+    split into `n` equal slots of `b` bits.
+    """
+    name = 'simple8b'
+
+    # selector -> (values per word, bits per value)
+    SELECTORS = [(240, 0), (120, 0), (60, 1), (30, 2), (20, 3), (15, 4), (12, 5), (10, 6),
+                 (8, 7), (7, 8), (6, 10), (5, 12), (4, 15), (3, 20), (2, 30), (1, 60)]
+
+    def encode(self, values):
+        values = np.asarray(values, dtype=np.uint64).tolist()
+        words = []
+        i, total = 0, len(values)
+        while i < total:
+            for selector, (n, b) in enumerate(self.SELECTORS):
+                if n > total - i:
+                    continue
+                limit = 1 << b
+                chunk = values[i:i + n]
+                if max(chunk) < limit:
+                    word = selector << 60
+                    for slot, value in enumerate(chunk):
+                        word |= value << (slot * b)
+                    words.append(word)
+                    i += n
+                    break
+            else:
+                raise ValueError(f"Value too large for Simple-8b: {values[i]}")
+        return np.array(words, dtype=np.uint64).tobytes()
+
+    def decode(self, data, count):
+        words = np.frombuffer(data, dtype=np.uint64)
+        selectors = (words >> np.uint64(60)).astype(np.intp)
+        counts = np.array([n for n, _ in self.SELECTORS])[selectors]
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        out = np.zeros(int(counts.sum()), dtype=np.uint64)
+
+        # One vectorized pass per selector present in the buffer
+        for selector in np.unique(selectors):
+            n, b = self.SELECTORS[selector]
+            if b == 0:
+                continue  # runs of zeros, already in place
+            rows = np.flatnonzero(selectors == selector)
+            shifts = np.arange(n, dtype=np.uint64) * np.uint64(b)
+            mask = np.uint64((1 << b) - 1)
+            slots = (words[rows][:, None] >> shifts) & mask
+            out[(offsets[rows][:, None] + np.arange(n)).ravel()] = slots.ravel()
+        return out[:count].astype(np.uint32)
+
+
+class PForDeltaCodec(Codec):
+    """
+    Patched Frame-of-Reference: blocks of 128 values are bit-packed at the
+    width that fits ~90% of them; the rest are stored as patched exceptions.
+    Block layout: <count:u8><width:u8><n_exceptions:u8><packed bits>
+                  <exception positions:u8 * n><exception values:u32 * n>
+    """
+    name = 'pfordelta'
+    BLOCK = 128
+    _HEAD = struct.Struct('<BBB')
+
+    def encode(self, values):
+        values = np.asarray(values, dtype=np.uint64)
+        out = bytearray()
+        for start in range(0, values.size, self.BLOCK):
+            block = values[start:start + self.BLOCK]
+            bit_lengths = np.array([int(v).bit_length() for v in block.tolist()])
+            width = int(np.percentile(bit_lengths, 90, method='higher'))
+            exceptions = np.flatnonzero(bit_lengths > width)
+            out.extend(self._HEAD.pack(block.size - 1, width, exceptions.size))
+            out.extend(pack_bits(block & np.uint64((1 << width) - 1), width))
+            out.extend(exceptions.astype(np.uint8).tobytes())
+            out.extend(block[exceptions].astype(np.uint32).tobytes())
+        return bytes(out)
+
+    def decode(self, data, count):
+        out = np.empty(count, dtype=np.uint32)
+        pos, filled = 0, 0
+        while filled < count:
+            n, width, n_exc = self._HEAD.unpack_from(data, pos)
+            n += 1
+            pos += self._HEAD.size
+            size = packed_size(n, width)
+            block = unpack_bits(data[pos:pos + size], n, width).astype(np.uint32)
+            pos += size
+            if n_exc:
+                where = np.frombuffer(data, dtype=np.uint8, count=n_exc, offset=pos)
+                pos += n_exc
+                block[where] = np.frombuffer(data, dtype=np.uint32, count=n_exc, offset=pos)
+                pos += 4 * n_exc
+            out[filled:filled + n] = block
+            filled += n
+        return out
+
+
+class EliasFanoCodec(Codec):
+    """
+    Elias-Fano for monotone sequences: the low L bits of each value are
+    stored verbatim, the high parts as a unary-coded bit vector.
+    Layout: <L:u8><low bits><high bits>
+    """
+    name = 'eliasfano'
+
+    def encode_sorted(self, values):
+        values = np.asarray(values, dtype=np.uint64)
+        n = values.size
+        if n == 0:
+            return b''
+        universe = int(values[-1]) + 1
+        low_width = max(0, (universe // n).bit_length() - 1)
+        highs = (values >> np.uint64(low_width)).astype(np.int64)
+        high_bits = np.zeros(int(highs[-1]) + n, dtype=np.uint8)
+        high_bits[highs + np.arange(n)] = 1
+        return (bytes([low_width])
+                + pack_bits(values & np.uint64((1 << low_width) - 1), low_width)
+                + np.packbits(high_bits, bitorder='little').tobytes())
+
+    def decode_sorted(self, data, count):
+        if count == 0:
+            return np.zeros(0, dtype=np.uint32)
+        low_width = data[0]
+        size = packed_size(count, low_width)
+        lows = unpack_bits(data[1:1 + size], count, low_width)
+        high_bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8, offset=1 + size), bitorder='little')
+        highs = (np.flatnonzero(high_bits)[:count] - np.arange(count)).astype(np.uint64)
+        return ((highs << np.uint64(low_width)) | lows).astype(np.uint32)
+
+    def encode(self, values):
+        return self.encode_sorted(np.cumsum(np.asarray(values, dtype=np.uint64)))
+
+    def decode(self, data, count):
+        return np.diff(self.decode_sorted(data, count).astype(np.int64), prepend=0).astype(np.uint32)
+
+
+CODECS = {codec.name: codec for codec in
+          (RawCodec(), VByteCodec(), Simple8bCodec(), PForDeltaCodec(), EliasFanoCodec())}
+
+
+def get_codec(name):
+    try:
+        return CODECS[name]
+    except KeyError:
+        raise ValueError(f"Unknown codec '{name}'. Available: {', '.join(CODECS)}")
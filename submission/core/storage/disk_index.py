@@ -0,0 +1,286 @@
+"""
+Persistent on-disk inverted index.
+
+Layout of an index directory:
+    manifest.json  - format version, byte order, corpus signature, build stats
+    doctable.bin   - docID -> filename and indexed length
+    lexicon.bin    - per-term df, cf and offsets into the postings files, followed by the
+                     front-coded sorted term dictionary (storage/front_coding.py)
+    postings.bin   - per term: docIDs, gap-encoded with the index codec
+    freqs.bin      - per term: term frequency of every posting
+    positions.bin  - per term: positions of every posting, gaps restarting at each document
+
+All binary files are opened with mmap, so a reader only touches the pages it
+actually needs; postings are decoded per term with the codec named in the
+manifest (see storage/codecs.py).
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+from array import array
+
+import numpy as np
+
+from ..doc_table import DocTable
+from .codecs import get_codec
+from .front_coding import FrontCodedDictionary
+
+FORMAT_VERSION = 3
+DEFAULT_CODEC = 'vbyte'
+
+_HEADER = struct.Struct('<4sI')  # magic, entry count
+_DOC_MAGIC = b'NDOC'
+_LEX_MAGIC = b'NLEX'
+
+
+def _padding(offset, width):
+    return (-offset) % width
+
+
+def _map_file(path):
+    """mmap a file read-only; empty files get an empty buffer (mmap rejects size 0)."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _read_section(view, offset, typecode, count):
+    """Returns a zero-copy typed view of `count` items starting at `offset`."""
+    width = array(typecode).itemsize
+    offset += _padding(offset, width)
+    end = offset + width * count
+    return view[offset:end].cast(typecode), end
+
+
+def corpus_signature(doc_dir):
+    """
+    Cheap fingerprint of the document directory (file count + directory mtime).
+    Adding, deleting or renaming a file changes it; in-place edits do not.
+    """
+    if not os.path.exists(doc_dir):
+        return [0, 0]
+    count = sum(1 for name in os.listdir(doc_dir) if name.endswith('.txt'))
+    return [count, os.stat(doc_dir).st_mtime_ns]
+
+
+class DiskIndexWriter:
+    """
+    Streams an index to disk. Documents are registered first (their order
+    defines the docIDs), then terms must be added in sorted order.
+    """
+
+    def __init__(self, index_dir, codec=DEFAULT_CODEC):
+        self.index_dir = index_dir
+        self.codec = get_codec(codec)
+        os.makedirs(index_dir, exist_ok=True)
+        # Until close() writes a new manifest the directory must not look complete
+        manifest_path = os.path.join(index_dir, 'manifest.json')
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+
+        self.doc_names = []
+        self.doc_lengths = array('I')
+
+        self.dictionary = FrontCodedDictionary()
+        self.dfs = array('I')
+        self.cfs = array('I')
+        self.post_offsets = array('Q', [0])
+        self.freq_offsets = array('Q', [0])
+        self.pos_offsets = array('Q', [0])
+
+        self._postings = open(os.path.join(index_dir, 'postings.bin'), 'wb')
+        self._freqs = open(os.path.join(index_dir, 'freqs.bin'), 'wb')
+        self._positions = open(os.path.join(index_dir, 'positions.bin'), 'wb')
+
+    def add_document(self, name, length):
+        self.doc_names.append(name)
+        self.doc_lengths.append(length)
+        return len(self.doc_names) - 1
+
+    def add_term(self, term, doc_ids, tfs, positions):
+        """
+        doc_ids: ascending docIDs containing the term
+        tfs: term frequency per docID
+        positions: flat positions, tfs[i] entries per document
+        """
+        tfs = np.asarray(tfs, dtype=np.int64)
+        positions = np.asarray(positions, dtype=np.int64)
+
+        # Position gaps restart at every document boundary
+        gaps = np.diff(positions, prepend=0)
+        if tfs.size:
+            doc_starts = np.concatenate(([0], np.cumsum(tfs)[:-1]))
+            doc_starts = doc_starts[doc_starts < positions.size]
+            gaps[doc_starts] = positions[doc_starts]
+
+        self._postings.write(self.codec.encode_sorted(doc_ids))
+        self._freqs.write(self.codec.encode(tfs))
+        self._positions.write(self.codec.encode(gaps))
+
+        self.dictionary.append(term)
+        self.dfs.append(len(tfs))
+        self.cfs.append(positions.size)
+        self.post_offsets.append(self._postings.tell())
+        self.freq_offsets.append(self._freqs.tell())
+        self.pos_offsets.append(self._positions.tell())
+
+    def _write_table(self, path, magic, count, sections, blob):
+        with open(path, 'wb') as f:
+            f.write(_HEADER.pack(magic, count))
+            for section in sections:
+                f.write(b'\0' * _padding(f.tell(), section.itemsize))
+                f.write(section.tobytes())
+            f.write(b'\0' * _padding(f.tell(), 8))
+            f.write(blob)
+
+    def close(self, **stats):
+        self._postings.close()
+        self._freqs.close()
+        self._positions.close()
+
+        name_blob = bytearray()
+        name_offsets = array('I', [0])
+        for name in self.doc_names:
+            name_blob.extend(name.encode('utf-8'))
+            name_offsets.append(len(name_blob))
+
+        self._write_table(os.path.join(self.index_dir, 'doctable.bin'), _DOC_MAGIC,
+                          len(self.doc_names), [name_offsets, self.doc_lengths], name_blob)
+        self._write_table(os.path.join(self.index_dir, 'lexicon.bin'), _LEX_MAGIC,
+                          len(self.dfs),
+                          [self.dfs, self.cfs, self.post_offsets, self.freq_offsets, self.pos_offsets],
+                          self.dictionary.to_bytes())
+
+        manifest = {
+            'format': FORMAT_VERSION,
+            'byteorder': sys.byteorder,
+            'codec': self.codec.name,
+            'doc_count': len(self.doc_names),
+            'vocab_size': len(self.dfs),
+        }
+        manifest.update(stats)
+        # Manifest goes last: its presence marks the index as complete
+        with open(os.path.join(self.index_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        return manifest
+
+
+class DiskIndex:
+    """Read-only, mmap-backed view of an index written by DiskIndexWriter."""
+
+    def __init__(self, index_dir):
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, 'manifest.json'), 'r', encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('format') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported index format: {self.manifest.get('format')}")
+        if self.manifest.get('byteorder') != sys.byteorder:
+            raise ValueError("Index was written on a machine with a different byte order")
+        self.codec = get_codec(self.manifest['codec'])
+
+        self._maps = [_map_file(os.path.join(index_dir, name))
+                      for name in ('doctable.bin', 'lexicon.bin', 'postings.bin', 'freqs.bin', 'positions.bin')]
+        doctable, lexicon, postings, freqs, positions = (memoryview(m) for m in self._maps)
+
+        magic, self.num_docs = _HEADER.unpack_from(doctable, 0)
+        if magic != _DOC_MAGIC:
+            raise ValueError("Corrupt doc table")
+        offset = _HEADER.size
+        self._name_offsets, offset = _read_section(doctable, offset, 'I', self.num_docs + 1)
+        self.doc_lengths, offset = _read_section(doctable, offset, 'I', self.num_docs)
+        self._names = doctable[offset + _padding(offset, 8):]
+
+        magic, self.vocab_size = _HEADER.unpack_from(lexicon, 0)
+        if magic != _LEX_MAGIC:
+            raise ValueError("Corrupt lexicon")
+        offset = _HEADER.size
+        self.dfs, offset = _read_section(lexicon, offset, 'I', self.vocab_size)
+        self.cfs, offset = _read_section(lexicon, offset, 'I', self.vocab_size)
+        self._post_offsets, offset = _read_section(lexicon, offset, 'Q', self.vocab_size + 1)
+        self._freq_offsets, offset = _read_section(lexicon, offset, 'Q', self.vocab_size + 1)
+        self._pos_offsets, offset = _read_section(lexicon, offset, 'Q', self.vocab_size + 1)
+        self.dictionary = FrontCodedDictionary.from_buffer(lexicon[offset + _padding(offset, 8):])
+
+        self._postings = postings
+        self._freqs = freqs
+        self._positions = positions
+        self._doc_table = None
+
+    # --- Doc table ---
+    def doc_name(self, doc_id):
+        return bytes(self._names[self._name_offsets[doc_id]:self._name_offsets[doc_id + 1]]).decode('utf-8')
+
+    @property
+    def doc_table(self):
+        """DocTable with the same docIDs, built lazily on first use."""
+        if self._doc_table is None:
+            self._doc_table = DocTable(self.doc_name(i) for i in range(self.num_docs))
+        return self._doc_table
+
+    # --- Term dictionary (term ID == rank in sorted order) ---
+    def term(self, term_id):
+        return self.dictionary[term_id]
+
+    def terms(self):
+        return iter(self.dictionary)
+
+    def term_id(self, term):
+        return self.dictionary.find(term)
+
+    def collection_frequencies(self):
+        """Yields (term, total occurrences) in term order."""
+        return zip(self.dictionary, self.cfs)
+
+    # --- Postings ---
+    def doc_ids(self, term_id):
+        """Decodes just the docIDs of a term (uint32 array)."""
+        start, end = self._post_offsets[term_id], self._post_offsets[term_id + 1]
+        return self.codec.decode_sorted(self._postings[start:end], self.dfs[term_id])
+
+    def postings(self, term_id):
+        """Returns (doc_ids, tfs) as uint32 arrays."""
+        start, end = self._freq_offsets[term_id], self._freq_offsets[term_id + 1]
+        return self.doc_ids(term_id), self.codec.decode(self._freqs[start:end], self.dfs[term_id])
+
+    def positions(self, term_id, tfs=None):
+        """Flat positions for the term; document i owns tfs[i] consecutive entries."""
+        if tfs is None:
+            _, tfs = self.postings(term_id)
+        start, end = self._pos_offsets[term_id], self._pos_offsets[term_id + 1]
+        gaps = self.codec.decode(self._positions[start:end], self.cfs[term_id])
+        running = np.cumsum(gaps, dtype=np.int64)
+        # Undo the per-document restart: subtract the running total at each doc start
+        doc_base = np.concatenate(([0], running[np.cumsum(tfs)[:-1].astype(np.int64) - 1]))
+        return (running - np.repeat(doc_base, tfs)).astype(np.uint32)
+
+    # --- Postings source interface (shared with MemoryIndex) ---
+    def get_postings(self, term):
+        term_id = self.term_id(term)
+        return None if term_id < 0 else self.postings(term_id)
+
+    def get_positions(self, term):
+        term_id = self.term_id(term)
+        if term_id < 0:
+            return None
+        doc_ids, tfs = self.postings(term_id)
+        return doc_ids, tfs, self.positions(term_id, tfs)
+
+    def close(self):
+        """Unmaps the files. Views previously handed out must not be used afterwards."""
+        for name in ('_name_offsets', 'doc_lengths', '_names', 'dfs', 'cfs', '_post_offsets',
+                     '_freq_offsets', '_pos_offsets', '_postings', '_freqs', '_positions'):
+            getattr(self, name).release()
+        self.dictionary.block_offsets.release()
+        self.dictionary.blob.release()
+        for m in self._maps:
+            if isinstance(m, mmap.mmap):
+                try:
+                    m.close()
+                except BufferError:
+                    # A caller still holds a slice; the map is freed once it is collected
+                    pass
+        self._maps = []
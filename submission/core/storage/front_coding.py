@@ -0,0 +1,189 @@
+"""
+Blocked front-coded term dictionary.
+
+Terms are sorted (UTF-8 byte order) and grouped into blocks of `block_size`.
+The first term of a block is stored in full; every following term stores
+only the length of the prefix it shares with its predecessor plus the
+remaining suffix:
+
+    entry := <shared:varint><suffix_len:varint><suffix bytes>
+
+Nepali inflections share long prefixes (नेपाल/नेपाली/नेपालमा/नेपालको), so
+most entries shrink to a couple of suffix characters. Exact lookup and
+prefix ranges binary-search the block heads, then decode one block.
+"""
+
+import struct
+from array import array
+
+_HEADER = struct.Struct('<4sIII')  # magic, term count, block size, block count
+_MAGIC = b'NFCD'
+# 0xFF never occurs in UTF-8, so prefix + 0xFF sorts after every term starting with prefix
+_PREFIX_END = b'\xff'
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(buf, pos):
+    value, shift = 0, 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def _shared_prefix(a, b):
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+class FrontCodedDictionary:
+    def __init__(self, terms=(), block_size=16):
+        """Builds the dictionary from any iterable of terms (sorted and de-duplicated here)."""
+        self.block_size = block_size
+        self.count = 0
+        self.block_offsets = array('I')
+        self.blob = bytearray()
+        self._last = None
+        for term in sorted(set(terms)):
+            self.append(term)
+
+    def append(self, term):
+        """Adds a term that sorts after every term added so far (streaming construction)."""
+        key = term.encode('utf-8')
+        if self._last is not None and key <= self._last:
+            raise ValueError(f"Terms must be appended in sorted order ({term!r})")
+        if self.count % self.block_size == 0:
+            self.block_offsets.append(len(self.blob))
+            shared = 0
+        else:
+            shared = _shared_prefix(self._last, key)
+        _write_varint(self.blob, shared)
+        _write_varint(self.blob, len(key) - shared)
+        self.blob.extend(key[shared:])
+        self._last = key
+        self.count += 1
+
+    # --- Serialization ---
+    def to_bytes(self):
+        return (_HEADER.pack(_MAGIC, self.count, self.block_size, len(self.block_offsets))
+                + self.block_offsets.tobytes() + bytes(self.blob))
+
+    @classmethod
+    def from_buffer(cls, buf):
+        """Wraps a serialized dictionary without copying it (buf may be an mmap'd memoryview)."""
+        buf = memoryview(buf)
+        magic, count, block_size, n_blocks = _HEADER.unpack_from(buf, 0)
+        if magic != _MAGIC:
+            raise ValueError("Not a front-coded dictionary")
+        self = cls.__new__(cls)
+        self.block_size = block_size
+        self.count = count
+        start = _HEADER.size
+        self.block_offsets = buf[start:start + 4 * n_blocks].cast('I')
+        self.blob = buf[start + 4 * n_blocks:]
+        self._last = None
+        return self
+
+    @property
+    def nbytes(self):
+        return _HEADER.size + 4 * len(self.block_offsets) + len(self.blob)
+
+    # --- Decoding ---
+    def _iter_block(self, block, start=0):
+        """Yields the terms (as bytes) of one block."""
+        pos = self.block_offsets[block]
+        n = min(self.block_size, self.count - block * self.block_size)
+        prev = b''
+        for i in range(n):
+            shared, pos = _read_varint(self.blob, pos)
+            length, pos = _read_varint(self.blob, pos)
+            prev = prev[:shared] + bytes(self.blob[pos:pos + length])
+            pos += length
+            if i >= start:
+                yield prev
+
+    def _block_head(self, block):
+        pos = self.block_offsets[block]
+        _, pos = _read_varint(self.blob, pos)
+        length, pos = _read_varint(self.blob, pos)
+        return bytes(self.blob[pos:pos + length])
+
+    def _lower_bound(self, key):
+        """Rank of the first term >= key."""
+        lo, hi = 0, len(self.block_offsets)
+        # Last block whose head is <= key
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._block_head(mid) <= key:
+                lo = mid + 1
+            else:
+                hi = mid
+        block = lo - 1
+        if block < 0:
+            return 0
+        rank = block * self.block_size
+        for term in self._iter_block(block):
+            if term >= key:
+                return rank
+            rank += 1
+        return rank
+
+    def term_bytes(self, rank):
+        block, offset = divmod(rank, self.block_size)
+        for term in self._iter_block(block, offset):
+            return term
+
+    # --- Public API ---
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, rank):
+        if not 0 <= rank < self.count:
+            raise IndexError(rank)
+        return self.term_bytes(rank).decode('utf-8')
+
+    def __iter__(self):
+        return self.iter_range(0, self.count)
+
+    def __contains__(self, term):
+        return self.find(term) >= 0
+
+    def find(self, term):
+        """Rank (term ID) of an exact term, or -1."""
+        key = term.encode('utf-8')
+        rank = self._lower_bound(key)
+        if rank < self.count and self.term_bytes(rank) == key:
+            return rank
+        return -1
+
+    def prefix_range(self, prefix):
+        """Half-open rank range [lo, hi) of the terms starting with prefix. O(log V)."""
+        key = prefix.encode('utf-8')
+        return self._lower_bound(key), self._lower_bound(key + _PREFIX_END)
+
+    def iter_range(self, lo, hi):
+        """Yields the terms with rank in [lo, hi), decoding each block once."""
+        rank = lo
+        while rank < hi:
+            block, offset = divmod(rank, self.block_size)
+            for term in self._iter_block(block, offset):
+                if rank >= hi:
+                    return
+                yield term.decode('utf-8')
+                rank += 1
+
+    def iter_prefix(self, prefix):
+        """Terms starting with prefix, in sorted order. O(log V + k)."""
+        return self.iter_range(*self.prefix_range(prefix))
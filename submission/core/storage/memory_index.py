@@ -0,0 +1,138 @@
+"""
+Mutable in-memory postings keyed by integer docIDs.
+
+Each term maps to three parallel uint32 arrays: docIDs (ascending), term
+frequencies and flat positions (tfs[i] entries per document). Because new
+documents always receive the largest docID, adding a document is a pure
+append; removing one deletes its slot from each of its terms' arrays.
+"""
+
+import bisect
+from array import array
+
+import numpy as np
+
+from ..doc_table import DocTable
+
+
+class MemoryIndex:
+    def __init__(self, doc_table=None):
+        self.doc_table = doc_table if doc_table is not None else DocTable()
+        self.postings = {}
+        self.doc_lengths = array('I', [0] * self.doc_table.capacity)
+        self.total_tokens = 0
+        self.vocab_version = 0   # bumped whenever a term appears or disappears
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """Wraps the merged output of distributed.parallel_indexer.analyze_corpus."""
+        index = cls(DocTable(corpus.doc_names))
+        index.postings = corpus.postings
+        index.doc_lengths = array('I', corpus.term_counts)
+        index.total_tokens = sum(corpus.term_counts)
+        return index
+
+    @classmethod
+    def from_disk(cls, disk):
+        """Decodes a DiskIndex into mutable arrays (same docIDs)."""
+        index = cls(DocTable(disk.doc_name(doc_id) for doc_id in range(disk.num_docs)))
+        for term_id, term in enumerate(disk.terms()):
+            doc_ids, tfs = disk.postings(term_id)
+            positions = disk.positions(term_id, tfs)
+            index.postings[term] = [array('I', doc_ids.astype(np.uint32).tobytes()),
+                                    array('I', tfs.astype(np.uint32).tobytes()),
+                                    array('I', positions.astype(np.uint32).tobytes())]
+        index.doc_lengths = array('I', disk.doc_lengths)
+        index.total_tokens = sum(index.doc_lengths)
+        return index
+
+    # --- Postings source interface (shared with DiskIndex) ---
+    @property
+    def num_docs(self):
+        return len(self.doc_table)
+
+    @property
+    def vocab_size(self):
+        return len(self.postings)
+
+    def terms(self):
+        return self.postings.keys()
+
+    def collection_frequencies(self):
+        """Yields (term, total occurrences)."""
+        return ((term, len(entry[2])) for term, entry in self.postings.items())
+
+    def doc_name(self, doc_id):
+        return self.doc_table.name_of(doc_id)
+
+    def __contains__(self, name):
+        return name in self.doc_table
+
+    def get_postings(self, term):
+        entry = self.postings.get(term)
+        return None if entry is None else (entry[0], entry[1])
+
+    def get_positions(self, term):
+        entry = self.postings.get(term)
+        return None if entry is None else tuple(entry)
+
+    # --- Updates ---
+    def add_document(self, name, terms):
+        """Appends one analyzed document and returns its docID."""
+        doc_id = self.doc_table.add(name)
+        while len(self.doc_lengths) <= doc_id:
+            self.doc_lengths.append(0)
+        self.doc_lengths[doc_id] = len(terms)
+        self.total_tokens += len(terms)
+
+        doc_positions = {}
+        for pos, term in enumerate(terms):
+            doc_positions.setdefault(term, []).append(pos)
+
+        for term, positions in doc_positions.items():
+            entry = self.postings.get(term)
+            if entry is None:
+                entry = self.postings[term] = [array('I'), array('I'), array('I')]
+                self.vocab_version += 1
+            entry[0].append(doc_id)
+            entry[1].append(len(positions))
+            entry[2].extend(positions)
+        return doc_id
+
+    def remove_document(self, name, terms=None):
+        """
+        Deletes a document's postings. `terms` (the analyzed terms of the
+        indexed text) limits the work to those postings; without it every
+        term is checked.
+
+        Cost: O(df) per term of the document, not O(document length). Finding
+        the slot is a binary search, but its positions offset (a sum of the
+        tfs before it) and the deletions, which shift the rest of the arrays,
+        are linear in the postings; both run in C (numpy sum, array memmove).
+        A cumulative offset array would not lower this, as it would need the
+        same shift on every removal.
+        """
+        doc_id = self.doc_table.id_of(name)
+        if doc_id is None:
+            return False
+
+        for term in (set(terms) if terms is not None else list(self.postings)):
+            entry = self.postings.get(term)
+            if entry is None:
+                continue
+            doc_ids, tfs, positions = entry
+            i = bisect.bisect_left(doc_ids, doc_id)
+            if i == len(doc_ids) or doc_ids[i] != doc_id:
+                continue
+            start = int(np.frombuffer(tfs, dtype=np.uint32)[:i].sum(dtype=np.uint64)) if i else 0
+            del positions[start:start + tfs[i]]
+            del doc_ids[i]
+            del tfs[i]
+            if not doc_ids:
+                del self.postings[term]
+                self.vocab_version += 1
+
+        self.total_tokens -= self.doc_lengths[doc_id]
+        self.doc_lengths[doc_id] = 0
+        self.doc_table.remove(name)
+        return True
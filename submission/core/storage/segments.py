@@ -0,0 +1,586 @@
+"""
+Segment-based index: a growing collection of immutable on-disk segments.
+
+Layout of an index directory:
+    segments.json   - commit point: live segment names, corpus signature, stats
+    seg_000000/     - one DiskIndex per segment (storage/disk_index.py)
+        deletes.bin - tombstone bitmap (one bit per local docID), rewritten on commit
+
+New documents go into an in-memory buffer (a MemoryIndex) that is written
+out as a fresh small segment on commit(). Segments are never modified;
+deleting or replacing a document only sets its tombstone bit. A tiered
+merge policy running on a background thread compacts segments of similar
+size into one bigger segment and drops tombstoned documents, so each
+document is rewritten about log_{merge_factor}(N) times and the number
+of segments a query has to visit stays logarithmic in the corpus size.
+
+Queries fan out over the segments. Every reader gets a base docID (the
+document count of the readers before it), so the postings source
+interface (get_postings / get_positions / doc_name) works on global
+docIDs and concatenating per-segment postings keeps them sorted.
+"""
+
+import os
+import json
+import heapq
+import shutil
+import bisect
+import weakref
+import threading
+from collections import Counter
+
+import numpy as np
+
+from .disk_index import DEFAULT_CODEC, DiskIndex, DiskIndexWriter
+from .front_coding import FrontCodedDictionary
+from .memory_index import MemoryIndex
+
+SEGMENTS_FILE = 'segments.json'
+SEGMENTS_FORMAT = 1
+DELETES_FILE = 'deletes.bin'
+# Files of the earlier single-directory layout, cleared when a new index is created
+LEGACY_FILES = ('manifest.json', 'doctable.bin', 'lexicon.bin', 'postings.bin', 'freqs.bin', 'positions.bin')
+
+
+class Segment:
+    """One immutable DiskIndex plus its tombstone bitmap."""
+
+    def __init__(self, path):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.disk = DiskIndex(path)
+        self.num_docs = self.disk.num_docs
+        self.deleted = np.zeros(self.num_docs, dtype=bool)
+        deletes_path = os.path.join(path, DELETES_FILE)
+        if os.path.exists(deletes_path):
+            bits = np.fromfile(deletes_path, dtype=np.uint8)
+            self.deleted = np.unpackbits(bits, count=self.num_docs).astype(bool)
+        self.doc_lengths = np.frombuffer(self.disk.doc_lengths, dtype=np.uint32)
+        self.live_count = int(self.num_docs - self.deleted.sum())
+        self.live_tokens = int(self.doc_lengths[~self.deleted].sum())
+        self.dirty = False
+
+    def delete(self, name):
+        doc_id = self.disk.doc_table.id_of(name)
+        if doc_id is None or self.deleted[doc_id]:
+            return False
+        self.deleted[doc_id] = True
+        self.live_count -= 1
+        self.live_tokens -= int(self.doc_lengths[doc_id])
+        self.dirty = True
+        return True
+
+    def contains(self, name):
+        doc_id = self.disk.doc_table.id_of(name)
+        return doc_id is not None and not self.deleted[doc_id]
+
+    def save_deletes(self):
+        if not self.dirty:
+            return
+        tmp_path = os.path.join(self.path, DELETES_FILE + '.tmp')
+        np.packbits(self.deleted).tofile(tmp_path)
+        os.replace(tmp_path, os.path.join(self.path, DELETES_FILE))
+        self.dirty = False
+
+    @property
+    def deleted_ratio(self):
+        return 1 - self.live_count / self.num_docs if self.num_docs else 0.0
+
+    # --- Reader interface (local docIDs, tombstoned documents filtered out) ---
+    def live_doc_ids(self):
+        return np.flatnonzero(~self.deleted)
+
+    def doc_name(self, doc_id):
+        return self.disk.doc_name(doc_id)
+
+    def doc_length(self, doc_id):
+        return int(self.doc_lengths[doc_id])
+
+    def terms(self):
+        return self.disk.terms()
+
+    def collection_frequencies(self):
+        # Includes tombstoned documents until they are merged away
+        return self.disk.collection_frequencies()
+
+    def get_postings(self, term):
+        entry = self.disk.get_postings(term)
+        if entry is None or self.live_count == self.num_docs:
+            return entry
+        doc_ids, tfs = entry
+        live = ~self.deleted[doc_ids]
+        return doc_ids[live], tfs[live]
+
+    def get_positions(self, term):
+        entry = self.disk.get_positions(term)
+        if entry is None or self.live_count == self.num_docs:
+            return entry
+        doc_ids, tfs, positions = entry
+        live = ~self.deleted[doc_ids]
+        return doc_ids[live], tfs[live], positions[np.repeat(live, tfs)]
+
+    def close(self):
+        self.disk.close()
+
+
+class BufferReader:
+    """Reader interface over the in-memory buffer of not yet flushed documents."""
+
+    def __init__(self, memory_index):
+        self.index = memory_index
+
+    @property
+    def live_count(self):
+        return self.index.num_docs
+
+    def live_doc_ids(self):
+        return np.array([doc_id for doc_id, _ in self.index.doc_table.items()], dtype=np.int64)
+
+    def doc_name(self, doc_id):
+        return self.index.doc_name(doc_id)
+
+    def doc_length(self, doc_id):
+        return self.index.doc_lengths[doc_id]
+
+    def terms(self):
+        return iter(sorted(self.index.terms()))
+
+    def collection_frequencies(self):
+        return self.index.collection_frequencies()
+
+    def get_postings(self, term):
+        entry = self.index.get_postings(term)
+        return None if entry is None else tuple(np.frombuffer(a, dtype=np.uint32) for a in entry)
+
+    def get_positions(self, term):
+        entry = self.index.get_positions(term)
+        return None if entry is None else tuple(np.frombuffer(a, dtype=np.uint32) for a in entry)
+
+
+def write_segment(path, readers, codec=DEFAULT_CODEC):
+    """
+    Writes the live documents of `readers` (Segments / BufferReaders) as one
+    new segment. Documents keep their relative order, so every reader's
+    postings map to a contiguous, increasing range of new docIDs.
+    Returns (manifest, documents written).
+    """
+    writer = DiskIndexWriter(path, codec=codec)
+    remaps = []
+    for reader in readers:
+        live = reader.live_doc_ids()
+        remap = np.zeros(max(int(live[-1]) + 1 if live.size else 0, 1), dtype=np.uint32)
+        for doc_id in live.tolist():
+            remap[doc_id] = writer.add_document(reader.doc_name(doc_id), reader.doc_length(doc_id))
+        remaps.append(remap)
+
+    total_tokens = sum(writer.doc_lengths)
+    merged = heapq.merge(*(reader.terms() for reader in readers))
+    previous = None
+    for term in merged:
+        if term == previous:
+            continue
+        previous = term
+        doc_ids, tfs, positions = [], [], []
+        for reader, remap in zip(readers, remaps):
+            entry = reader.get_positions(term)
+            if entry is None or len(entry[0]) == 0:
+                continue
+            doc_ids.append(remap[entry[0]])
+            tfs.append(entry[1])
+            positions.append(entry[2])
+        if doc_ids:
+            writer.add_term(term, np.concatenate(doc_ids), np.concatenate(tfs), np.concatenate(positions))
+
+    doc_count = len(writer.doc_names)
+    manifest = writer.close(total_tokens=total_tokens,
+                            avg_tokens_per_doc=total_tokens / doc_count if doc_count else 0)
+    return manifest, doc_count
+
+
+class _Readers(list):
+    """The readers of one snapshot; weakly referenceable so the index can tell which are still in use."""
+    __slots__ = ('__weakref__',)
+
+
+class TieredMergePolicy:
+    """
+    Groups segments into size tiers (powers of merge_factor above floor_docs)
+    and merges merge_factor segments of the same tier into one. Segments
+    with more than max_deleted_ratio tombstoned documents are rewritten alone.
+
+    Tier 0 holds the segments of at most floor_docs documents, tier t > 0
+    those of (floor_docs * merge_factor^(t-1), floor_docs * merge_factor^t]:
+    small flushes are merged among themselves, not into the base segment.
+    """
+
+    def __init__(self, merge_factor=10, floor_docs=100, max_deleted_ratio=0.5, max_segments=None):
+        self.merge_factor = merge_factor
+        self.floor_docs = floor_docs
+        self.max_deleted_ratio = max_deleted_ratio
+        # Above this many segments commits wait for merges to catch up
+        self.max_segments = max_segments or 4 * merge_factor
+
+    def tier(self, segment):
+        size = max(segment.live_count, self.floor_docs)
+        # ceil(log_merge_factor(size / floor_docs)), in integers to stay exact at the bounds
+        tier, bound = 0, self.floor_docs
+        while size > bound:
+            tier += 1
+            bound *= self.merge_factor
+        return tier
+
+    def find_merge(self, segments):
+        """Returns the list of segments to merge next, or None."""
+        tiers = {}
+        for segment in segments:
+            tiers.setdefault(self.tier(segment), []).append(segment)
+        for tier in sorted(tiers):
+            candidates = tiers[tier]
+            if len(candidates) >= self.merge_factor:
+                return sorted(candidates, key=lambda s: s.live_count)[:self.merge_factor]
+        for segment in segments:
+            if segment.deleted_ratio > self.max_deleted_ratio:
+                return [segment]
+        return None
+
+
+class SegmentedIndex:
+    def __init__(self, index_dir, codec=DEFAULT_CODEC, merge_policy=None, background_merges=True):
+        """Opens the segments listed in index_dir/segments.json (an empty index if missing)."""
+        self.index_dir = index_dir
+        self.codec = codec
+        self.merge_policy = merge_policy or TieredMergePolicy()
+        self.background_merges = background_merges
+        self.commit_info = {}
+        self.segments = []
+        self.buffer = MemoryIndex()
+        self.merge_stats = {'docs_added': 0, 'docs_flushed': 0, 'docs_merged': 0,
+                            'flushes': 0, 'merges': 0}
+
+        self._next_segment = 0
+        self._lock = threading.RLock()
+        self._merge_thread = None
+        self._retired = []       # merged-away segments, closed once no snapshot lists them
+        self._snapshots = weakref.WeakValueDictionary()    # generation -> its live readers
+        self._generation = 0     # bumped whenever the reader snapshot changes
+        self._vocab = None
+        self._vocab_generation = None
+
+        path = os.path.join(index_dir, SEGMENTS_FILE)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.commit_info = json.load(f)
+            if self.commit_info.get('format') != SEGMENTS_FORMAT:
+                raise ValueError(f"Unsupported segments format: {self.commit_info.get('format')}")
+            self._next_segment = self.commit_info['next_segment']
+            self.segments = [Segment(os.path.join(index_dir, name)) for name in self.commit_info['segments']]
+        self._refresh_readers()
+
+    @classmethod
+    def create(cls, index_dir, codec=DEFAULT_CODEC, **kwargs):
+        """Starts an empty index, discarding the segments index_dir held before."""
+        os.makedirs(index_dir, exist_ok=True)
+        for name in (SEGMENTS_FILE,) + LEGACY_FILES:
+            path = os.path.join(index_dir, name)
+            if os.path.exists(path):
+                os.remove(path)
+        index = cls(index_dir, codec=codec, **kwargs)
+        # With no commit point every seg_* directory is unreferenced
+        index._remove_unreferenced()
+        return index
+
+    # --- Bookkeeping ---
+    def _remove_unreferenced(self):
+        """
+        Deletes segment directories not listed in the commit point (left behind
+        by interrupted flushes/merges). Only safe while no other writer is
+        working on index_dir; the index assumes a single writer.
+        """
+        live = {segment.name for segment in self.segments}
+        if not os.path.isdir(self.index_dir):
+            return
+        for name in os.listdir(self.index_dir):
+            path = os.path.join(self.index_dir, name)
+            if name not in live and os.path.isdir(path) and name.startswith('seg_'):
+                shutil.rmtree(path, ignore_errors=True)
+
+    def allocate_segment(self):
+        """Path for a new segment directory (not yet part of the index)."""
+        with self._lock:
+            name = f'seg_{self._next_segment:06d}'
+            self._next_segment += 1
+        return os.path.join(self.index_dir, name)
+
+    def _refresh_readers(self):
+        """
+        Rebuilds the (readers, bases) snapshot queries work on. Readers take
+        the snapshot once per operation, so a snapshot still referenced
+        somewhere belongs to an operation in flight.
+        """
+        readers = _Readers(self.segments)
+        if self.buffer.num_docs:
+            readers.append(BufferReader(self.buffer))
+        bases, base = [], 0
+        for reader in readers:
+            bases.append(base)
+            base += reader.num_docs if isinstance(reader, Segment) else self.buffer.doc_table.capacity
+        self._readers = (readers, bases)
+        self._generation += 1
+        self._snapshots[self._generation] = readers
+        self._close_retired()
+
+    def _close_retired(self):
+        """Closes the retired segments no live snapshot (nor the cached vocabulary) still uses."""
+        if not self._retired:
+            return
+        snapshots = list(self._snapshots.values())
+        still_used = []
+        for segment in self._retired:
+            if any(segment in readers for readers in snapshots) or self._vocab is segment.disk.dictionary:
+                still_used.append(segment)
+                continue
+            try:
+                segment.close()
+            except BufferError:
+                # A postings view handed out earlier is still alive: try again later
+                still_used.append(segment)
+        self._retired = still_used
+
+    def _write_commit(self, **extra):
+        info = {key: value for key, value in self.commit_info.items()
+                if key not in ('format', 'segments', 'next_segment')}
+        info.update(extra)
+        info.update({
+            'format': SEGMENTS_FORMAT,
+            'segments': [segment.name for segment in self.segments],
+            'next_segment': self._next_segment,
+        })
+        tmp_path = os.path.join(self.index_dir, SEGMENTS_FILE + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(info, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, os.path.join(self.index_dir, SEGMENTS_FILE))
+        self.commit_info = info
+        return info
+
+    # --- Updates ---
+    def add_segment(self, path, docs_added=0):
+        """Registers a segment directory written by DiskIndexWriter (e.g. the SPIMI builder)."""
+        with self._lock:
+            self.segments.append(Segment(path))
+            self.merge_stats['docs_added'] += docs_added
+            self._refresh_readers()
+
+    def add_document(self, name, terms):
+        """Buffers a new document; an existing version is tombstoned."""
+        with self._lock:
+            self.remove_document(name)
+            self.buffer.add_document(name, terms)
+            self.merge_stats['docs_added'] += 1
+            self._refresh_readers()
+
+    def remove_document(self, name):
+        with self._lock:
+            removed = False
+            for segment in self.segments:
+                removed = segment.delete(name) or removed
+            if name in self.buffer.doc_table:
+                removed = self.buffer.remove_document(name) or removed
+            if removed:
+                self._refresh_readers()
+            return removed
+
+    def flush(self):
+        """Writes the buffered documents as a new segment."""
+        with self._lock:
+            if not self.buffer.num_docs:
+                self.buffer = MemoryIndex()
+                return None
+            path = self.allocate_segment()
+            _, written = write_segment(path, [BufferReader(self.buffer)], self.codec)
+            self.segments.append(Segment(path))
+            self.buffer = MemoryIndex()
+            self.merge_stats['docs_flushed'] += written
+            self.merge_stats['flushes'] += 1
+            self._refresh_readers()
+            return path
+
+    def commit(self, **extra):
+        """
+        Flushes the buffer, persists tombstones and writes segments.json.
+        `extra` (corpus signature, stats) is stored in the commit point.
+        Then schedules merges.
+        """
+        with self._lock:
+            self.flush()
+            for segment in self.segments:
+                segment.save_deletes()
+            info = self._write_commit(**extra)
+        self.maybe_merge()
+        return info
+
+    # --- Merging ---
+    def maybe_merge(self):
+        """
+        Starts the background merge thread if the policy finds work. If flushes
+        outpace merging and too many segments pile up, waits for the merges
+        so query fan-out stays bounded.
+        """
+        if len(self.segments) > self.merge_policy.max_segments:
+            self.wait_for_merges()
+        with self._lock:
+            if self._merge_thread is not None and self._merge_thread.is_alive():
+                return
+            if self.merge_policy.find_merge(self.segments) is None:
+                return
+            if not self.background_merges:
+                self._merge_loop()
+                return
+            self._merge_thread = threading.Thread(target=self._merge_loop, daemon=True)
+            self._merge_thread.start()
+
+    def wait_for_merges(self):
+        thread = self._merge_thread
+        if thread is not None:
+            thread.join()
+
+    def _merge_loop(self):
+        while True:
+            with self._lock:
+                sources = self.merge_policy.find_merge(self.segments)
+            if sources is None:
+                return
+            self.merge(sources)
+
+    def merge(self, sources):
+        """
+        Merges `sources` into one new segment. The heavy part runs without the
+        lock; documents deleted meanwhile are tombstoned in the new segment
+        before it replaces the sources.
+        """
+        with self._lock:
+            snapshot = [segment.deleted.copy() for segment in sources]
+        merged, written = None, 0
+        if any(segment.live_count for segment in sources):
+            path = self.allocate_segment()
+            _, written = write_segment(path, sources, self.codec)
+            merged = Segment(path)
+
+        with self._lock:
+            position = min(self.segments.index(segment) for segment in sources)
+            remaining = [segment for segment in self.segments if segment not in sources]
+            if merged is not None:
+                for segment, deleted_before in zip(sources, snapshot):
+                    for doc_id in np.flatnonzero(segment.deleted & ~deleted_before).tolist():
+                        merged.delete(segment.doc_name(doc_id))
+                merged.save_deletes()
+                remaining.insert(position, merged)
+            self.segments = remaining
+            self._write_commit()
+            # In-flight queries may still read the old segments: they are closed
+            # once the last snapshot listing them is gone (see _close_retired)
+            self._retired.extend(sources)
+            self._refresh_readers()
+            self.merge_stats['docs_merged'] += written
+            self.merge_stats['merges'] += 1
+        for segment in sources:
+            shutil.rmtree(segment.path, ignore_errors=True)
+        return merged
+
+    def force_merge(self):
+        """Merges everything (buffer included) into a single segment."""
+        self.wait_for_merges()
+        with self._lock:
+            self.flush()
+            if len(self.segments) > 1 or any(segment.live_count < segment.num_docs for segment in self.segments):
+                self.merge(list(self.segments))
+
+    @property
+    def write_amplification(self):
+        """Documents written to disk (flushes + merges) per document added."""
+        added = self.merge_stats['docs_added']
+        written = self.merge_stats['docs_flushed'] + self.merge_stats['docs_merged']
+        return written / added if added else 0.0
+
+    # --- Postings source interface (global docIDs) ---
+    @property
+    def num_docs(self):
+        readers, _ = self._readers
+        return sum(reader.live_count for reader in readers)
+
+    @property
+    def total_tokens(self):
+        return sum(segment.live_tokens for segment in self.segments) + self.buffer.total_tokens
+
+    def _vocabulary(self):
+        readers, _ = self._readers
+        if self._vocab_generation != self._generation:
+            if len(readers) == 1 and isinstance(readers[0], Segment):
+                self._vocab = readers[0].disk.dictionary
+            else:
+                merged = heapq.merge(*(reader.terms() for reader in readers))
+                self._vocab = FrontCodedDictionary(merged)
+            self._vocab_generation = self._generation
+        return self._vocab
+
+    @property
+    def dictionary(self):
+        """Sorted, front-coded union of the segment vocabularies."""
+        return self._vocabulary()
+
+    @property
+    def vocab_size(self):
+        return len(self._vocabulary())
+
+    def terms(self):
+        return iter(self._vocabulary())
+
+    def collection_frequencies(self):
+        """Yields (term, total occurrences) summed over the segments."""
+        readers, _ = self._readers
+        if len(readers) == 1:
+            return readers[0].collection_frequencies()
+        totals = Counter()
+        for reader in readers:
+            for term, count in reader.collection_frequencies():
+                totals[term] += count
+        return totals.items()
+
+    def doc_name(self, doc_id):
+        readers, bases = self._readers
+        i = bisect.bisect_right(bases, doc_id) - 1
+        return readers[i].doc_name(doc_id - bases[i])
+
+    def __contains__(self, name):
+        return name in self.buffer.doc_table or any(segment.contains(name) for segment in self.segments)
+
+    def _fan_out(self, term, positions):
+        readers, bases = self._readers
+        parts = []
+        for reader, base in zip(readers, bases):
+            entry = reader.get_positions(term) if positions else reader.get_postings(term)
+            if entry is not None and len(entry[0]):
+                parts.append((entry[0] + np.uint32(base),) + tuple(entry[1:]))
+        if not parts:
+            # Terms whose documents are all tombstoned stay in the vocabulary until merged away
+            if term in self._vocabulary():
+                empty = np.zeros(0, dtype=np.uint32)
+                return (empty,) * (3 if positions else 2)
+            return None
+        if len(parts) == 1:
+            return parts[0]
+        return tuple(np.concatenate(column) for column in zip(*parts))
+
+    def get_postings(self, term):
+        return self._fan_out(term, positions=False)
+
+    def get_positions(self, term):
+        return self._fan_out(term, positions=True)
+
+    def close(self):
+        self.wait_for_merges()
+        with self._lock:
+            for segment in self.segments + self._retired:
+                segment.close()
+            self.segments = []
+            self._retired = []
+            self._readers = ([], [])
@@ -0,0 +1,168 @@
+"""
+External-memory index construction (Single-Pass In-Memory Indexing).
+
+Documents are streamed one at a time into an in-memory term -> postings
+dictionary. When its estimated size reaches the memory budget, the block
+is sorted by term and flushed to disk. At the end the sorted blocks are
+combined with a heap-based k-way merge and streamed into DiskIndexWriter,
+so peak memory is bounded by the budget (plus the doc table and the
+merge's one-record-per-block window), not by the corpus size.
+
+Block file record:
+    <term_len:u16><df:u32><cf:u32><term utf-8><doc_ids:u32*df><tfs:u32*df><positions:u32*cf>
+"""
+
+import os
+import sys
+import time
+import heapq
+import struct
+import itertools
+from array import array
+
+from .disk_index import DEFAULT_CODEC, DiskIndexWriter
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_RECORD = struct.Struct('<HII')
+
+# Rough per-object costs used for the memory estimate
+_TERM_OVERHEAD = 3 * 64 + 120   # dict slot + str + three array headers
+_ENTRY_BYTES = 4                # one uint32 slot
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _write_block(path, postings):
+    with open(path, 'wb') as f:
+        for term in sorted(postings):
+            doc_ids, tfs, positions = postings[term]
+            key = term.encode('utf-8')
+            f.write(_RECORD.pack(len(key), len(doc_ids), len(positions)))
+            f.write(key)
+            f.write(doc_ids.tobytes())
+            f.write(tfs.tobytes())
+            f.write(positions.tobytes())
+
+
+def _read_block(path):
+    """Yields (term, doc_ids, tfs, positions) in term order."""
+    with open(path, 'rb') as f:
+        while True:
+            header = f.read(_RECORD.size)
+            if not header:
+                return
+            key_len, df, cf = _RECORD.unpack(header)
+            term = f.read(key_len).decode('utf-8')
+            doc_ids, tfs, positions = array('I'), array('I'), array('I')
+            doc_ids.fromfile(f, df)
+            tfs.fromfile(f, df)
+            positions.fromfile(f, cf)
+            yield term, doc_ids, tfs, positions
+
+
+class SpimiIndexBuilder:
+    def __init__(self, index_dir, memory_budget_mb=64, codec=DEFAULT_CODEC, keep_blocks=False):
+        self.index_dir = index_dir
+        self.block_dir = os.path.join(index_dir, 'blocks')
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.keep_blocks = keep_blocks
+        os.makedirs(self.block_dir, exist_ok=True)
+
+        self.writer = DiskIndexWriter(index_dir, codec=codec)
+        self.block_paths = []
+        self.postings = {}
+        self.used_bytes = 0
+        self.total_tokens = 0
+
+    def add_document(self, name, terms):
+        """Adds one analyzed document; docIDs are assigned in arrival order."""
+        doc_id = self.writer.add_document(name, len(terms))
+        self.total_tokens += len(terms)
+
+        doc_positions = {}
+        for pos, term in enumerate(terms):
+            doc_positions.setdefault(term, []).append(pos)
+
+        for term, positions in doc_positions.items():
+            entry = self.postings.get(term)
+            if entry is None:
+                entry = self.postings[term] = [array('I'), array('I'), array('I')]
+                self.used_bytes += _TERM_OVERHEAD + len(term) * 2
+            entry[0].append(doc_id)
+            entry[1].append(len(positions))
+            entry[2].extend(positions)
+            self.used_bytes += _ENTRY_BYTES * (2 + len(positions))
+
+        if self.used_bytes >= self.memory_budget:
+            self.flush_block()
+        return doc_id
+
+    def flush_block(self):
+        if not self.postings:
+            return
+        path = os.path.join(self.block_dir, f'spimi_block_{len(self.block_paths)}.bin')
+        _write_block(path, self.postings)
+        self.block_paths.append(path)
+        self.postings = {}
+        self.used_bytes = 0
+
+    def finish(self, **stats):
+        """Flushes the last block and k-way merges all blocks into the final index."""
+        self.flush_block()
+        readers = [_read_block(path) for path in self.block_paths]
+
+        # heapq.merge is stable: equal terms come out in block order, and
+        # blocks hold increasing docIDs, so concatenation keeps postings sorted
+        merged = heapq.merge(*readers, key=lambda record: record[0])
+        for term, records in itertools.groupby(merged, key=lambda record: record[0]):
+            doc_ids, tfs, positions = array('I'), array('I'), array('I')
+            for _, block_doc_ids, block_tfs, block_positions in records:
+                doc_ids.extend(block_doc_ids)
+                tfs.extend(block_tfs)
+                positions.extend(block_positions)
+            self.writer.add_term(term, doc_ids, tfs, positions)
+
+        doc_count = len(self.writer.doc_names)
+        stats.setdefault('total_tokens', self.total_tokens)
+        stats.setdefault('avg_tokens_per_doc', self.total_tokens / doc_count if doc_count else 0)
+        manifest = self.writer.close(**stats)
+
+        if not self.keep_blocks:
+            for path in self.block_paths:
+                os.remove(path)
+            os.rmdir(self.block_dir)
+        return manifest
+
+
+def build_spimi_index(doc_names, read_terms, index_dir, memory_budget_mb=64, codec=DEFAULT_CODEC,
+                      keep_blocks=False, **stats):
+    """
+    Streams documents through a SPIMI builder.
+    doc_names: document names in docID order
+    read_terms: callable name -> analyzed term list (called once per document)
+    Returns a run report with the manifest, block count, time and peak RSS.
+    """
+    start = time.perf_counter()
+    builder = SpimiIndexBuilder(index_dir, memory_budget_mb, codec, keep_blocks)
+    for name in doc_names:
+        builder.add_document(name, read_terms(name))
+    n_blocks = len(builder.block_paths) + (1 if builder.postings else 0)
+    manifest = builder.finish(**stats)
+    return {
+        'manifest': manifest,
+        'blocks': n_blocks,
+        'memory_budget_mb': memory_budget_mb,
+        'seconds': round(time.perf_counter() - start, 3),
+        'peak_rss_mb': peak_rss_mb(),
+    }
@@ -0,0 +1,46 @@
+"""
+Read-only Mapping views that present a postings source (MemoryIndex or
+DiskIndex) in the filename-keyed shape the routes and templates use:
+
+    InvertedView:    term -> [filename, ...]
+    PositionalView:  term -> {filename: [positions]}
+
+A source provides get_postings(term), get_positions(term), terms(),
+vocab_size and doc_name(doc_id).
+"""
+
+from collections.abc import Mapping
+
+
+class InvertedView(Mapping):
+    def __init__(self, source):
+        self.source = source
+
+    def __getitem__(self, term):
+        postings = self.source.get_postings(term)
+        if postings is None:
+            raise KeyError(term)
+        return [self.source.doc_name(doc_id) for doc_id in postings[0]]
+
+    def __contains__(self, term):
+        return self.source.get_postings(term) is not None
+
+    def __iter__(self):
+        return iter(self.source.terms())
+
+    def __len__(self):
+        return self.source.vocab_size
+
+
+class PositionalView(InvertedView):
+    def __getitem__(self, term):
+        postings = self.source.get_positions(term)
+        if postings is None:
+            raise KeyError(term)
+        doc_ids, tfs, positions = postings
+        result = {}
+        cursor = 0
+        for doc_id, tf in zip(doc_ids, tfs):
+            result[self.source.doc_name(doc_id)] = positions[cursor:cursor + tf].tolist()
+            cursor += tf
+        return result
@@ -0,0 +1,222 @@
+"""
+Spelling suggestion index (SymSpell delete dictionary + BK-tree fallback).
+
+Every dictionary word is indexed under the strings obtained by deleting up
+to `dictionary_distance` characters from its first `prefix_length`
+characters (SymSpell). Two words within edit distance d share such a
+delete, so a lookup only generates the deletes of the input word, reads
+the few words filed under them and verifies those with a bounded
+Levenshtein distance. No pass over the vocabulary is needed, whatever its
+size.
+
+Lookups with a larger max_distance than the delete dictionary was built
+for go to a BK-tree, built lazily on first use.
+
+Suggestions are ranked by edit distance, then by corpus frequency.
+"""
+
+try:
+    from rapidfuzz.distance import Levenshtein as _rf_levenshtein
+except ImportError:
+    _rf_levenshtein = None
+
+
+def _levenshtein(s1, s2, max_distance):
+    """
+    Edit distance capped at max_distance + 1, computed with the bit-parallel
+    algorithm of Myers / Hyyro: one DP column of the shorter word is kept as
+    bit vectors of +1/-1 deltas and updated for a whole column per character.
+    """
+    if abs(len(s1) - len(s2)) > max_distance:
+        return max_distance + 1
+    if len(s1) < len(s2):
+        s1, s2 = s2, s1
+    if not s2:
+        return min(len(s1), max_distance + 1)
+    peq = {}
+    for i, c in enumerate(s2):
+        peq[c] = peq.get(c, 0) | (1 << i)
+    full = (1 << len(s2)) - 1
+    last = 1 << (len(s2) - 1)
+    pv, mv, score = full, 0, len(s2)
+    for c in s1:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = (ph << 1) | 1
+        mh <<= 1
+        pv = (mh | ~(xv | ph)) & full
+        mv = ph & xv & full
+    return min(score, max_distance + 1)
+
+
+if _rf_levenshtein is not None:
+    def bounded_distance(s1, s2, max_distance):
+        return _rf_levenshtein.distance(s1, s2, score_cutoff=max_distance)
+else:
+    bounded_distance = _levenshtein
+
+
+def deletes(word, max_deletes):
+    """The word and every string obtained by deleting up to max_deletes of its characters."""
+    result = {word}
+    level = {word}
+    for _ in range(max_deletes):
+        level = {w[:i] + w[i + 1:] for w in level for i in range(len(w))}
+        result |= level
+    return result
+
+
+class BKTree:
+    """Burkhard-Keller tree: children are keyed by their distance to the parent."""
+
+    def __init__(self, words=()):
+        self.root = None
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        if self.root is None:
+            self.root = (word, {})
+            return
+        node = self.root
+        while True:
+            distance = _levenshtein(word, node[0], len(word) + len(node[0]))
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (word, {})
+                return
+            node = child
+
+    def search(self, word, max_distance):
+        """[(word, distance)] for every word within max_distance."""
+        if self.root is None:
+            return []
+        results = []
+        stack = [self.root]
+        while stack:
+            node_word, children = stack.pop()
+            distance = _levenshtein(word, node_word, len(word) + len(node_word))
+            if distance <= max_distance:
+                results.append((node_word, distance))
+            # Triangle inequality: only subtrees at |d - distance| <= max_distance can match
+            for child_distance, child in children.items():
+                if abs(child_distance - distance) <= max_distance:
+                    stack.append(child)
+        return results
+
+
+class SuggestionIndex:
+    def __init__(self, word_counts=(), dictionary_distance=2, prefix_length=7):
+        """
+        word_counts: mapping or iterable of (word, frequency) pairs
+        dictionary_distance: largest edit distance answered from the delete dictionary
+        prefix_length: only this many leading characters are used for deletes
+        """
+        self.dictionary_distance = dictionary_distance
+        self.prefix_length = prefix_length
+        self.words = []
+        self.counts = []
+        self.word_ids = {}
+        # delete -> word ID, or a list of IDs once several words share the delete
+        self.deletes = {}
+        self._bk_tree = None
+        if hasattr(word_counts, 'items'):
+            word_counts = word_counts.items()
+        for word, count in word_counts:
+            self.add(word, count)
+
+    @classmethod
+    def from_words(cls, words, **kwargs):
+        return cls(((word, 1) for word in words), **kwargs)
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, word):
+        return word in self.word_ids
+
+    def __iter__(self):
+        return iter(self.words)
+
+    def frequency(self, word):
+        word_id = self.word_ids.get(word)
+        return 0 if word_id is None else self.counts[word_id]
+
+    def add(self, word, count=1):
+        """Adds a word (or more occurrences of a known one)."""
+        word_id = self.word_ids.get(word)
+        if word_id is not None:
+            self.counts[word_id] += count
+            return
+        word_id = len(self.words)
+        self.words.append(word)
+        self.counts.append(count)
+        self.word_ids[word] = word_id
+        for delete in deletes(word[:self.prefix_length], self.dictionary_distance):
+            entry = self.deletes.get(delete)
+            if entry is None:
+                self.deletes[delete] = word_id
+            elif isinstance(entry, list):
+                entry.append(word_id)
+            else:
+                self.deletes[delete] = [entry, word_id]
+        if self._bk_tree is not None:
+            self._bk_tree.add(word)
+
+    def _candidates(self, word_deletes):
+        candidates = set()
+        for delete in word_deletes:
+            entry = self.deletes.get(delete)
+            if entry is None:
+                continue
+            if isinstance(entry, list):
+                candidates.update(entry)
+            else:
+                candidates.add(entry)
+        return candidates
+
+    def lookup(self, word, max_suggestions=5, max_distance=None):
+        """
+        Returns up to max_suggestions [(word, distance)] within max_distance
+        (default: dictionary_distance), closest first, then most frequent.
+        """
+        if max_distance is None:
+            max_distance = self.dictionary_distance
+        if max_distance > self.dictionary_distance:
+            if self._bk_tree is None:
+                self._bk_tree = BKTree(self.words)
+            found = sorted((distance, -self.frequency(w), w) for w, distance in self._bk_tree.search(word, max_distance))
+            return [(w, distance) for distance, _, w in found[:max_suggestions]]
+
+        # Widen the radius one edit at a time: every word within distance d shares
+        # a delete of at most d characters with `word`, so once max_suggestions
+        # words are found within d, nothing farther can outrank them
+        found = []
+        seen = set()
+        level = {word[:self.prefix_length]}
+        for radius in range(max_distance + 1):
+            if radius:
+                level = {w[:i] + w[i + 1:] for w in level for i in range(len(w))}
+            for word_id in self._candidates(level) - seen:
+                distance = bounded_distance(word, self.words[word_id], max_distance)
+                if distance <= max_distance:
+                    found.append((distance, -self.counts[word_id], self.words[word_id]))
+                seen.add(word_id)
+            closest = sum(1 for entry in found if entry[0] <= radius)
+            if closest >= max_suggestions:
+                break
+        found.sort()
+        return [(w, distance) for distance, _, w in found[:max_suggestions]]
+
+    def suggest(self, word, max_suggestions=5, max_distance=None):
+        """Suggested words only (see lookup)."""
+        return [w for w, _ in self.lookup(word, max_suggestions, max_distance)]
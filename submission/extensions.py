@@ -5,5 +5,21 @@ class AppGlobals:
     word_analyzer = None
     classifier = None
     word2vec = None
+    autocomplete = None
+    shard_broker = None
+    result_cache = None
+    foundation = None
 
 app_globals = AppGlobals()
+
+def suggestion_index(config):
+    """
+    The app's one spelling suggestion index (Indexing.suggestion_index, over the
+    index terms weighted by corpus frequency), shared by /query/spellcheck and
+    the word analyzer's spell checker.
+    """
+    if app_globals.indexer is None:
+        from core.ch03_indexing import Indexing
+        app_globals.indexer = Indexing(config['DATA_DIR'], config['DOC_DIR'])
+        app_globals.indexer.load_or_build()
+    return app_globals.indexer.suggestion_index
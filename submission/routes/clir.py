@@ -2,6 +2,7 @@
 from flask import Blueprint, render_template, request, current_app
 from core.translation.dictionary_translator import DictionaryTranslator
 from core.ch05_ranking import Ranking
+from core.result_cache import ResultCache
 from extensions import app_globals
 import os
 
@@ -23,8 +24,13 @@ def search():
         # 2. Search (using BM25 on translated query)
         if app_globals.ranker is None:
             app_globals.ranker = Ranking(current_app.config['DATA_DIR'], current_app.config['DOC_DIR'])
+        if app_globals.result_cache is None:
+            app_globals.result_cache = ResultCache(current_app.config['RESULT_CACHE_SIZE'],
+                                                   current_app.config['RESULT_CACHE_PATH'])
             
-        results = app_globals.ranker.compute_bm25(query_ne)[:10]
+        ranker = app_globals.ranker
+        results = app_globals.result_cache.get_or_compute(ranker, 'bm25', query_ne,
+                                                          lambda: ranker.compute_bm25(query_ne, top_k=10), top_k=10)
         
     return render_template('clir/search.html', 
                           query_en=query_en, 
@@ -1,7 +1,10 @@
 
 from flask import Blueprint, render_template, request, current_app
 from core.distributed.map_reduce import MapReduceIndexer
+from core.distributed.sharded_search import ShardBroker
+from extensions import app_globals
 import os
+import time
 
 distributed_bp = Blueprint('distributed', __name__)
 
@@ -25,6 +28,30 @@ def mapreduce():
         
         # Preview first 10 items of index
         for k in sorted(list(index.keys()))[:10]:
-            index_preview[k] = index[k]
+            index_preview[k] = mr.doc_table.names_of(index[k])
             
     return render_template('distributed/mapreduce.html', logs=logs, index_preview=index_preview)
+
+@distributed_bp.route('/distributed/search', methods=['GET', 'POST'])
+def sharded_search():
+    query = None
+    result = None
+    total_ms = None
+    model = request.form.get('model', 'bm25')
+    top_k = request.form.get('top_k', 10, type=int)
+    timeout_ms = request.form.get('timeout_ms', 2000, type=int)
+    
+    # Shard worker processes are started once and kept for the app's lifetime
+    if app_globals.shard_broker is None:
+        app_globals.shard_broker = ShardBroker.start(current_app.config['DOC_DIR'], current_app.config['DATA_DIR'])
+    broker = app_globals.shard_broker
+    
+    if request.method == 'POST':
+        query = request.form.get('query')
+        if query and query.strip():
+            start = time.perf_counter()
+            result = broker.search(query, model=model, k=max(1, top_k), timeout=max(1, timeout_ms) / 1000)
+            total_ms = round((time.perf_counter() - start) * 1000, 2)
+            
+    return render_template('distributed/search.html', query=query, result=result, total_ms=total_ms,
+                           model=model, top_k=top_k, timeout_ms=timeout_ms, shard_info=broker.shard_info)
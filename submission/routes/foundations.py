@@ -1,29 +1,47 @@
 from flask import Blueprint, render_template, request, current_app
-import os
+from extensions import app_globals
 from core.ch01_foundations import Foundations
+from core.boolean_query import BooleanQuery
 
 foundations_bp = Blueprint('foundations', __name__)
 
+
+def _previews(foundation, doc_ids):
+    # Documents are already in memory: no need to re-read each hit's file
+    previews = {}
+    for doc_id in doc_ids:
+        content = foundation.docs.get(doc_id)
+        if content is None:
+            previews[doc_id] = "Preview not available"
+        else:
+            previews[doc_id] = content[:150] + ('...' if len(content) > 150 else '')
+    return previews
+
 @foundations_bp.route('/foundations/boolean', methods=['GET', 'POST'])
 def boolean_search():
     results = None
     doc_previews = {}
+    plan = None
+    error = None
+    query = None
     if request.method == 'POST':
         query = request.form.get('query')
         op = request.form.get('operation')
-        foundation = Foundations(current_app.config['DOC_DIR'])
-        results = foundation.boolean_search(query, op)
+        if app_globals.foundation is None:
+            app_globals.foundation = Foundations(current_app.config['DOC_DIR'])
+        foundation = app_globals.foundation
+        try:
+            plan = BooleanQuery.explain(foundation.compile_boolean(query, op))
+            results = foundation.boolean_search(query, op)
+        except ValueError as e:
+            error = str(e)
         
         # Load previews for tooltip
-        for doc_id in results:
-            try:
-                with open(os.path.join(current_app.config['DOC_DIR'], doc_id), 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    doc_previews[doc_id] = content[:150] + ('...' if len(content) > 150 else '')
-            except:
-                doc_previews[doc_id] = "Preview not available"
+        if results:
+            doc_previews = _previews(foundation, results)
                 
-    return render_template('foundations/boolean.html', results=results, doc_previews=doc_previews)
+    return render_template('foundations/boolean.html', results=results, doc_previews=doc_previews,
+                           plan=plan, error=error, query=query)
 
 @foundations_bp.route('/foundations/vsm', methods=['GET', 'POST'])
 def vector_space_model():
@@ -31,16 +49,12 @@ def vector_space_model():
     doc_previews = {}
     if request.method == 'POST':
         query = request.form.get('query')
-        foundation = Foundations(current_app.config['DOC_DIR'])
+        if app_globals.foundation is None:
+            app_globals.foundation = Foundations(current_app.config['DOC_DIR'])
+        foundation = app_globals.foundation
         results = foundation.compute_cosine_similarity(query)
         
         # Load previews
-        for doc_id, score in results:
-            try:
-                with open(os.path.join(current_app.config['DOC_DIR'], doc_id), 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    doc_previews[doc_id] = content[:150] + ('...' if len(content) > 150 else '')
-            except:
-                doc_previews[doc_id] = "Preview not available"
+        doc_previews = _previews(foundation, [doc_id for doc_id, score in results])
                 
     return render_template('foundations/vsm.html', results=results, doc_previews=doc_previews)
@@ -1,10 +1,44 @@
 from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app, jsonify
 import os
-from extensions import app_globals
+from extensions import app_globals, suggestion_index
 from core.ch21_word_analysis import WordAnalyzer
 
 general_bp = Blueprint('general', __name__)
 
+def _read_if_exists(file_path):
+    if not os.path.exists(file_path):
+        return None
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def _sync_document(filename, text, old_text=None):
+    """
+    Patch the cached ranker/indexer for one changed document instead of
+    rebuilding them. text=None means the document was deleted.
+    """
+    if app_globals.ranker is not None:
+        if text is None:
+            app_globals.ranker.remove_document(filename)
+        else:
+            app_globals.ranker.update_document(filename, text)
+            
+    if app_globals.shard_broker is not None:
+        if text is None:
+            app_globals.shard_broker.remove_document(filename)
+        else:
+            app_globals.shard_broker.add_document(filename, text)
+            
+    if app_globals.indexer is not None:
+        if text is None:
+            app_globals.indexer.remove_document(filename, old_text)
+        else:
+            app_globals.indexer.update_document(filename, text, old_text)
+        # New segment + tombstones on disk; merging happens in the background
+        app_globals.indexer.commit()
+        
+    # The boolean/VSM demo index has no incremental update: rebuilt on next use
+    app_globals.foundation = None
+
 @general_bp.route('/')
 def index():
     """Dashboard showing system stats."""
@@ -26,12 +60,13 @@ def documents():
             flash('No selected file')
             return redirect(request.url)
         if file and file.filename.endswith('.txt'):
-            file.save(os.path.join(current_app.config['UPLOAD_FOLDER'], file.filename))
+            file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], file.filename)
+            old_text = _read_if_exists(file_path)
+            file.save(file_path)
+            _sync_document(file.filename, _read_if_exists(file_path), old_text)
             flash(f'Uploaded {file.filename} successfully!')
             return redirect(url_for('general.documents'))
             
-            return redirect(url_for('general.documents'))
-            
     files = []
     page = request.args.get('page', 1, type=int)
     per_page = 9  # Grid of 3x3
@@ -68,7 +103,8 @@ def view_document(filename):
             
         # Initialize analyzer if needed
         if 'word_analyzer' not in app_globals.__dict__ or app_globals.word_analyzer is None:
-            app_globals.word_analyzer = WordAnalyzer(current_app.config['DATA_DIR'], current_app.config['DOC_DIR'])
+            app_globals.word_analyzer = WordAnalyzer(current_app.config['DATA_DIR'], current_app.config['DOC_DIR'],
+                                                     suggestion_index(current_app.config))
             
         # Pagination Logic for Content
         page = request.args.get('p', 1, type=int)
@@ -121,7 +157,9 @@ def delete_document(filename):
     try:
         file_path = os.path.join(current_app.config['DOC_DIR'], filename)
         if os.path.exists(file_path):
+            old_text = _read_if_exists(file_path)
             os.remove(file_path)
+            _sync_document(filename, None, old_text)
             flash(f'Document {filename} deleted successfully.')
         else:
             flash(f'Document {filename} not found.')
@@ -140,7 +178,8 @@ def analyze_word():
         
     # Lazy initialization of analyzer
     if 'word_analyzer' not in app_globals.__dict__ or app_globals.word_analyzer is None:
-        app_globals.word_analyzer = WordAnalyzer(current_app.config['DATA_DIR'], current_app.config['DOC_DIR'])
+        app_globals.word_analyzer = WordAnalyzer(current_app.config['DATA_DIR'], current_app.config['DOC_DIR'],
+                                                 suggestion_index(current_app.config))
         
     analysis = app_globals.word_analyzer.analyze_word(word, doc_id)
     return jsonify(analysis)
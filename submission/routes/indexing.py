@@ -1,3 +1,4 @@
+import time
 from flask import Blueprint, render_template, request, current_app
 from core.ch03_indexing import Indexing
 from extensions import app_globals
@@ -8,18 +9,29 @@ indexing_bp = Blueprint('indexing', __name__)
 def indexing_demo():
     if app_globals.indexer is None:
         app_globals.indexer = Indexing(current_app.config['DATA_DIR'], current_app.config['DOC_DIR'])
-        stats = app_globals.indexer.build_indexes()
+        stats = app_globals.indexer.load_or_build()
     else:
-        stats = {
+        stats = app_globals.indexer.stats or {
             'doc_count': len(app_globals.indexer.positional_index),
             'vocab_size': len(app_globals.indexer.inverted_index),
             'total_tokens': "N/A (Cached)" 
         }
 
     term_data = None
+    phrase_data = None
     if request.method == 'POST':
         term = request.form.get('term')
-        if term:
+        phrase_query = request.form.get('phrase_query')
+        if phrase_query and phrase_query.strip():
+            start = time.perf_counter()
+            results = app_globals.indexer.positional_search(phrase_query)
+            phrase_data = {
+                'query': phrase_query,
+                'results': results[:50],
+                'total': len(results),
+                'time_ms': round((time.perf_counter() - start) * 1000, 2)
+            }
+        elif term:
             postings = app_globals.indexer.get_posting_list(term)
             positional = app_globals.indexer.get_positional_postings(term)
             sample_doc_id = abs(hash(term)) % 10000 
@@ -31,4 +43,4 @@ def indexing_demo():
                 'sample_doc_id': sample_doc_id,
                 'compressed_bytes': compressed
             }
-    return render_template('indexing/view.html', stats=stats, term_data=term_data)
+    return render_template('indexing/view.html', stats=stats, term_data=term_data, phrase_data=phrase_data)
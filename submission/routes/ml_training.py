@@ -1,7 +1,6 @@
 
 from flask import Blueprint, render_template, request, jsonify, current_app
 from core.ch22_word2vec_model import Word2VecNumPy
-from core.ch23_neural_classifier import DocumentClassifierPT
 from extensions import app_globals
 import os
 
@@ -59,6 +58,8 @@ def train_classifier():
             
         # Initialize global model if not exists
         if app_globals.classifier is None:
+            # torch is only loaded once a classifier is trained
+            from core.ch23_neural_classifier import DocumentClassifierPT
             app_globals.classifier = DocumentClassifierPT()
             
         history = app_globals.classifier.train(documents, labels, epochs=epochs)
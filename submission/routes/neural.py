@@ -1,5 +1,4 @@
 from flask import Blueprint, render_template, request, current_app
-from core.ch06_neural import NeuralIR
 import os
 
 neural_bp = Blueprint('neural', __name__)
@@ -23,18 +22,26 @@ def neural_search():
                     with open(os.path.join(doc_dir, f), 'r', encoding='utf-8') as file:
                         docs[f] = file.read()
         
+        # torch is only loaded once neural search is used
+        from core.ch06_neural import NeuralIR
         neural = NeuralIR(current_app.config['DATA_DIR'])
         
         if use_rerank:
             # Hybrid: BM25 first, then Neural Rerank
             from extensions import app_globals
             from core.ch05_ranking import Ranking
+            from core.result_cache import ResultCache
             
             if app_globals.ranker is None:
                 app_globals.ranker = Ranking(current_app.config['DATA_DIR'], current_app.config['DOC_DIR'])
+            if app_globals.result_cache is None:
+                app_globals.result_cache = ResultCache(current_app.config['RESULT_CACHE_SIZE'],
+                                                       current_app.config['RESULT_CACHE_PATH'])
             
             # 1. Get BM25 results (Initial Retrieval)
-            bm25_results = app_globals.ranker.compute_bm25(query)[:20] # Top 20 candidate generation
+            ranker = app_globals.ranker
+            bm25_results = app_globals.result_cache.get_or_compute(
+                ranker, 'bm25', query, lambda: ranker.compute_bm25(query, top_k=20), top_k=20) # Top 20 candidate generation
             
             # 2. Neural Re-ranking
             results = neural.neural_rerank(query, bm25_results, docs)
@@ -1,7 +1,8 @@
-from flask import Blueprint, render_template, request, current_app
+from flask import Blueprint, render_template, request, current_app, jsonify
 from core.ch04_query_proc import QueryProcessing
 from core.ch03_indexing import Indexing
-from extensions import app_globals
+from core.autocomplete import Autocomplete, QueryLog
+from extensions import app_globals, suggestion_index
 
 query_proc_bp = Blueprint('query_proc', __name__)
 
@@ -10,20 +11,21 @@ def query_wildcard():
     results = None
     pattern = None
     if request.method == 'POST':
-        pattern = request.form.get('pattern')
+        pattern = request.form.get('query') or request.form.get('pattern')
         
         # Validate pattern
         if pattern and pattern.strip():
             if app_globals.indexer is None:
                 app_globals.indexer = Indexing(current_app.config['DATA_DIR'], current_app.config['DOC_DIR'])
-                app_globals.indexer.build_indexes()
+                app_globals.indexer.load_or_build()
             
             qp = QueryProcessing(current_app.config['DATA_DIR'])
-            vocab = list(app_globals.indexer.inverted_index.keys())
-            results = qp.match_wildcard(pattern, vocab)
+            # k-gram index (cached on the indexer): only a few candidates are regex-checked
+            results = qp.match_wildcard(pattern.strip(), app_globals.indexer.kgram_index)
         else:
              results = []
-    return render_template('query/wildcard.html', results=results, pattern=pattern)
+    return render_template('query/wildcard.html', results=results, pattern=pattern,
+                           matches=results, query=pattern)
 
 @query_proc_bp.route('/query/spellcheck', methods=['GET', 'POST'])
 def query_spellcheck():
@@ -32,17 +34,39 @@ def query_spellcheck():
     if request.method == 'POST':
         word = request.form.get('word')
         
-        if app_globals.indexer is None:
-            app_globals.indexer = Indexing(current_app.config['DATA_DIR'], current_app.config['DOC_DIR'])
-            app_globals.indexer.build_indexes()
-        
         qp = QueryProcessing(current_app.config['DATA_DIR'])
-        # Use simple vocabulary from inverted index
-        vocab = list(app_globals.indexer.inverted_index.keys()) 
-        # Add some common English/Nepali words if vocab is small
+        # The shared suggestion index over the index vocabulary (cached on the indexer)
+        vocab = suggestion_index(current_app.config)
+        # Offer some common English/Nepali words if vocab is small (for this request
+        # only: the index is shared with the word analyzer's spell checker)
+        extras = []
         if len(vocab) < 100:
-            vocab.extend(['nepal', 'kathmandu', 'search', 'engine', 'computer', 'science'])
+            extras = ['nepal', 'kathmandu', 'search', 'engine', 'computer', 'science']
             
-        suggestions = qp.spell_suggest(word, vocab)
+        suggestions = qp.spell_suggest(word or '', vocab, extra_words=extras)
         
     return render_template('query/spellcheck.html', suggestions=suggestions, word=word)
+
+def get_autocomplete():
+    """Completion trie over the index terms and the query log, rebuilt when the vocabulary changes."""
+    if app_globals.indexer is None:
+        app_globals.indexer = Indexing(current_app.config['DATA_DIR'], current_app.config['DOC_DIR'])
+        app_globals.indexer.load_or_build()
+    dictionary = app_globals.indexer.term_dictionary
+    if app_globals.autocomplete is None or app_globals.autocomplete.vocabulary is not dictionary:
+        app_globals.autocomplete = Autocomplete.from_index(app_globals.indexer.index,
+                                                           QueryLog(current_app.config['QUERY_LOG_PATH']))
+        app_globals.autocomplete.vocabulary = dictionary
+    return app_globals.autocomplete
+
+@query_proc_bp.route('/api/autocomplete', methods=['GET'])
+def api_autocomplete():
+    prefix = request.args.get('q', '')
+    k = request.args.get('k', 10, type=int)
+    if not prefix.strip():
+        return jsonify({'query': prefix, 'completions': []})
+    completions = get_autocomplete().complete(prefix, max(1, k))
+    return jsonify({
+        'query': prefix,
+        'completions': [{'text': text, 'score': score} for text, score in completions]
+    })
@@ -1,6 +1,8 @@
-from flask import Blueprint, render_template, request, current_app
+from flask import Blueprint, render_template, request, current_app, jsonify
 from core.ch05_ranking import Ranking
-from extensions import app_globals
+from core.autocomplete import QueryLog
+from core.result_cache import ResultCache
+from extensions import app_globals, suggestion_index
 import os
 
 ranking_bp = Blueprint('ranking', __name__)
@@ -14,8 +16,13 @@ def ranking_compare():
     if app_globals.ranker is None:
         app_globals.ranker = Ranking(current_app.config['DATA_DIR'], current_app.config['DOC_DIR'])
         
+    if app_globals.result_cache is None:
+        app_globals.result_cache = ResultCache(current_app.config['RESULT_CACHE_SIZE'],
+                                               current_app.config['RESULT_CACHE_PATH'])
+        
     if app_globals.word_analyzer is None:
-        app_globals.word_analyzer = WordAnalyzer(current_app.config['DATA_DIR'], current_app.config['DOC_DIR'])
+        app_globals.word_analyzer = WordAnalyzer(current_app.config['DATA_DIR'], current_app.config['DOC_DIR'],
+                                                 suggestion_index(current_app.config))
         
     query_processor = QueryProcessor(app_globals.word_analyzer)
     
@@ -32,12 +39,22 @@ def ranking_compare():
         b = float(request.form.get('b', 0.75))
         top_k = int(request.form.get('top_k', 10))
         
+        # Searched queries become completions for /api/autocomplete
+        if app_globals.autocomplete is not None:
+            app_globals.autocomplete.record_query(query)
+        else:
+            QueryLog(current_app.config['QUERY_LOG_PATH']).record(query)
+        
         # Analyze Query
         query_analysis = query_processor.process_query(query)
         
-        results_bm25 = app_globals.ranker.compute_bm25(query, k1, b)[:top_k]
-        results_tfidf = app_globals.ranker.compute_tfidf(query)[:top_k]
-        results_bim = app_globals.ranker.compute_bim(query)[:top_k]
+        ranker, cache = app_globals.ranker, app_globals.result_cache
+        results_bm25 = cache.get_or_compute(ranker, 'bm25', query, lambda: ranker.compute_bm25(query, k1, b, top_k=top_k),
+                                            k1=k1, b=b, top_k=top_k)
+        results_tfidf = cache.get_or_compute(ranker, 'tfidf', query, lambda: ranker.compute_tfidf(query, top_k=top_k),
+                                             top_k=top_k)
+        results_bim = cache.get_or_compute(ranker, 'bim', query, lambda: ranker.compute_bim(query, top_k=top_k),
+                                           top_k=top_k)
         
         # Load previews for all retrieved docs
         all_docs = set([doc for doc, _ in results_bm25] + [doc for doc, _ in results_tfidf] + [doc for doc, _ in results_bim])
@@ -58,6 +75,13 @@ def ranking_compare():
                           query_analysis=query_analysis,
                           top_k=request.form.get('top_k', 10))
 
+@ranking_bp.route('/api/result-cache', methods=['GET'])
+def result_cache_stats():
+    """Hit rate, latency and size counters of the ranking result cache."""
+    if app_globals.result_cache is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(app_globals.result_cache.stats(), enabled=True))
+
 @ranking_bp.route('/ranking/pagerank')
 def ranking_pagerank():
     if app_globals.ranker is None:
@@ -1,5 +1,5 @@
-from flask import Blueprint, render_template, request, current_app
-from core.ch02_text_analysis import TextAnalysis
+from flask import Blueprint, render_template, request, current_app, jsonify
+from core.ch02_text_analysis import TextAnalysis, TermCache
 
 text_analysis_bp = Blueprint('text_analysis', __name__)
 
@@ -12,3 +12,8 @@ def text_analysis_pipeline():
         analyzer = TextAnalysis(current_app.config['DATA_DIR'])
         results = analyzer.analyze_text(input_text)
     return render_template('text_analysis/pipeline.html', results=results, input_text=input_text)
+
+@text_analysis_bp.route('/api/term-cache', methods=['GET'])
+def term_cache_stats():
+    """Size and hit rate of the shared token -> term caches, one per stopword/stem configuration."""
+    return jsonify([cache.stats() for cache in TermCache.instances()])
@@ -0,0 +1,114 @@
+"""
+Benchmark the fast analysis path of TextAnalysis against analyze_text.
+
+Stages, timed over the whole corpus (best of --repeat runs):
+- tokenize:  _tokenize_fallback (replace, regex, split, filter) vs tokenize
+             (the same passes with a precompiled regex deleting whole runs)
+- stem:      the stopword filter + suffix rules of analyze_text vs
+             stem_tokens (one term cache lookup per token)
+- word:      the stem of one word (first 20000 corpus tokens),
+             analyze_text(word)['stemmed'][0] vs stem_token(word)
+- full:      analyze_text(text)['stemmed'] vs list(iter_terms(text))
+- index:     term frequencies per document, Counter(analyze_text()['stemmed'])
+             vs Counter(iter_terms()) and vs term IDs (iter_terms(text, lexicon))
+and checks that both paths produce the same tokens and terms on every
+document. With nepalikit installed both paths share its tokenizer, so only
+the stem stage differs.
+
+Usage (from submission/):
+    python scripts/benchmark_analysis.py [--repeat 3] [--limit N]
+"""
+
+import os
+import sys
+import time
+import argparse
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DATA_DIR_STR, DOC_DIR_STR
+from core.ch02_text_analysis import TextAnalysis, NEPALIKIT_AVAILABLE
+from core.doc_table import list_documents
+from core.lexicon import Lexicon
+
+
+def current_stem(analyzer, tokens):
+    """Steps 3-4 of analyze_text, as they run there."""
+    filtered = [t for t in tokens if t.lower() not in analyzer.stopwords]
+    set(tokens) - set(filtered)
+    stemmed = []
+    for token in filtered:
+        if token in analyzer.stem_dict:
+            stem = analyzer.stem_dict[token]
+            if stem:
+                stemmed.append(stem)
+        elif len(token) > 3:
+            stemmed_word = token
+            for suffix in ['हरू', 'हरु', 'लाई', 'बाट', 'मा', 'को', 'का', 'की', 'ले']:
+                if stemmed_word.endswith(suffix):
+                    stemmed_word = stemmed_word[:-len(suffix)]
+                    break
+            if stemmed_word:
+                stemmed.append(stemmed_word)
+        else:
+            stemmed.append(token)
+    return [s for s in stemmed if s]
+
+
+def best_of(fn, items, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [fn(item) for item in items]
+        best = min(best, time.perf_counter() - start)
+    return best, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--limit', type=int, default=None, help='only the first N documents')
+    args = parser.parse_args()
+
+    texts = []
+    for name in list_documents(DOC_DIR_STR)[:args.limit]:
+        with open(os.path.join(DOC_DIR_STR, name), 'r', encoding='utf-8') as f:
+            texts.append(f.read())
+    analyzer = TextAnalysis(DATA_DIR_STR)
+    tokenize = analyzer._tokenize_nepalikit if NEPALIKIT_AVAILABLE and analyzer.tokenizer else analyzer._tokenize_fallback
+    # Warm the term cache, as a long-running process would have it
+    for text in texts:
+        for _ in analyzer.iter_terms(text):
+            pass
+
+    all_tokens = [tokenize(text) for text in texts]
+    words = [token for tokens in all_tokens for token in tokens][:20000]
+    lexicon = Lexicon()
+    stages = [
+        ('tokenize', texts, tokenize, analyzer.tokenize),
+        ('stem', all_tokens, lambda tokens: current_stem(analyzer, tokens), analyzer.stem_tokens),
+        ('word', words, lambda word: (analyzer.analyze_text(word)['stemmed'] or [''])[0], analyzer.stem_token),
+        ('full', texts, lambda text: analyzer.analyze_text(text)['stemmed'], lambda text: list(analyzer.iter_terms(text))),
+        ('index', texts, lambda text: Counter(analyzer.analyze_text(text)['stemmed']),
+         lambda text: Counter(analyzer.iter_terms(text))),
+        ('index (IDs)', texts, lambda text: Counter(analyzer.analyze_text(text)['stemmed']),
+         lambda text: Counter(analyzer.iter_terms(text, lexicon))),
+    ]
+
+    print(f"Corpus: {len(texts)} docs, {sum(map(len, all_tokens))} tokens, "
+          f"{'nepalikit' if NEPALIKIT_AVAILABLE else 'fallback'} tokenizer, "
+          f"term cache {len(analyzer.term_cache.terms)} entries\n")
+    print(f"{'stage':<12} {'current ms':>11} {'fast ms':>9} {'speedup':>8} {'same':>5}")
+    for stage, items, current, fast in stages:
+        current_s, expected = best_of(current, items, args.repeat)
+        fast_s, actual = best_of(fast, items, args.repeat)
+        if stage == 'index (IDs)':
+            actual = [Counter({lexicon.terms[term_id]: tf for term_id, tf in counts.items()}) for counts in actual]
+        same = 'yes' if actual == expected else 'NO'
+        print(f"{stage:<12} {current_s * 1000:>11.1f} {fast_s * 1000:>9.1f} {current_s / fast_s:>7.2f}x {same:>5}")
+    print(f"\nTerm cache: {analyzer.term_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
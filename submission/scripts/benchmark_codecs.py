@@ -0,0 +1,83 @@
+"""
+Benchmark the postings codecs on the real corpus.
+
+For every codec reports bits per posting (docID gaps + tfs), bits per
+position and decode throughput in millions of integers per second.
+
+Usage (from submission/):
+    python scripts/benchmark_codecs.py [--repeat 3]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DATA_DIR_STR, DOC_DIR_STR
+from core.ch03_indexing import Indexing
+from core.storage.codecs import CODECS
+
+
+def collect_postings(indexer):
+    """Returns [(doc_ids, tfs, position_gaps), ...] for every term of every segment."""
+    postings = []
+    for segment in indexer.disk_index.segments:
+        disk = segment.disk
+        for term_id in range(disk.vocab_size):
+            doc_ids, tfs = disk.postings(term_id)
+            positions = disk.positions(term_id, tfs).astype(np.int64)
+            gaps = np.diff(positions, prepend=0)
+            doc_starts = np.concatenate(([0], np.cumsum(tfs)[:-1])).astype(np.int64)
+            gaps[doc_starts] = positions[doc_starts]
+            postings.append((np.array(doc_ids), np.array(tfs), gaps))
+    return postings
+
+
+def benchmark(codec, postings, repeat):
+    encoded = [(codec.encode_sorted(d), codec.encode(t), codec.encode(g)) for d, t, g in postings]
+    n_postings = sum(d.size for d, _, _ in postings)
+    n_positions = sum(g.size for _, _, g in postings)
+    posting_bytes = sum(len(d) + len(t) for d, t, _ in encoded)
+    position_bytes = sum(len(g) for _, _, g in encoded)
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for (d, t, g), (raw_d, raw_t, raw_g) in zip(encoded, postings):
+            codec.decode_sorted(d, raw_d.size)
+            codec.decode(t, raw_t.size)
+            codec.decode(g, raw_g.size)
+        best = min(best, time.perf_counter() - start)
+
+    return {
+        'bits_per_posting': 8 * posting_bytes / max(n_postings, 1),
+        'bits_per_position': 8 * position_bytes / max(n_positions, 1),
+        'total_kb': (posting_bytes + position_bytes) / 1024,
+        'decode_mints_per_s': (2 * n_postings + n_positions) / best / 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    indexer = Indexing(DATA_DIR_STR, DOC_DIR_STR)
+    stats = indexer.load_or_build()
+    postings = collect_postings(indexer)
+    print(f"Corpus: {stats['doc_count']} docs, {len(postings)} terms, "
+          f"{sum(d.size for d, _, _ in postings)} postings, {sum(g.size for _, _, g in postings)} positions\n")
+
+    print(f"{'codec':<10} {'bits/posting':>13} {'bits/position':>14} {'size (KB)':>10} {'decode (M ints/s)':>18}")
+    for name, codec in CODECS.items():
+        r = benchmark(codec, postings, args.repeat)
+        print(f"{name:<10} {r['bits_per_posting']:>13.2f} {r['bits_per_position']:>14.2f} "
+              f"{r['total_kb']:>10.1f} {r['decode_mints_per_s']:>18.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark the quantized impact-ordered index against the exact BM25 scorer.
+
+Latency is the mean per query (best of --repeat runs); effectiveness treats
+the exact BM25 top-k as the relevant set and reports precision@k (overlap)
+and average precision of the impact-ordered ranking. Rows with a postings
+budget show the anytime trade-off (early stop after that many postings).
+
+Usage (from submission/):
+    python scripts/benchmark_impact.py [--top-k 10] [--queries 200] [--bits 8] [--repeat 3]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DATA_DIR_STR, DOC_DIR_STR
+from core.ch05_ranking import Ranking
+from core.ch07_evaluation import Evaluation
+
+
+def make_queries(ranker, n, seed=0):
+    """Half from the 100 most frequent terms, half from the whole vocabulary, 1-8 terms each."""
+    rng = random.Random(seed)
+    by_df = sorted(ranker.df, key=lambda t: -ranker.df[t])
+    common = [' '.join(rng.sample(by_df[:100], rng.randint(1, 8))) for _ in range(n // 2)]
+    mixed = [' '.join(rng.sample(by_df, rng.randint(1, 8))) for _ in range(n - n // 2)]
+    return common + mixed
+
+
+def run(search, queries, repeat):
+    results = []
+    total = 0.0
+    for query in queries:
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            ranked = search(query)
+            best = min(best, time.perf_counter() - start)
+        total += best
+        results.append([doc for doc, _ in ranked])
+    return total / len(queries), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--bits', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    k = args.top_k
+
+    ranker = Ranking(DATA_DIR_STR, DOC_DIR_STR)
+    start = time.perf_counter()
+    index = ranker.build_impact_index(bits=args.bits)
+    print(f"Corpus: {ranker.N} docs, {index.num_postings} postings; impact index built in "
+          f"{time.perf_counter() - start:.2f}s, {index.memory_bytes() / 1024:.0f} KB, {args.bits}-bit impacts\n")
+
+    queries = make_queries(ranker, args.queries)
+    evaluation = Evaluation()
+    exact_ms, exact = run(lambda q: ranker.compute_bm25(q, top_k=k), queries, args.repeat)
+
+    print(f"{'method':<24} {'ms/query':>9} {'P@' + str(k):>7} {'AP':>7}")
+    print(f"{'exact BM25 (BMW)':<24} {exact_ms * 1000:>9.3f} {1:>7.3f} {1:>7.3f}")
+    budgets = [None] + [b for b in (20000, 5000, 1000) if b < index.num_postings]
+    for budget in budgets:
+        ms, ranked = run(lambda q: ranker.compute_bm25_impact(q, top_k=k, max_postings=budget), queries, args.repeat)
+        pairs = [(r, e) for r, e in zip(ranked, exact) if e]
+        precision = np.mean([evaluation.precision(r, e) for r, e in pairs])
+        ap = np.mean([evaluation.average_precision(r, e) for r, e in pairs])
+        name = 'impact SAAT' if budget is None else f'impact SAAT <= {budget}'
+        print(f"{name:<24} {ms * 1000:>9.3f} {precision:>7.3f} {ap:>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
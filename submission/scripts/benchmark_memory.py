@@ -0,0 +1,78 @@
+"""
+Measure the memory held by the corpus components (tracemalloc).
+
+Builds Ranking, then Indexing, then WordAnalyzer on the corpus and reports
+the memory each one adds (the shared analysis store and lexicon are
+counted with the first). Then compares, for the analyses the store keeps
+in memory, the lexicon ID arrays it holds against the lists of strings
+that loading them from JSON produces (the store's previous format).
+
+Run twice: the first run may analyze and fill the store.
+
+Usage (from submission/):
+    python scripts/benchmark_memory.py
+"""
+
+import os
+import sys
+import json
+import time
+import tracemalloc
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+from config import DATA_DIR_STR, DOC_DIR_STR
+from core.analysis_store import AnalysisStore
+from core.ch05_ranking import Ranking
+from core.ch03_indexing import Indexing
+from core.ch21_word_analysis import WordAnalyzer
+
+
+def traced(build):
+    start = time.perf_counter()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    return result, tracemalloc.get_traced_memory()[0] - before, time.perf_counter() - start
+
+
+def mb(size):
+    return f"{size / 2 ** 20:.1f} MB"
+
+
+def main():
+    argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter).parse_args()
+    tracemalloc.start()
+
+    def build_indexing():
+        indexing = Indexing(DATA_DIR_STR, DOC_DIR_STR)
+        indexing.build_indexes()
+        return indexing
+
+    components = [('Ranking', lambda: Ranking(DATA_DIR_STR, DOC_DIR_STR)),
+                  ('Indexing', build_indexing),
+                  ('WordAnalyzer', lambda: WordAnalyzer(DATA_DIR_STR, DOC_DIR_STR))]
+    kept = []
+    with Flask(__name__).app_context():
+        for name, build in components:
+            component, size, seconds = traced(build)
+            kept.append(component)
+            print(f"{name:<14} {mb(size):>10}  ({seconds:.1f}s)")
+    print(f"{'total':<14} {mb(tracemalloc.get_traced_memory()[0]):>10}")
+
+    store = AnalysisStore.open(DATA_DIR_STR)
+    analyses = list(store.entries.values())
+    lexicon = store.lexicon
+    print(f"\nAnalysis store: {len(analyses)} analyses in memory, lexicon of {len(lexicon)} strings")
+    ids_size = sum(a.token_ids.buffer_info()[1] * a.token_ids.itemsize + a.term_ids.buffer_info()[1] * a.term_ids.itemsize
+                   for a in analyses)
+    print(f"  as lexicon IDs:      {mb(ids_size):>10}")
+    encoded = [(json.dumps(a.tokens, ensure_ascii=False), json.dumps(a.stemmed, ensure_ascii=False)) for a in analyses]
+    as_strings, size, _ = traced(lambda: [(json.loads(tokens), json.loads(stemmed)) for tokens, stemmed in encoded])
+    print(f"  as lists of strings: {mb(size):>10}")
+
+
+if __name__ == "__main__":
+    main()
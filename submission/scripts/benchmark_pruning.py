@@ -0,0 +1,88 @@
+"""
+Benchmark safe top-k pruning (WAND, Block-Max WAND) against exhaustive BM25.
+
+Queries are drawn from the most frequent index terms (the worst case for
+pruning) and from the whole vocabulary. For every query length reports the
+mean latency and the mean number of fully scored documents per method, and
+checks that every method returns exactly the exhaustive top-k. (Queries
+with fewer than MIN_PRUNING_POSTINGS postings are merged exhaustively by
+compute_bm25 whatever the method; "scored" still counts what the method
+would score.)
+
+Usage (from submission/):
+    python scripts/benchmark_pruning.py [--top-k 10] [--queries 50] [--repeat 3]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DATA_DIR_STR, DOC_DIR_STR
+from core.ch05_ranking import Ranking
+from core.dynamic_pruning import wand_top_k, block_max_wand_top_k
+
+METHODS = {'wand': wand_top_k, 'bmw': block_max_wand_top_k}
+
+
+def make_queries(ranker, n, seed=0):
+    rng = random.Random(seed)
+    by_df = sorted(ranker.df, key=lambda t: -ranker.df[t])
+    queries = []
+    for length in (2, 4, 8, 16):
+        queries += [(f'common x{length}', ' '.join(rng.sample(by_df[:100], length))) for _ in range(n)]
+        queries += [(f'random x{length}', ' '.join(rng.sample(by_df, length))) for _ in range(n)]
+    return queries
+
+
+def time_call(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--top-k', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=50, help='queries per group')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    ranker = Ranking(DATA_DIR_STR, DOC_DIR_STR)
+    print(f"Corpus: {ranker.N} docs, {len(ranker.df)} terms, top-{args.top_k}\n")
+
+    groups = {}
+    mismatches = 0
+    for group, query in make_queries(ranker, args.queries):
+        row = groups.setdefault(group, {'n': 0, 'exhaustive': [0.0, 0]})
+        row['n'] += 1
+        seconds, exact = time_call(lambda: ranker.compute_bm25(query, top_k=args.top_k, pruning=None), args.repeat)
+        row['exhaustive'][0] += seconds
+        row['exhaustive'][1] += len(ranker.compute_bm25(query, pruning=None))
+
+        query_terms = [t for t in ranker.analyzer.iter_terms(query) if t in ranker.postings]
+        for name, method in METHODS.items():
+            seconds, result = time_call(lambda: ranker.compute_bm25(query, top_k=args.top_k, pruning=name), args.repeat)
+            term_postings = [ranker._bm25_term_postings(term, 1.5, 0.75) for term in query_terms]
+            _, scored = method(term_postings, args.top_k)
+            cell = row.setdefault(name, [0.0, 0])
+            cell[0] += seconds
+            cell[1] += scored
+            mismatches += result != exact
+
+    header = f"{'queries':<12}" + ''.join(f"{name + ' ms':>16}{'scored':>9}" for name in ['exhaustive', *METHODS])
+    print(header)
+    for group, row in groups.items():
+        n = row.pop('n')
+        print(f"{group:<12}" + ''.join(f"{seconds / n * 1000:>16.3f}{scored / n:>9.0f}" for seconds, scored in row.values()))
+    print(f"\nResults different from exhaustive: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
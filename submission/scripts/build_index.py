@@ -0,0 +1,43 @@
+"""
+Build the on-disk search index with the external-memory SPIMI builder.
+
+Usage (from submission/):
+    python scripts/build_index.py [--budget-mb 64] [--codec vbyte] [--keep-blocks]
+
+Prints the number of flushed blocks, build time and peak RSS of the run.
+"""
+
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DATA_DIR_STR, DOC_DIR_STR
+from core.ch03_indexing import Indexing
+from core.storage.codecs import CODECS
+from core.storage.disk_index import DEFAULT_CODEC
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget-mb', type=float, default=64, help='SPIMI block memory budget')
+    parser.add_argument('--codec', choices=sorted(CODECS), default=DEFAULT_CODEC)
+    parser.add_argument('--index-dir', default=None, help='defaults to data/index')
+    parser.add_argument('--keep-blocks', action='store_true', help='keep the intermediate block files')
+    args = parser.parse_args()
+
+    indexer = Indexing(DATA_DIR_STR, DOC_DIR_STR, index_dir=args.index_dir)
+    report = indexer.build_external(args.budget_mb, args.codec, args.keep_blocks)
+
+    stats = report['stats']
+    print(f"Indexed {stats['doc_count']} documents, {stats['vocab_size']} terms, "
+          f"{stats['total_tokens']} tokens into {indexer.index_dir}")
+    print(f"Blocks flushed : {report['blocks']} (budget {report['memory_budget_mb']} MB)")
+    print(f"Build time     : {report['seconds']} s")
+    peak = report['peak_rss_mb']
+    print(f"Peak RSS       : {f'{peak:.1f} MB' if peak is not None else 'n/a on this platform'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Import-time profile of the web app (or any module), from python -X importtime.
+
+Imports the target in a fresh interpreter and reports:
+- the modules it imports directly (for the app: config, extensions and
+  each blueprint) with their cumulative import time;
+- the top-level packages that cost the most, by their own (self) time
+  summed over all their modules;
+- heavy dependencies that are imported although they should only load with
+  the first request that needs them (--deferred).
+
+Exits with status 1 if the total exceeds --budget-ms or a deferred package
+was imported, so a startup regression can fail a check.
+
+Usage (from submission/):
+    python scripts/profile_imports.py [--target app] [--top 15] [--budget-ms 1000]
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+from collections import defaultdict
+
+SUBMISSION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFERRED = ('torch', 'pandas', 'networkx', 'scipy', 'nepalikit')
+
+
+def profile(target):
+    """[(depth, module, self_us, cumulative_us)] in import order, and wall seconds."""
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {target}'],
+                             cwd=SUBMISSION_DIR, capture_output=True, text=True)
+    seconds = time.perf_counter() - start
+    if process.returncode != 0:
+        raise RuntimeError(f"import {target} failed:\n{process.stderr[-2000:]}")
+    rows = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        # One leading space, then two more per nesting level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return rows, seconds
+
+
+def direct_imports(rows, target):
+    """(module, cumulative_us) of the modules target imports itself."""
+    # -X importtime lists a module after everything it imports
+    index = next((i for i, row in enumerate(rows) if row[1] == target), None)
+    if index is None:
+        return []
+    depth = rows[index][0]
+    direct = []
+    for child_depth, name, _, cumulative in reversed(rows[:index]):
+        if child_depth <= depth:
+            break
+        if child_depth == depth + 1:
+            direct.append((name, cumulative))
+    return direct
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', default='app', help='module to import (default: app, which runs create_app)')
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--budget-ms', type=float, default=None)
+    parser.add_argument('--deferred', nargs='*', default=list(DEFERRED),
+                        help='packages that must not be imported at startup')
+    args = parser.parse_args()
+
+    rows, seconds = profile(args.target)
+    total_us = sum(cumulative for depth, _, _, cumulative in rows if depth == 0)
+    print(f"import {args.target}: {total_us / 1000:.0f} ms of imports, {seconds * 1000:.0f} ms interpreter wall time\n")
+
+    print(f"{'imported by ' + args.target:<40} {'cumulative ms':>14}")
+    for name, cumulative in sorted(direct_imports(rows, args.target), key=lambda item: -item[1])[:args.top]:
+        print(f"{name:<40} {cumulative / 1000:>14.1f}")
+
+    by_package = defaultdict(int)
+    modules = defaultdict(int)
+    for _, name, self_us, _ in rows:
+        package = name.split('.')[0]
+        by_package[package] += self_us
+        modules[package] += 1
+    print(f"\n{'package':<40} {'self ms':>14} {'modules':>8}")
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<40} {self_us / 1000:>14.1f} {modules[package]:>8}")
+
+    failed = False
+    loaded = [package for package in args.deferred if package in by_package]
+    if loaded:
+        failed = True
+        print(f"\nImported at startup although deferred: {', '.join(loaded)}")
+    if args.budget_ms is not None and total_us / 1000 > args.budget_ms:
+        failed = True
+        print(f"\nOver budget: {total_us / 1000:.0f} ms > {args.budget_ms:.0f} ms")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
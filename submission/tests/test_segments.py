@@ -0,0 +1,71 @@
+import threading
+
+from core.storage.segments import SegmentedIndex, TieredMergePolicy
+
+
+class _Sized:
+    def __init__(self, live_count):
+        self.live_count = live_count
+
+
+def test_tiers_separate_small_flushes_from_base_segment():
+    policy = TieredMergePolicy(merge_factor=10, floor_docs=100)
+    assert [policy.tier(_Sized(n)) for n in (1, 100, 101, 800, 1000, 1001, 10000)] == [0, 0, 1, 1, 1, 2, 2]
+
+
+def test_single_document_commits_do_not_rewrite_base_segment(tmp_path):
+    index = SegmentedIndex.create(str(tmp_path), background_merges=False)
+    for i in range(800):
+        index.add_document(f'base{i}', [f't{i % 50}', 'x'])
+    index.commit()
+    base = index.segments[0]
+
+    for i in range(30):
+        index.add_document(f'new{i}', ['y'])
+        index.commit()
+
+    assert index.segments[0] is base
+    assert index.num_docs == 830
+    # Only the small segments were merged (previously ~2400 documents, the base segment each time)
+    assert index.merge_stats['docs_merged'] < 100
+    assert index.write_amplification < 1.2
+    index.close()
+
+
+def test_background_merges_do_not_close_segments_in_use(tmp_path):
+    # merge_factor=2 makes merges cascade: the merge thread retires segments back to back
+    policy = TieredMergePolicy(merge_factor=2, floor_docs=1)
+    index = SegmentedIndex.create(str(tmp_path), merge_policy=policy, background_merges=True)
+    for i in range(300):
+        index.add_document(f'base{i}', [f't{i % 40}', f'u{i}'])
+    index.commit()
+
+    errors = []
+    done = threading.Event()
+
+    def query():
+        while not done.is_set():
+            try:
+                index.get_postings('t3')
+                index.vocab_size
+            except Exception as e:
+                errors.append(e)
+
+    reader = threading.Thread(target=query)
+    reader.start()
+    try:
+        for i in range(150):
+            index.add_document(f'base{i % 50}', [f't{i % 40}', f'new{i}'])
+            index.commit()
+            index.vocab_size
+    except Exception as e:
+        errors.append(e)
+    finally:
+        done.set()
+        reader.join()
+
+    assert errors == []
+    index.wait_for_merges()
+    assert index.num_docs == 300
+    assert index.merge_stats['merges'] > 0
+    index.close()
@@ -0,0 +1,58 @@
+import sqlite3
+
+import pytest
+
+from core.analysis_store import AnalysisStore
+from core.distributed.sharded_search import ShardBroker
+
+DIGITS = str.maketrans('0123456789', '०१२३४५६७८९')
+WORDS = ['नेपाल', 'सरकार', 'संसद', 'काठमाडौं', 'चुनाव', 'बजेट', 'शिक्षा', 'स्वास्थ्य', 'खेल', 'प्रविधि']
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    doc_dir = tmp_path / 'documents'
+    doc_dir.mkdir()
+    for i in range(24):
+        # Every document has words of its own, so each shard adds new lexicon entries
+        number = str(i).translate(DIGITS)
+        words = [WORDS[i % len(WORDS)], WORDS[(i * 3) % len(WORDS)], f'शब्द{number}', f'पद{number}{number}']
+        (doc_dir / f'doc{i:02d}.txt').write_text(' '.join(words * 3), encoding='utf-8')
+    return str(doc_dir), str(tmp_path)
+
+
+def lexicon_rows(data_dir):
+    with sqlite3.connect(f'{data_dir}/analysis_store.sqlite3') as db:
+        return db.execute("SELECT id, term FROM lexicon ORDER BY id").fetchall()
+
+
+def test_broker_starts_on_cold_store(corpus):
+    doc_dir, data_dir = corpus
+    broker = ShardBroker.start(doc_dir, data_dir, num_shards=3)
+    try:
+        assert broker.num_docs == 24
+        assert all(broker.alive)
+        assert [name for name, _ in broker.search('शब्द७')['results']] == ['doc07.txt']
+    finally:
+        broker.close()
+
+    rows = lexicon_rows(data_dir)
+    assert [term_id for term_id, _ in rows] == list(range(len(rows)))
+    assert len({term for _, term in rows}) == len(rows)
+
+
+def test_shard_add_document_after_parent_adds_terms(corpus):
+    doc_dir, data_dir = corpus
+    broker = ShardBroker.start(doc_dir, data_dir, num_shards=2)
+    try:
+        # The parent analyzes first: the new strings get IDs the shards have not loaded
+        text = 'अनौठोशब्दएक अनौठोशब्ददुई नेपाल'
+        store = AnalysisStore.open(data_dir)
+        assert store.analyze(text).tokens == text.split()
+
+        broker.add_document('new.txt', text)
+        result = broker.search('अनौठोशब्दएक')
+        assert not result['partial']
+        assert [name for name, _ in result['results']] == ['new.txt']
+    finally:
+        broker.close()
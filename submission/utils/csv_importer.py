@@ -1,7 +1,7 @@
 
 import os
+import sys
 import json
-import pandas as pd
 from pathlib import Path
 
 
@@ -10,7 +10,33 @@ def ensure_dir(path):
     os.makedirs(path, exist_ok=True)
 
 
-def import_csv_corpus(csv_path, base_dir, prefix='csv'):
+def index_imported_documents(base_dir, doc_ids):
+    """
+    Add imported documents to the persisted search index as a new segment
+    (replaced documents are tombstoned), so the index does not need a full
+    rebuild. Does nothing if no index has been built yet.
+    """
+    submission_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if submission_dir not in sys.path:
+        sys.path.insert(0, submission_dir)
+    from core.ch03_indexing import Indexing
+    
+    indexer = Indexing(base_dir, os.path.join(base_dir, 'documents'))
+    if indexer.open_index(allow_stale=True) is None:
+        print("No search index yet; it will be built on first use.")
+        return None
+    
+    for doc_id in doc_ids:
+        indexer.add_document(f"{doc_id}.txt")
+    indexer.commit()
+    stats = indexer.stats
+    # close_index waits for background merges to finish
+    indexer.close_index()
+    print(f"✓ Indexed {len(doc_ids)} documents into a new segment")
+    return stats
+
+
+def import_csv_corpus(csv_path, base_dir, prefix='csv', update_index=True):
     """
     Import CSV data into the document corpus.
     
@@ -18,10 +44,13 @@ def import_csv_corpus(csv_path, base_dir, prefix='csv'):
         csv_path: Path to the CSV file
         base_dir: Base data directory
         prefix: Prefix for document IDs (e.g., 'train' or 'valid')
+        update_index: Also add the documents to the persisted search index
     
     Returns:
         List of document IDs that were imported
     """
+    import pandas as pd
+    
     # Read CSV file
     df = pd.read_csv(csv_path)
     
@@ -77,6 +106,9 @@ def import_csv_corpus(csv_path, base_dir, prefix='csv'):
         json.dump(metadata, f, ensure_ascii=False, indent=2)
     
     print(f"✓ Imported {len(imported_ids)} documents with prefix '{prefix}'")
+    
+    if update_index:
+        index_imported_documents(base_dir, imported_ids)
     return imported_ids
 
 